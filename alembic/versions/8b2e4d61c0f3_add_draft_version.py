@@ -0,0 +1,25 @@
+"""Add draft version column
+
+Revision ID: 8b2e4d61c0f3
+Revises: 3f6c2a9d1b47
+Create Date: 2026-10-17 16:21:08.304517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4d61c0f3'
+down_revision = '3f6c2a9d1b47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('drafts', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('drafts') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,52 @@
+"""Add artifact content digest
+
+Revision ID: c4d7a1e59b26
+Revises: 8b2e4d61c0f3
+Create Date: 2026-10-17 18:42:15.671204
+
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d7a1e59b26'
+down_revision = '8b2e4d61c0f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('artifacts', sa.Column('content_sha256', sa.String(length=64), nullable=True))
+
+    # Backfill so artifacts stored before this revision are deduplicated too
+    artifacts = sa.table(
+        'artifacts',
+        sa.column('id', sa.String),
+        sa.column('content', sa.String),
+        sa.column('content_sha256', sa.String)
+    )
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(artifacts.c.id, artifacts.c.content).where(artifacts.c.content.isnot(None)))
+    for artifact_id, content in rows.fetchall():
+        bind.execute(
+            artifacts.update()
+            .where(artifacts.c.id == artifact_id)
+            .values(content_sha256=hashlib.sha256(content.encode()).hexdigest())
+        )
+
+    # The digest index covers every lookup the conversation/type index served
+    op.drop_index('ix_artifacts_conversation_id_artifact_type', table_name='artifacts')
+    op.create_index(
+        'ix_artifacts_conversation_id_artifact_type_content_sha256',
+        'artifacts', ['conversation_id', 'artifact_type', 'content_sha256']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_artifacts_conversation_id_artifact_type_content_sha256', table_name='artifacts')
+    op.create_index('ix_artifacts_conversation_id_artifact_type', 'artifacts', ['conversation_id', 'artifact_type'])
+    with op.batch_alter_table('artifacts') as batch_op:
+        batch_op.drop_column('content_sha256')
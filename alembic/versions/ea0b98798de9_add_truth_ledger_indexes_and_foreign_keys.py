@@ -0,0 +1,59 @@
+"""Add truth ledger indexes and foreign keys
+
+Revision ID: ea0b98798de9
+Revises: 65db29c79501
+Create Date: 2026-10-17 09:12:41.208311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ea0b98798de9'
+down_revision = '65db29c79501'
+branch_labels = None
+depends_on = None
+
+CONVERSATION_CHILD_TABLES = ['slots', 'features', 'artifacts', 'events', 'approvals']
+
+
+def upgrade() -> None:
+    op.create_index('ix_drafts_owner_updated_at', 'drafts', ['owner', 'updated_at'])
+    op.create_index('ix_drafts_updated_at_id', 'drafts', ['updated_at', 'id'])
+    op.create_index('uq_slots_conversation_id_slot_name', 'slots', ['conversation_id', 'slot_name'], unique=True)
+    op.create_index('ix_features_conversation_id', 'features', ['conversation_id'])
+    op.create_index('ix_artifacts_conversation_id_artifact_type', 'artifacts', ['conversation_id', 'artifact_type'])
+    op.create_index('ix_events_conversation_id_timestamp', 'events', ['conversation_id', 'timestamp'])
+    op.create_index('ix_approvals_artifact_id_status', 'approvals', ['artifact_id', 'status'])
+    op.create_index('ix_approvals_conversation_id', 'approvals', ['conversation_id'])
+
+    # Batch mode lets SQLite add constraints by rebuilding the table
+    for table in CONVERSATION_CHILD_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.create_foreign_key(
+                f'fk_{table}_conversation_id_conversations',
+                'conversations', ['conversation_id'], ['id'], ondelete='CASCADE'
+            )
+    with op.batch_alter_table('approvals') as batch_op:
+        batch_op.create_foreign_key(
+            'fk_approvals_artifact_id_artifacts',
+            'artifacts', ['artifact_id'], ['id'], ondelete='CASCADE'
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('approvals') as batch_op:
+        batch_op.drop_constraint('fk_approvals_artifact_id_artifacts', type_='foreignkey')
+    for table in reversed(CONVERSATION_CHILD_TABLES):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_constraint(f'fk_{table}_conversation_id_conversations', type_='foreignkey')
+
+    op.drop_index('ix_approvals_conversation_id', table_name='approvals')
+    op.drop_index('ix_approvals_artifact_id_status', table_name='approvals')
+    op.drop_index('ix_events_conversation_id_timestamp', table_name='events')
+    op.drop_index('ix_artifacts_conversation_id_artifact_type', table_name='artifacts')
+    op.drop_index('ix_features_conversation_id', table_name='features')
+    op.drop_index('uq_slots_conversation_id_slot_name', table_name='slots')
+    op.drop_index('ix_drafts_updated_at_id', table_name='drafts')
+    op.drop_index('ix_drafts_owner_updated_at', table_name='drafts')
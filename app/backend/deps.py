@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Session
-from app.db.base import SessionLocal
+from app.db.base import AsyncSessionLocal, SessionLocal
 
 def get_db():
     """Database dependency"""
@@ -8,3 +8,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    """Async database dependency"""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, JSON
+from sqlalchemy import Column, String, DateTime, Integer, JSON, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.base import Base
 import uuid
@@ -7,10 +7,17 @@ from datetime import datetime
 class Draft(Base):
     __tablename__ = "drafts"
     
+    __table_args__ = (
+        Index("ix_drafts_owner_updated_at", "owner", "updated_at"),
+        Index("ix_drafts_updated_at_id", "updated_at", "id"),
+    )
+    
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     owner = Column(String, nullable=False)
     payload = Column(JSON, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Bumped on every write; exposed as the draft's ETag for optimistic concurrency
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
 class Conversation(Base):
     __tablename__ = "conversations"
@@ -23,8 +30,12 @@ class Conversation(Base):
 class Slot(Base):
     __tablename__ = "slots"
     
+    __table_args__ = (
+        Index("uq_slots_conversation_id_slot_name", "conversation_id", "slot_name", unique=True),
+    )
+    
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    conversation_id = Column(String, nullable=False)
+    conversation_id = Column(String, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
     slot_name = Column(String, nullable=False)
     slot_value = Column(JSON)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -33,8 +44,12 @@ class Slot(Base):
 class Feature(Base):
     __tablename__ = "features"
     
+    __table_args__ = (
+        Index("ix_features_conversation_id", "conversation_id"),
+    )
+    
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    conversation_id = Column(String, nullable=False)
+    conversation_id = Column(String, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
     feature_name = Column(String, nullable=False)
     feature_description = Column(String)
     status = Column(String, default="planned")
@@ -44,19 +59,29 @@ class Feature(Base):
 class Artifact(Base):
     __tablename__ = "artifacts"
     
+    __table_args__ = (
+        Index("ix_artifacts_conversation_id_artifact_type_content_sha256",
+              "conversation_id", "artifact_type", "content_sha256"),
+    )
+    
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    conversation_id = Column(String, nullable=False)
+    conversation_id = Column(String, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
     artifact_type = Column(String, nullable=False)  # 'prd', 'contract', 'code'
     artifact_path = Column(String, nullable=False)
     content = Column(String)
+    content_sha256 = Column(String(64))  # hex digest of content, for deduplication
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class Event(Base):
     __tablename__ = "events"
     
+    __table_args__ = (
+        Index("ix_events_conversation_id_timestamp", "conversation_id", "timestamp"),
+    )
+    
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    conversation_id = Column(String, nullable=False)
+    conversation_id = Column(String, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
     event_type = Column(String, nullable=False)
     event_data = Column(JSON)
     timestamp = Column(DateTime, default=datetime.utcnow)
@@ -64,9 +89,14 @@ class Event(Base):
 class Approval(Base):
     __tablename__ = "approvals"
     
+    __table_args__ = (
+        Index("ix_approvals_artifact_id_status", "artifact_id", "status"),
+        Index("ix_approvals_conversation_id", "conversation_id"),
+    )
+    
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    conversation_id = Column(String, nullable=False)
-    artifact_id = Column(String, nullable=False)
+    conversation_id = Column(String, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
+    artifact_id = Column(String, ForeignKey("artifacts.id", ondelete="CASCADE"), nullable=False)
     approver = Column(String, nullable=False)
     status = Column(String, default="pending")  # 'pending', 'approved', 'rejected'
     comments = Column(String)
@@ -83,3 +113,23 @@ class Policy(Base):
     is_active = Column(String, default="true")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class Job(Base):
+    __tablename__ = "jobs"
+    
+    __table_args__ = (
+        Index("ix_jobs_status_created_at", "status", "created_at"),
+    )
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    job_type = Column(String, nullable=False)  # 'commit'
+    conversation_id = Column(String, index=True)
+    status = Column(String, nullable=False, default="queued")  # 'queued', 'running', 'succeeded', 'failed'
+    payload = Column(JSON, nullable=False)
+    result = Column(JSON)
+    error = Column(String)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
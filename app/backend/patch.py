@@ -0,0 +1,142 @@
+import copy
+import json
+from typing import Any, Dict, List
+from sqlalchemy import Text, case, cast, func, literal
+from sqlalchemy.dialects.postgresql import JSONB, array
+
+MERGE_PATCH_MEDIA_TYPE = "application/merge-patch+json"
+JSON_PATCH_MEDIA_TYPE = "application/json-patch+json"
+
+class PatchError(ValueError):
+    """A patch document that is malformed or cannot be applied"""
+
+class PatchTestFailed(PatchError):
+    """A JSON Patch ``test`` operation did not match the document"""
+
+def apply_merge_patch(target: Any, patch: Any) -> Any:
+    """Apply an RFC 7396 JSON Merge Patch, returning a new document"""
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+    return result
+
+def _parse_pointer(pointer: Any) -> List[str]:
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith("/")):
+        raise PatchError(f"Invalid JSON pointer: {pointer!r}")
+    if not pointer:
+        return []
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+def _index(container: list, token: str, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise PatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise PatchError(f"Array index out of range: {index}")
+    return index
+
+def _resolve(doc: Any, tokens: List[str]) -> Any:
+    for token in tokens:
+        if isinstance(doc, dict):
+            if token not in doc:
+                raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+            doc = doc[token]
+        elif isinstance(doc, list):
+            doc = doc[_index(doc, token)]
+        else:
+            raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+    return doc
+
+def _add(doc: Any, tokens: List[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent = _resolve(doc, tokens[:-1])
+    if isinstance(parent, dict):
+        parent[tokens[-1]] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, tokens[-1], allow_end=True), value)
+    else:
+        raise PatchError(f"Cannot add to a scalar at /{'/'.join(tokens)}")
+    return doc
+
+def _remove(doc: Any, tokens: List[str]) -> Any:
+    if not tokens:
+        raise PatchError("Cannot remove the whole document")
+    parent = _resolve(doc, tokens[:-1])
+    _resolve(parent, tokens[-1:])
+    if isinstance(parent, dict):
+        del parent[tokens[-1]]
+    else:
+        del parent[_index(parent, tokens[-1])]
+    return doc
+
+def apply_json_patch(target: Any, operations: Any) -> Any:
+    """Apply an RFC 6902 JSON Patch, returning a new document
+    
+    Operations are applied to a copy, so a failing patch leaves ``target``
+    untouched.
+    """
+    if not isinstance(operations, list):
+        raise PatchError("A JSON Patch must be an array of operations")
+    doc = copy.deepcopy(target)
+    for operation in operations:
+        if not isinstance(operation, dict) or "op" not in operation or "path" not in operation:
+            raise PatchError(f"Invalid JSON Patch operation: {operation!r}")
+        op = operation["op"]
+        tokens = _parse_pointer(operation["path"])
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise PatchError(f"'{op}' operation needs a value")
+        
+        if op == "add":
+            doc = _add(doc, tokens, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            doc = _remove(doc, tokens)
+        elif op == "replace":
+            _resolve(doc, tokens)
+            if tokens:
+                doc = _remove(doc, tokens)
+            doc = _add(doc, tokens, copy.deepcopy(operation["value"]))
+        elif op in ("move", "copy"):
+            source = _parse_pointer(operation.get("from"))
+            if op == "move" and tokens[:len(source)] == source and tokens != source:
+                raise PatchError("Cannot move a value into one of its children")
+            value = copy.deepcopy(_resolve(doc, source))
+            if op == "move":
+                doc = _remove(doc, source)
+            doc = _add(doc, tokens, value)
+        elif op == "test":
+            if _resolve(doc, tokens) != operation["value"]:
+                raise PatchTestFailed(f"Test failed at {operation['path']}")
+        else:
+            raise PatchError(f"Unknown JSON Patch operation: {op!r}")
+    return doc
+
+def jsonb_merge_patch(column, patch: Dict[str, Any]):
+    """SQL expression applying a merge patch to a JSON column on PostgreSQL
+    
+    Builds nested ``jsonb_set`` and ``-`` calls so the database merges the
+    patch into the stored document in place, without the full document
+    making a round trip through the app.
+    """
+    return cast(_jsonb_merge(cast(column, JSONB), patch), column.type)
+
+def _jsonb_merge(base, patch: Dict[str, Any]):
+    # A merge patch turns anything that is not an object into one before merging
+    merged = case((func.jsonb_typeof(base) == "object", base), else_=cast(literal("{}"), JSONB))
+    for key, value in patch.items():
+        if value is None:
+            merged = merged.op("-", return_type=JSONB)(literal(key, Text))
+        else:
+            if isinstance(value, dict):
+                value = _jsonb_merge(base.op("->", return_type=JSONB)(literal(key, Text)), value)
+            else:
+                value = cast(literal(json.dumps(value)), JSONB)
+            merged = func.jsonb_set(merged, array([literal(key, Text)]), value, True, type_=JSONB)
+    return merged
@@ -1,14 +1,31 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, select, update, and_, or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, List, Optional, Tuple
+import base64
+import json
+import os
 import uuid
 from datetime import datetime
+import psycopg
 from app.backend.models import Draft
-from app.backend.deps import get_db
-from pydantic import BaseModel
+from app.backend.deps import get_async_db
+from app.backend.patch import (
+    JSON_PATCH_MEDIA_TYPE, MERGE_PATCH_MEDIA_TYPE, PatchError, PatchTestFailed,
+    apply_json_patch, apply_merge_patch, jsonb_merge_patch
+)
+from pydantic import BaseModel, ValidationError
 
 router = APIRouter()
 
+STREAM_BATCH_SIZE = int(os.getenv("DRAFTS_STREAM_BATCH_SIZE", "500"))
+IMPORT_CHUNK_SIZE = int(os.getenv("DRAFTS_IMPORT_CHUNK_SIZE", "1000"))
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/jsonl")
+PATCHABLE_FIELDS = {"owner", "payload"}
+PATCH_RETRIES = 3
+
 class DraftCreate(BaseModel):
     owner: str
     payload: dict
@@ -22,62 +39,423 @@ class DraftResponse(BaseModel):
     owner: str
     payload: dict
     updated_at: datetime
+    version: int
     
     class Config:
         from_attributes = True
 
-@router.get("/drafts", response_model=List[DraftResponse])
-def list_drafts(db: Session = Depends(get_db)):
-    """List all drafts"""
-    drafts = db.query(Draft).all()
+class BatchError(BaseModel):
+    index: int
+    error: str
+
+class BatchResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[BatchError]
+
+def _encode_cursor(updated_at: datetime, id: str) -> str:
+    """Encode a keyset position as an opaque cursor"""
+    raw = json.dumps([updated_at.isoformat(), id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor: str):
+    """Decode an opaque cursor back into an (updated_at, id) keyset position"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        updated_at, id = json.loads(raw)
+        return datetime.fromisoformat(updated_at), str(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _etag(draft: Draft) -> str:
+    return f'"{draft.version}"'
+
+def _header_versions(header: Optional[str]) -> Optional[List[int]]:
+    """Versions listed in an If-Match / If-None-Match header; None for ``*``"""
+    if header is None or header.strip() == "*":
+        return None
+    versions = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag.startswith('"') and tag.endswith('"') and tag[1:-1].isdigit():
+            versions.append(int(tag[1:-1]))
+    return versions
+
+def _precondition_failed() -> HTTPException:
+    return HTTPException(status_code=412, detail="Draft has been modified; fetch it again and retry")
+
+async def _conditional_update(db: AsyncSession, id: str, versions: Optional[List[int]], values: dict) -> Optional[Draft]:
+    """Update a draft only if its version is one of ``versions`` (any if None), bumping the version
+    
+    Returns the updated draft, or None if no row matched.
+    """
+    query = update(Draft).where(Draft.id == id)
+    if versions is not None:
+        query = query.where(Draft.version.in_(versions))
+    query = (
+        query.values(**values, updated_at=datetime.utcnow(), version=Draft.version + 1)
+        .returning(Draft)
+    )
+    # "fetch" refreshes a draft already loaded in this session from the RETURNING row
+    draft = await db.scalar(query, execution_options={"synchronize_session": "fetch"})
+    await db.commit()
+    return draft
+
+async def _missing_or_stale(db: AsyncSession, id: str) -> HTTPException:
+    """The error for a conditional update that matched no row"""
+    if await db.get(Draft, id) is None:
+        return HTTPException(status_code=404, detail="Draft not found")
+    return _precondition_failed()
+
+def _draft_query(owner: Optional[str], cursor: Optional[str]):
+    """Build the keyset-ordered draft query, newest first"""
+    query = select(Draft).order_by(Draft.updated_at.desc(), Draft.id.desc())
+    if owner is not None:
+        query = query.where(Draft.owner == owner)
+    if cursor is not None:
+        updated_at, id = _decode_cursor(cursor)
+        query = query.where(or_(
+            Draft.updated_at < updated_at,
+            and_(Draft.updated_at == updated_at, Draft.id < id)
+        ))
+    return query
+
+async def _stream_ndjson(db: AsyncSession, query):
+    """Yield drafts as NDJSON from a server-side cursor in fixed-size batches"""
+    result = await db.stream_scalars(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+    async for batch in result.partitions():
+        yield "".join(
+            json.dumps({
+                "id": draft.id,
+                "owner": draft.owner,
+                "payload": draft.payload,
+                "updated_at": draft.updated_at.isoformat(),
+                "version": draft.version
+            }) + "\n"
+            for draft in batch
+        )
+        db.expunge_all()
+
+@router.get("/drafts", response_model=List[DraftResponse], responses={400: {"description": "Invalid cursor"}})
+async def list_drafts(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    owner: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List drafts, newest first, using keyset pagination"""
+    query = _draft_query(owner, cursor)
+    
+    if format == "ndjson":
+        return StreamingResponse(_stream_ndjson(db, query), media_type="application/x-ndjson")
+    
+    drafts = (await db.scalars(query.limit(limit + 1))).all()
+    if len(drafts) > limit:
+        drafts = drafts[:limit]
+        next_cursor = _encode_cursor(drafts[-1].updated_at, drafts[-1].id)
+        next_url = request.url.include_query_params(cursor=next_cursor)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+        response.headers["X-Next-Cursor"] = next_cursor
     return drafts
 
 @router.post("/drafts", response_model=DraftResponse, status_code=201)
-def create_draft(draft: DraftCreate, db: Session = Depends(get_db)):
+async def create_draft(draft: DraftCreate, response: Response, db: AsyncSession = Depends(get_async_db)):
     """Create a new draft"""
     db_draft = Draft(
         id=str(uuid.uuid4()),
         owner=draft.owner,
         payload=draft.payload,
-        updated_at=datetime.utcnow()
+        updated_at=datetime.utcnow(),
+        version=1
     )
     db.add(db_draft)
-    db.commit()
-    db.refresh(db_draft)
+    await db.commit()
+    response.headers["ETag"] = _etag(db_draft)
     return db_draft
 
-@router.get("/drafts/{id}", response_model=DraftResponse)
-def get_draft(id: str, db: Session = Depends(get_db)):
-    """Get a draft by ID"""
-    draft = db.query(Draft).filter(Draft.id == id).first()
+@router.get(
+    "/drafts/{id}",
+    response_model=DraftResponse,
+    responses={304: {"description": "Draft unchanged since the ETag in If-None-Match"}}
+)
+async def get_draft(
+    id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a draft by ID; a matching If-None-Match returns 304 without a body"""
+    draft = await db.get(Draft, id)
     if not draft:
         raise HTTPException(status_code=404, detail="Draft not found")
+    
+    if if_none_match is not None:
+        versions = _header_versions(if_none_match)
+        if versions is None or draft.version in versions:
+            return Response(status_code=304, headers={"ETag": _etag(draft)})
+    response.headers["ETag"] = _etag(draft)
     return draft
 
-@router.put("/drafts/{id}", response_model=DraftResponse)
-def update_draft(id: str, draft_update: DraftUpdate, db: Session = Depends(get_db)):
-    """Update a draft"""
-    draft = db.query(Draft).filter(Draft.id == id).first()
-    if not draft:
-        raise HTTPException(status_code=404, detail="Draft not found")
+@router.put("/drafts/{id}", response_model=DraftResponse, responses={412: {"description": "ETag in If-Match is stale"}})
+async def update_draft(
+    id: str,
+    draft_update: DraftUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Replace a draft's owner and/or payload, optionally only if If-Match is current"""
+    values = draft_update.model_dump(exclude_none=True)
+    versions = _header_versions(if_match) if if_match is not None else None
     
-    if draft_update.owner is not None:
-        draft.owner = draft_update.owner
-    if draft_update.payload is not None:
-        draft.payload = draft_update.payload
-    
-    draft.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(draft)
+    draft = await _conditional_update(db, id, versions, values)
+    if draft is None:
+        raise await _missing_or_stale(db, id)
+    response.headers["ETag"] = _etag(draft)
     return draft
 
+def _patched_fields(draft: Draft, content_type: str, body: object) -> dict:
+    """Apply a merge patch or JSON Patch to a draft's editable fields"""
+    current = {"owner": draft.owner, "payload": draft.payload}
+    if content_type == JSON_PATCH_MEDIA_TYPE:
+        patched = apply_json_patch(current, body)
+    else:
+        patched = apply_merge_patch(current, body)
+    
+    if not isinstance(patched, dict) or set(patched) != PATCHABLE_FIELDS:
+        raise PatchError("A draft must keep exactly the fields owner and payload")
+    if not isinstance(patched["owner"], str) or not isinstance(patched["payload"], dict):
+        raise PatchError("owner must be a string and payload an object")
+    return {key: value for key, value in patched.items() if value != current[key]}
+
+def _validate_merge_patch(body: object) -> None:
+    if not isinstance(body, dict) or not set(body) <= PATCHABLE_FIELDS:
+        raise PatchError("A draft merge patch may only contain owner and payload")
+    if "owner" in body and not isinstance(body["owner"], str):
+        raise PatchError("owner must be a string")
+    if "payload" in body and not isinstance(body["payload"], dict):
+        raise PatchError("payload must be an object")
+
+@router.patch(
+    "/drafts/{id}",
+    response_model=DraftResponse,
+    responses={
+        409: {"description": "A JSON Patch test failed or the draft kept changing"},
+        412: {"description": "ETag in If-Match is stale"},
+        415: {"description": "Unsupported patch media type"},
+        422: {"description": "Patch cannot be applied to the draft"}
+    },
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                MERGE_PATCH_MEDIA_TYPE: {"schema": {"$ref": "#/components/schemas/DraftUpdate"}},
+                JSON_PATCH_MEDIA_TYPE: {"schema": {"type": "array", "items": {"type": "object"}}}
+            }
+        }
+    }
+)
+async def patch_draft(
+    id: str,
+    request: Request,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Partially update a draft with a JSON Merge Patch or a JSON Patch
+    
+    Merge patches on PostgreSQL are applied by the database with jsonb_set,
+    so only the changed keys travel. Otherwise the patch is applied here and
+    written back only if the draft is still at the version it was read at.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type == "application/json":
+        content_type = MERGE_PATCH_MEDIA_TYPE
+    if content_type not in (MERGE_PATCH_MEDIA_TYPE, JSON_PATCH_MEDIA_TYPE):
+        raise HTTPException(status_code=415, detail=f"Use {MERGE_PATCH_MEDIA_TYPE} or {JSON_PATCH_MEDIA_TYPE}")
+    try:
+        body = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body is not valid JSON")
+    versions = _header_versions(if_match) if if_match is not None else None
+    
+    try:
+        if content_type == MERGE_PATCH_MEDIA_TYPE and db.bind.dialect.name == "postgresql":
+            _validate_merge_patch(body)
+            values = dict(body)
+            if "payload" in values:
+                values["payload"] = jsonb_merge_patch(Draft.payload, values["payload"])
+            draft = await _conditional_update(db, id, versions, values)
+            if draft is None:
+                raise await _missing_or_stale(db, id)
+            response.headers["ETag"] = _etag(draft)
+            return draft
+        
+        for _ in range(PATCH_RETRIES):
+            draft = await db.get(Draft, id, populate_existing=True)
+            if not draft:
+                raise HTTPException(status_code=404, detail="Draft not found")
+            if versions is not None and draft.version not in versions:
+                raise _precondition_failed()
+            
+            updated = await _conditional_update(db, id, [draft.version], _patched_fields(draft, content_type, body))
+            if updated is not None:
+                response.headers["ETag"] = _etag(updated)
+                return updated
+            if versions is not None:
+                raise _precondition_failed()
+    except PatchTestFailed as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except PatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    raise HTTPException(status_code=409, detail="Draft kept changing while the patch was applied; retry")
+
 @router.delete("/drafts/{id}", status_code=204)
-def delete_draft(id: str, db: Session = Depends(get_db)):
+async def delete_draft(id: str, db: AsyncSession = Depends(get_async_db)):
     """Delete a draft"""
-    draft = db.query(Draft).filter(Draft.id == id).first()
+    draft = await db.get(Draft, id)
     if not draft:
         raise HTTPException(status_code=404, detail="Draft not found")
     
-    db.delete(draft)
-    db.commit()
+    await db.delete(draft)
+    await db.commit()
     return None
+
+async def _batch_items(request: Request) -> AsyncIterator[Tuple[int, object]]:
+    """Yield (index, decoded item) from an NDJSON stream or a JSON array body
+    
+    NDJSON is decoded line by line as the body arrives. Items that fail to
+    decode are yielded as the exception so they can be reported per row.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    
+    if content_type in NDJSON_MEDIA_TYPES:
+        index = 0
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    try:
+                        yield index, json.loads(line)
+                    except ValueError as e:
+                        yield index, e
+                    index += 1
+        if buffer.strip():
+            try:
+                yield index, json.loads(buffer)
+            except ValueError as e:
+                yield index, e
+    elif content_type == "application/json":
+        try:
+            items = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body is not valid JSON")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of drafts")
+        for index, item in enumerate(items):
+            yield index, item
+    else:
+        raise HTTPException(status_code=415, detail="Use application/json or application/x-ndjson")
+
+def _uses_copy(db: AsyncSession) -> bool:
+    return db.bind.dialect.name == "postgresql" and db.bind.dialect.driver == "psycopg"
+
+async def _copy_drafts(db: AsyncSession, rows: List[dict]) -> None:
+    """Load rows with COPY on psycopg connections"""
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    async with raw.driver_connection.cursor() as cursor:
+        async with cursor.copy("COPY drafts (id, owner, payload, updated_at) FROM STDIN") as copy:
+            for row in rows:
+                await copy.write_row((row["id"], row["owner"], json.dumps(row["payload"]), row["updated_at"]))
+
+async def _insert_chunk(db: AsyncSession, chunk: List[Tuple[int, dict]], errors: List[BatchError]) -> int:
+    """Insert one chunk in a single transaction, isolating bad rows on failure"""
+    rows = [row for _, row in chunk]
+    try:
+        if _uses_copy(db):
+            await _copy_drafts(db, rows)
+        else:
+            await db.execute(insert(Draft), rows)
+        await db.commit()
+        return len(rows)
+    except (SQLAlchemyError, psycopg.Error):
+        # COPY talks to the raw psycopg cursor, so its errors are not wrapped by SQLAlchemy
+        await db.rollback()
+    
+    # Retry row by row so one bad draft doesn't sink the whole chunk
+    inserted = 0
+    for index, row in chunk:
+        try:
+            await db.execute(insert(Draft), [row])
+            await db.commit()
+            inserted += 1
+        except SQLAlchemyError as e:
+            await db.rollback()
+            errors.append(BatchError(index=index, error=str(e.orig if hasattr(e, "orig") else e)))
+    return inserted
+
+@router.post(
+    "/drafts:batch",
+    response_model=BatchResult,
+    responses={400: {"description": "Malformed batch body"}, 415: {"description": "Unsupported media type"}},
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/DraftCreate"}}
+                },
+                "application/x-ndjson": {"schema": {"$ref": "#/components/schemas/DraftCreate"}}
+            }
+        }
+    }
+)
+async def create_drafts_batch(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Bulk-create drafts from NDJSON or a JSON array in chunked transactions"""
+    inserted = 0
+    errors: List[BatchError] = []
+    chunk: List[Tuple[int, dict]] = []
+    
+    async for index, item in _batch_items(request):
+        if isinstance(item, Exception):
+            errors.append(BatchError(index=index, error=f"Invalid JSON: {item}"))
+            continue
+        try:
+            draft = DraftCreate.model_validate(item)
+        except ValidationError as e:
+            errors.append(BatchError(index=index, error=str(e)))
+            continue
+        
+        chunk.append((index, {
+            "id": str(uuid.uuid4()),
+            "owner": draft.owner,
+            "payload": draft.payload,
+            "updated_at": datetime.utcnow()
+        }))
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            inserted += await _insert_chunk(db, chunk, errors)
+            chunk = []
+    
+    if chunk:
+        inserted += await _insert_chunk(db, chunk, errors)
+    
+    errors.sort(key=lambda error: error.index)
+    return BatchResult(inserted=inserted, failed=len(errors), errors=errors)
+
+@router.get(
+    "/drafts:export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}, "description": "Drafts as NDJSON"}}
+)
+async def export_drafts(owner: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    """Stream every draft as NDJSON"""
+    return StreamingResponse(_stream_ndjson(db, _draft_query(owner, None)), media_type="application/x-ndjson")
@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+from typing import Any, Dict
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+class _WaitTrackingMixin:
+    """Counts checkouts that found the pool exhausted and had to wait"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+    
+    def _do_get(self):
+        exhausted = self._max_overflow > -1 and self.checkedout() >= self.size() + self._max_overflow
+        if not exhausted:
+            return super()._do_get()
+        
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            with self._stats_lock:
+                self.waits += 1
+                self.wait_time += time.perf_counter() - started
+
+class WaitTrackingQueuePool(_WaitTrackingMixin, QueuePool):
+    pass
+
+class WaitTrackingAsyncQueuePool(_WaitTrackingMixin, AsyncAdaptedQueuePool):
+    pass
+
+def pool_options(url: str, is_async: bool = False) -> Dict[str, Any]:
+    """Engine keyword arguments for the pool configured by DB_POOL_* variables
+    
+    SQLite keeps SQLAlchemy's defaults. DB_PGBOUNCER=1 hands pooling to
+    PgBouncer (transaction mode): NullPool and no server-side prepared statements.
+    """
+    if url.startswith("sqlite"):
+        return {}
+    
+    options: Dict[str, Any] = {"pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") == "1"}
+    
+    if os.getenv("DB_PGBOUNCER") == "1":
+        options["poolclass"] = NullPool
+        if "+asyncpg" in url:
+            options["connect_args"] = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+        else:
+            options["connect_args"] = {"prepare_threshold": None}
+        return options
+    
+    options.update(
+        poolclass=WaitTrackingAsyncQueuePool if is_async else WaitTrackingQueuePool,
+        pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        pool_use_lifo=os.getenv("DB_POOL_LIFO") == "1"
+    )
+    return options
+
+def pool_stats(pool) -> Dict[str, Any]:
+    """Snapshot of a connection pool's utilisation"""
+    stats: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow
+        )
+    if isinstance(pool, _WaitTrackingMixin):
+        stats.update(
+            waits=pool.waits,
+            wait_time_ms=round(pool.wait_time * 1000, 2),
+            timeouts=pool.timeouts
+        )
+    return stats
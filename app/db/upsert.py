@@ -0,0 +1,15 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+def dialect_insert(db: Session, table):
+    """INSERT for the session's dialect, with ``on_conflict_do_*`` support
+    
+    PostgreSQL and SQLite (3.24+) both implement ``ON CONFLICT``; other
+    backends are not supported by the app.
+    """
+    name = db.get_bind().dialect.name
+    if name == "postgresql":
+        return postgresql.insert(table)
+    if name == "sqlite":
+        return sqlite.insert(table)
+    raise NotImplementedError(f"No upsert support for {name}")
@@ -1,6 +1,12 @@
 from fastapi import APIRouter, HTTPException
 from sqlalchemy import text
-from app.db.base import engine
+from app.db.base import async_engine, engine
+from app.db.pool import pool_stats
+from app.orchestrator.artifacts import get_artifact_writer
+from app.orchestrator.ledger import get_event_writer
+from app.orchestrator.llm.base import json_stats
+from app.orchestrator.llm.factory import routing_stats
+from app.orchestrator.llm.limiter import limiter_stats
 import os
 
 router = APIRouter()
@@ -14,8 +20,8 @@ async def health_check():
 async def readiness_check():
     """Readiness check with database connectivity"""
     try:
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
         
         return {
             "status": "ready",
@@ -32,3 +38,21 @@ async def readiness_check():
                 "error": str(e)
             }
         )
+
+@router.get("/diagz")
+async def diagnostics():
+    """Runtime diagnostics for capacity tuning"""
+    return {
+        "service": "agentic-dev-team",
+        "database": {
+            "sync_pool": pool_stats(engine.pool),
+            "async_pool": pool_stats(async_engine.sync_engine.pool)
+        },
+        "llm": {
+            "limiters": limiter_stats(),
+            "structured_output": json_stats(),
+            "providers": routing_stats()
+        },
+        "ledger": get_event_writer().stats(),
+        "artifacts": get_artifact_writer().stats()
+    }
@@ -0,0 +1,146 @@
+import os
+import time
+import weakref
+from typing import Dict
+from fastapi import APIRouter, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from sqlalchemy import event
+from starlette.routing import Match
+
+# With PROMETHEUS_MULTIPROC_DIR set (see gunicorn.conf.py) every worker writes
+# its samples to files in that directory and /metrics aggregates them all
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests being handled", multiprocess_mode="livesum"
+)
+DB_QUERIES = Counter(
+    "db_queries_total", "SQL statements executed", ["engine", "operation"]
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds", "SQL statement latency", ["engine", "operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+)
+LLM_CALLS = Counter(
+    "llm_calls_total", "LLM provider calls", ["provider", "call", "outcome"]
+)
+LLM_LATENCY = Histogram(
+    "llm_call_duration_seconds", "LLM provider call latency", ["provider", "call"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Estimated LLM tokens sent and received", ["provider", "direction"]
+)
+GENERATOR_STAGE_LATENCY = Histogram(
+    "generator_stage_duration_seconds", "PRD generator stage latency", ["mode", "stage"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+)
+
+router = APIRouter()
+
+_instrumented = weakref.WeakSet()
+
+def _route_template(scope) -> str:
+    """The matched route's path template, so ids do not explode label cardinality
+    
+    Called once the app has handled the request: API routes record
+    themselves in the scope as they match. Only plain Starlette routes such
+    as the docs need a scan of the route table.
+    """
+    route = scope.get("route")
+    if route is None and "endpoint" in scope:
+        route = next((r for r in scope["app"].routes if r.matches(scope)[0] == Match.FULL), None)
+    return getattr(route, "path", "unmatched")
+
+class MetricsMiddleware:
+    """ASGI middleware recording request count, latency and concurrency per route"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status = 500
+        
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        started = time.perf_counter()
+        HTTP_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_PROGRESS.dec()
+            method = scope["method"]
+            route = _route_template(scope)
+            HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+
+def _operation(statement: str) -> str:
+    words = statement.lstrip().split(None, 1)
+    return words[0].upper() if words else "OTHER"
+
+def instrument_engine(engine, name: str) -> None:
+    """Count and time every statement run on a (sync) engine"""
+    if engine in _instrumented:
+        return
+    _instrumented.add(engine)
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+    
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        operation = _operation(statement)
+        DB_QUERIES.labels(name, operation).inc()
+        DB_QUERY_LATENCY.labels(name, operation).observe(time.perf_counter() - started)
+    
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # A failed statement never reaches after_cursor_execute
+        if context.connection is not None and context.connection.info.get("query_started"):
+            context.connection.info["query_started"].pop()
+
+def observe_llm_call(provider: str, call: str, ok: bool, seconds: float,
+                     prompt_tokens: int = 0, completion_tokens: int = 0) -> None:
+    """Record one finished provider call"""
+    LLM_CALLS.labels(provider, call, "ok" if ok else "error").inc()
+    LLM_LATENCY.labels(provider, call).observe(seconds)
+    if prompt_tokens:
+        LLM_TOKENS.labels(provider, "prompt").inc(prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.labels(provider, "completion").inc(completion_tokens)
+
+def observe_stage_timings(mode: str, timings_ms: Dict[str, float]) -> None:
+    """Record generator stage timings reported in milliseconds"""
+    for stage, ms in timings_ms.items():
+        GENERATOR_STAGE_LATENCY.labels(mode, stage).observe(ms / 1000)
+
+def collect_metrics() -> bytes:
+    """Prometheus text exposition for this process, or every worker in multiprocess mode"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(collect_metrics(), media_type=CONTENT_TYPE_LATEST)
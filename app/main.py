@@ -1,16 +1,42 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import os
 from app.orchestrator.routes import router as orchestrator_router
 from app.backend.routes_drafts import router as drafts_router
 from app.devops.health import router as health_router
-from app.db.base import engine, run_migrations
+from app.devops.metrics import MetricsMiddleware, instrument_engine, router as metrics_router
+from app.db.base import async_engine, engine, run_migrations
+from app.orchestrator.artifacts import close_artifact_writer
+from app.orchestrator.jobs import start_job_workers, stop_job_workers
+from app.orchestrator.ledger import start_event_writer, stop_event_writer
+from app.orchestrator.llm.factory import close_llm_clients
+from app.orchestrator.llm.http import open_http_pool
+from app.orchestrator.store import start_conversation_sweeper, stop_conversation_sweeper
+from app.orchestrator.templates import start_template_watcher, stop_template_watcher
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open app-scoped resources on startup and release them on shutdown"""
+    open_http_pool()
+    start_template_watcher()
+    start_event_writer()
+    start_job_workers()
+    start_conversation_sweeper()
+    yield
+    await stop_conversation_sweeper()
+    await stop_template_watcher()
+    await stop_job_workers()
+    await stop_event_writer()
+    await close_llm_clients()
+    close_artifact_writer()
 
 def create_app() -> FastAPI:
     app = FastAPI(
         title="Agentic Dev Team",
         description="Multi-agent web development system",
-        version="1.0.0"
+        version="1.0.0",
+        lifespan=lifespan
     )
     
     allowed_origins = os.getenv("ALLOWED_ORIGINS", "*").split(",")
@@ -22,12 +48,17 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
     
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(engine, "sync")
+    instrument_engine(async_engine.sync_engine, "async")
+    
     if os.getenv("RUN_DB_MIGRATIONS") == "1":
         run_migrations()
     
     app.include_router(orchestrator_router, prefix="/intake", tags=["orchestrator"])
     app.include_router(drafts_router, prefix="/v1", tags=["drafts"])
     app.include_router(health_router, tags=["health"])
+    app.include_router(metrics_router, tags=["health"])
     
     return app
 
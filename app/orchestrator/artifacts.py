@@ -0,0 +1,261 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import select
+from app.backend.models import Artifact
+from app.db.base import SessionLocal
+from app.orchestrator.store import ensure_conversation
+
+def atomic_write(path: str, data: bytes) -> None:
+    """Write a file via a temp file renamed into place, so readers never see a partial write"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class ArtifactStream:
+    """An artifact written chunk by chunk; ``close`` stores it and returns its location
+    
+    The default buffers in memory and hands the whole document to the writer
+    on close. ``close`` is idempotent, so it can also run from a ``finally``.
+    """
+    
+    def __init__(self, writer: "ArtifactWriter", path: str, artifact_type: str, conversation_id: Optional[str]):
+        self.writer = writer
+        self.path = path
+        self.artifact_type = artifact_type
+        self.conversation_id = conversation_id
+        self._chunks: List[str] = []
+        self._location: Optional[str] = None
+    
+    async def append(self, chunk: str) -> None:
+        self._chunks.append(chunk)
+    
+    async def close(self) -> str:
+        if self._location is None:
+            self._location = await self.writer.write(
+                self.path, "".join(self._chunks), self.artifact_type, self.conversation_id
+            )
+        return self._location
+
+class ArtifactWriter(ABC):
+    """Stores generated artifacts off the event loop
+    
+    Blocking I/O runs on a bounded thread pool shared by every writer, so a
+    slow filesystem or database stalls at most ``max_workers`` threads and
+    never the requests being served alongside.
+    """
+    
+    store = "unknown"
+    
+    def __init__(self, executor: ThreadPoolExecutor):
+        self.executor = executor
+        self.writes = 0
+        self.deduplicated = 0
+    
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Run blocking ``fn(*args)`` on the artifact I/O pool"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+    
+    @abstractmethod
+    async def write(self, path: str, content: str, artifact_type: str, conversation_id: Optional[str] = None) -> str:
+        """Store an artifact and return where it ended up
+        
+        ``path`` is the artifact's logical location, e.g. ``docs/prds/FT-1.md``.
+        """
+    
+    def open_stream(self, path: str, artifact_type: str, conversation_id: Optional[str] = None) -> ArtifactStream:
+        """Start an artifact that arrives in chunks"""
+        return ArtifactStream(self, path, artifact_type, conversation_id)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"store": self.store, "writes": self.writes, "deduplicated": self.deduplicated}
+
+class _FileArtifactStream(ArtifactStream):
+    """Appends chunks to a ``.part`` file next to the artifact, renamed into place on close
+    
+    Chunks are written in ``flush_bytes`` batches, so an interrupted stream
+    still leaves most of the document on disk without a pool round trip
+    per token.
+    """
+    
+    def __init__(self, writer: "FileArtifactWriter", path: str, artifact_type: str,
+                 conversation_id: Optional[str], flush_bytes: int = 4096):
+        super().__init__(writer, path, artifact_type, conversation_id)
+        self.part_path = f"{path}.part"
+        self.flush_bytes = flush_bytes
+        self._buffered = 0
+        self._file = None
+    
+    async def append(self, chunk: str) -> None:
+        self._chunks.append(chunk)
+        self._buffered += len(chunk)
+        if self._buffered >= self.flush_bytes:
+            await self._flush()
+    
+    async def close(self) -> str:
+        if self._location is None:
+            await self._flush()
+            await self.writer.run(self._finish)
+            self.writer.writes += 1
+            self._location = self.path
+        return self._location
+    
+    async def _flush(self) -> None:
+        data = "".join(self._chunks).encode()
+        self._chunks, self._buffered = [], 0
+        await self.writer.run(self._append, data)
+    
+    def _append(self, data: bytes) -> None:
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.part_path, 'wb')
+        self._file.write(data)
+        self._file.flush()
+    
+    def _finish(self) -> None:
+        if self._file is None:
+            self._append(b"")
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self.part_path, self.path)
+
+class FileArtifactWriter(ArtifactWriter):
+    """Writes each artifact atomically to its own path"""
+    
+    store = "file"
+    
+    async def write(self, path: str, content: str, artifact_type: str, conversation_id: Optional[str] = None) -> str:
+        await self.run(atomic_write, path, content.encode())
+        self.writes += 1
+        return path
+    
+    def open_stream(self, path: str, artifact_type: str, conversation_id: Optional[str] = None) -> ArtifactStream:
+        return _FileArtifactStream(self, path, artifact_type, conversation_id)
+
+class BlobArtifactWriter(ArtifactWriter):
+    """Content-addressed blob directory: identical artifacts are stored once
+    
+    Blobs live at ``<directory>/<sha[:2]>/<sha><ext>``, keeping the logical
+    path's extension, and that blob path is returned as the location.
+    """
+    
+    store = "blob"
+    
+    def __init__(self, executor: ThreadPoolExecutor, directory: str):
+        super().__init__(executor)
+        self.directory = directory
+    
+    async def write(self, path: str, content: str, artifact_type: str, conversation_id: Optional[str] = None) -> str:
+        data = content.encode()
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = os.path.join(self.directory, digest[:2], digest + os.path.splitext(path)[1])
+        if await self.run(self._store, blob_path, data):
+            self.writes += 1
+        else:
+            self.deduplicated += 1
+        return blob_path
+    
+    def _store(self, blob_path: str, data: bytes) -> bool:
+        if os.path.exists(blob_path):
+            return False
+        atomic_write(blob_path, data)
+        return True
+
+class DatabaseArtifactWriter(ArtifactWriter):
+    """Stores artifact content in the artifacts table
+    
+    Re-committing identical content for the same conversation and artifact
+    type reuses the existing row, found by its indexed sha256 digest rather
+    than by comparing content. Returns ``artifact://<id>``.
+    """
+    
+    store = "db"
+    
+    def __init__(self, executor: ThreadPoolExecutor, session_factory: Optional[Callable] = None):
+        super().__init__(executor)
+        self.session_factory = session_factory or SessionLocal
+    
+    async def write(self, path: str, content: str, artifact_type: str, conversation_id: Optional[str] = None) -> str:
+        if conversation_id is None:
+            raise ValueError("Storing artifacts in the database needs a conversation_id")
+        artifact_id, created = await self.run(self._store, path, content, artifact_type, conversation_id)
+        if created:
+            self.writes += 1
+        else:
+            self.deduplicated += 1
+        return f"artifact://{artifact_id}"
+    
+    def _store(self, path: str, content: str, artifact_type: str, conversation_id: str):
+        digest = hashlib.sha256(content.encode()).hexdigest()
+        db = self.session_factory()
+        try:
+            existing = db.scalar(select(Artifact.id).where(
+                Artifact.conversation_id == conversation_id,
+                Artifact.artifact_type == artifact_type,
+                Artifact.content_sha256 == digest
+            ).limit(1))
+            if existing is not None:
+                return existing, False
+            
+            ensure_conversation(db, [conversation_id])
+            artifact = Artifact(
+                conversation_id=conversation_id,
+                artifact_type=artifact_type,
+                artifact_path=path,
+                content=content,
+                content_sha256=digest
+            )
+            db.add(artifact)
+            db.commit()
+            return artifact.id, True
+        finally:
+            db.close()
+
+_executor: Optional[ThreadPoolExecutor] = None
+_writer: Optional[ArtifactWriter] = None
+_writer_lock = threading.Lock()
+
+def create_artifact_writer(store: str, executor: ThreadPoolExecutor) -> ArtifactWriter:
+    """Build the writer for an ARTIFACT_STORE value: ``file``, ``blob`` or ``db``"""
+    if store == "file":
+        return FileArtifactWriter(executor)
+    if store == "blob":
+        return BlobArtifactWriter(executor, os.getenv("ARTIFACT_BLOB_DIR", "artifacts/blobs"))
+    if store == "db":
+        return DatabaseArtifactWriter(executor)
+    raise ValueError(f"Unsupported artifact store: {store}")
+
+def get_artifact_writer() -> ArtifactWriter:
+    """Process-wide artifact writer configured by ARTIFACT_* variables"""
+    global _executor, _writer
+    with _writer_lock:
+        if _writer is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("ARTIFACT_IO_THREADS", "4")),
+                thread_name_prefix="artifact-io"
+            )
+            _writer = create_artifact_writer(os.getenv("ARTIFACT_STORE", "file").lower(), _executor)
+        return _writer
+
+def close_artifact_writer() -> None:
+    """Wait for pending artifact writes and release the I/O threads"""
+    global _executor, _writer
+    with _writer_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+        _executor = _writer = None
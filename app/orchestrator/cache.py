@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class LRUCache:
+    """Thread-safe LRU cache with optional idle TTL eviction
+    
+    With ``max_bytes`` set, entries are also evicted least recently used
+    first once their combined ``sizeof`` estimate exceeds it. The entry just
+    written is never evicted to make room for itself.
+    """
+    
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = None,
+                 max_bytes: Optional[int] = None, sizeof: Optional[Callable[[Any], int]] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a cached value and mark it as recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, touched_at, size = entry
+            now = time.monotonic()
+            if self._expired(touched_at, now):
+                self._remove(key)
+                self.expirations += 1
+                return default
+            self._entries[key] = (value, now, size)
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """Insert or replace a value, evicting the least recently used entries"""
+        size = self.sizeof(value) if self.sizeof is not None else 0
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic(), size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes and len(self._entries) > 1
+            ):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a value from the cache"""
+        with self._lock:
+            entry = self._remove(key)
+            return default if entry is None else entry[0]
+    
+    def purge_expired(self) -> int:
+        """Drop every entry whose TTL has elapsed, returning how many were removed"""
+        if self.ttl_seconds is None:
+            return 0
+        now = time.monotonic()
+        removed = 0
+        with self._lock:
+            # Entries are kept in access order, so stop at the first fresh one
+            while self._entries:
+                key, entry = next(iter(self._entries.items()))
+                if not self._expired(entry[1], now):
+                    break
+                self._remove(key)
+                removed += 1
+            self.expirations += removed
+        return removed
+    
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Live entry count, estimated footprint and eviction counters"""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _remove(self, key: Hashable) -> Optional[tuple]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+        return entry
+    
+    def _expired(self, touched_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - touched_at > self.ttl_seconds
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+class ContractStore:
+    """Keeps a parsed OpenAPI contract in memory and patches it in place on disk
+    
+    The file is only re-parsed when its mtime/size change and its content hash
+    differs from what was last seen. Writes go to a temp file that is renamed
+    over the contract while holding an exclusive lock, so concurrent commits
+    in this process or in other workers never interleave or lose updates.
+    """
+    
+    def __init__(self, path: str, default_factory: Optional[Callable[[], dict]] = None):
+        self.path = path
+        self.default_factory = default_factory or dict
+        self._contract: Optional[dict] = None
+        self._signature = None
+        self._digest = None
+        self._lock = threading.Lock()
+    
+    def load(self) -> dict:
+        """Return the current contract, re-reading the file only if it changed"""
+        with self._lock:
+            return self._refresh()
+    
+    def apply_paths(self, paths: Dict[str, dict]) -> bool:
+        """Idempotently set path items, writing only if something changed"""
+        with self._lock, self._file_lock():
+            contract = self._refresh()
+            changed = self._signature is None
+            
+            contract_paths = contract.setdefault("paths", {})
+            for path, item in paths.items():
+                if contract_paths.get(path) != item:
+                    contract_paths[path] = item
+                    changed = True
+            
+            if changed:
+                try:
+                    self._write(contract)
+                except BaseException:
+                    # The cached model was mutated; force a reload from disk next time
+                    self._contract = self._signature = self._digest = None
+                    raise
+            return changed
+    
+    def _refresh(self) -> dict:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self._contract is None or self._signature is not None:
+                self._contract = self.default_factory()
+                self._signature = self._digest = None
+            return self._contract
+        
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if self._contract is not None and signature == self._signature:
+            return self._contract
+        
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        if self._contract is None or digest != self._digest:
+            self._contract = yaml.load(raw, Loader=SafeLoader) or {}
+            self._digest = digest
+        self._signature = signature
+        return self._contract
+    
+    def _write(self, contract: dict) -> None:
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        raw = yaml.dump(contract, Dumper=SafeDumper, default_flow_style=False, sort_keys=False).encode()
+        
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".api.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(raw)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        
+        stat = os.stat(self.path)
+        self._signature = (stat.st_mtime_ns, stat.st_size)
+        self._digest = hashlib.sha256(raw).hexdigest()
+    
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive advisory lock shared with other processes (no-op without fcntl)"""
+        if fcntl is None:
+            yield
+            return
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with open(f"{self.path}.lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+_stores: Dict[str, ContractStore] = {}
+_stores_lock = threading.Lock()
+
+def get_contract_store(path: str, default_factory: Optional[Callable[[], dict]] = None) -> ContractStore:
+    """Process-wide ContractStore for a contract file"""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = ContractStore(path, default_factory)
+        return _stores[key]
@@ -0,0 +1,86 @@
+import hashlib
+from typing import Any, Dict, Optional, Tuple
+from app.orchestrator.llm.base import LLMClient
+from app.orchestrator.llm.cache import ResponseCache, cache_key
+from app.orchestrator.llm.factory import get_llm_client, get_response_cache
+from app.orchestrator.slots import ConversationSlots, SlotManager, get_slot_manager
+
+EXTRACTION_INSTRUCTIONS = """Extract project intake details from the brief below.
+Fill a field only when the brief states it or clearly implies it; omit every
+other field rather than guessing. List fields hold short items, one per entry.
+
+Brief:
+"""
+
+SLOT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        name: (
+            {"type": "array", "items": {"type": "string"}, "description": question}
+            if name in SlotManager.LIST_SLOTS else
+            {"type": "string", "description": question}
+        )
+        for name, question in SlotManager.SLOT_QUESTIONS.items()
+    }
+}
+
+class ExtractionError(RuntimeError):
+    """The LLM call behind an extraction failed"""
+
+def brief_digest(brief: str) -> str:
+    """Hash of a brief, ignoring differences in whitespace"""
+    return hashlib.sha256(" ".join(brief.split()).encode()).hexdigest()
+
+class SlotExtractor:
+    """Fills conversation slots from a free-text brief with one structured LLM call
+    
+    Extractions are cached by brief hash (and model) in the shared response
+    cache, so resubmitting the same brief is not billed again.
+    """
+    
+    def __init__(self, llm_client: Optional[LLMClient] = None, cache: Optional[ResponseCache] = None):
+        self.llm_client = llm_client or get_llm_client()
+        self.cache = cache or get_response_cache()
+        self.slot_manager = get_slot_manager()
+    
+    async def extract(self, brief: str) -> Tuple[Dict[str, Any], bool]:
+        """Slot values stated in the brief, and whether they came from cache"""
+        key = cache_key(self.llm_client.provider, self.llm_client.model, f"extract:{brief_digest(brief)}", SLOT_SCHEMA)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return cached, True
+        
+        result = await self.llm_client.generate_json_response(f"{EXTRACTION_INSTRUCTIONS}{brief}", SLOT_SCHEMA)
+        if not isinstance(result, dict):
+            raise ExtractionError("LLM returned a non-object extraction")
+        if "error" in result:
+            raise ExtractionError(str(result["error"]))
+        
+        values = {}
+        for slot_name, value in result.items():
+            value = self._clean(slot_name, value)
+            if value is not None:
+                values[slot_name] = value
+        if values:
+            # An empty result is more likely a failed parse than an empty brief; let a retry call again
+            await self.cache.set(key, values)
+        return values, False
+    
+    def _clean(self, slot_name: str, value: Any) -> Any:
+        """Coerce an extracted value to the slot's type, or None to drop it"""
+        if slot_name not in ConversationSlots.model_fields or value is None:
+            return None
+        if slot_name in SlotManager.LIST_SLOTS:
+            value = self.slot_manager.normalize_slot_value(slot_name, value)
+            if not isinstance(value, list):
+                return None
+            value = [str(item).strip() for item in value if item is not None and str(item).strip()]
+        elif isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            value = str(value).strip()
+        else:
+            return None
+        return value if self.slot_manager.validate_slot_value(slot_name, value) else None
+
+def get_slot_extractor() -> SlotExtractor:
+    """Slot extractor dependency"""
+    return SlotExtractor()
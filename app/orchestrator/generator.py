@@ -1,224 +1,234 @@
-import os
-import yaml
-from typing import List
+import asyncio
+import contextlib
+import time
 from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from app.devops.metrics import observe_stage_timings
+from app.orchestrator.artifacts import get_artifact_writer
+from app.orchestrator.contracts import get_contract_store
 from app.orchestrator.slots import ConversationSlots
 from app.orchestrator.llm.factory import get_llm_client
+from app.orchestrator.pipeline import ArtifactPipeline, ArtifactStage, GenerationResult
+from app.orchestrator.templates import (
+    PRD_INSTRUCTIONS, PROJECT_INFO_TEMPLATE, CompiledTemplate, get_template_registry
+)
+
+PROJECT_INFO = CompiledTemplate("project_info", PROJECT_INFO_TEMPLATE)
 
 class PRDGenerator:
     """Generates PRDs and updates API contracts based on conversation slots"""
     
-    def __init__(self):
+    def __init__(self, conversation_id: Optional[str] = None):
+        self.conversation_id = conversation_id
         self.llm_client = get_llm_client()
+        self.writer = get_artifact_writer()
+        # The contract update only needs data_entities, so it runs alongside the PRD
+        self.pipeline = ArtifactPipeline([
+            ArtifactStage("prd", self._generate_prd),
+            ArtifactStage("contracts", self._update_contracts),
+        ])
     
-    async def generate_artifacts(self, conversation: ConversationSlots) -> List[str]:
+    async def generate_artifacts(self, conversation: ConversationSlots) -> GenerationResult:
         """Generate PRD and update contracts based on conversation slots"""
-        artifacts = []
-        
-        prd_path = await self._generate_prd(conversation)
-        artifacts.append(prd_path)
-        
-        contract_path = await self._update_contracts(conversation)
-        artifacts.append(contract_path)
+        result = await self.pipeline.run(conversation)
+        observe_stage_timings("batch", result.timings_ms)
+        return result
+    
+    async def stream_artifacts(self, conversation: ConversationSlots) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Stream PRD tokens as they are generated, updating contracts alongside
         
-        return artifacts
+        Yields ``(event, data)`` pairs. The PRD is stored incrementally and
+        closed even if the client goes away, so a partial document is kept;
+        the contract update always runs to completion.
+        """
+        started = time.perf_counter()
+        contracts = asyncio.ensure_future(self._update_contracts(conversation))
+        prd = None
+        try:
+            prd_path = self._new_prd_path()
+            yield "artifact_started", {"type": "prd", "path": prd_path}
+            
+            first_token_ms = None
+            prd = self.writer.open_stream(prd_path, "prd", self.conversation_id)
+            async for chunk in self.llm_client.stream_response(self._build_prd_prompt(conversation)):
+                if first_token_ms is None:
+                    first_token_ms = round((time.perf_counter() - started) * 1000, 2)
+                await prd.append(chunk)
+                yield "token", {"text": chunk}
+            prd_path = await prd.close()
+            prd_ms = round((time.perf_counter() - started) * 1000, 2)
+            yield "artifact", {"type": "prd", "path": prd_path}
+            
+            contract_path = await asyncio.shield(contracts)
+            yield "artifact", {"type": "contract", "path": contract_path}
+            
+            timings = {
+                "first_token": first_token_ms or prd_ms,
+                "prd": prd_ms,
+                "total": round((time.perf_counter() - started) * 1000, 2)
+            }
+            observe_stage_timings("stream", timings)
+            yield "done", {"artifacts": [prd_path, contract_path], "timings_ms": timings}
+        finally:
+            # The contract is written on a pool thread that cancelling can't stop,
+            # so let the update finish even if the client has gone away
+            with contextlib.suppress(Exception):
+                await asyncio.shield(contracts)
+            if prd is not None:
+                await prd.close()
     
     async def _generate_prd(self, conversation: ConversationSlots) -> str:
         """Generate a PRD markdown file"""
-        template_path = "docs/templates/PRD_TEMPLATE.md"
-        if os.path.exists(template_path):
-            with open(template_path, 'r') as f:
-                template = f.read()
-        else:
-            template = self._get_default_prd_template()
-        
-        prompt = f"""
-        Generate a comprehensive Product Requirements Document (PRD) based on the following project information:
-        
-        Project Name: {conversation.project_name}
-        Description: {conversation.project_description}
-        Target Users: {conversation.target_users}
-        Key Features: {', '.join(conversation.key_features or [])}
-        Technical Requirements: {conversation.technical_requirements or 'None specified'}
-        Success Metrics: {conversation.success_metrics or 'None specified'}
-        Timeline: {conversation.timeline or 'Not specified'}
-        Budget Constraints: {conversation.budget_constraints or 'None specified'}
-        Integration Requirements: {', '.join(conversation.integration_requirements or [])}
-        Data Entities: {', '.join(conversation.data_entities or [])}
-        
-        Use this template structure:
-        {template}
-        
-        Return only the filled PRD content in markdown format.
-        """
-        
         prd_content = await self.llm_client.generate_json_response(
-            prompt, 
+            self._build_prd_prompt(conversation), 
             {"type": "object", "properties": {"prd_content": {"type": "string"}}}
         )
         
+        content = prd_content.get("prd_content")
+        if not content:
+            # Fall back to the template filled with the raw slot values
+            content = get_template_registry().get("PRD_TEMPLATE").render(conversation.model_dump())
+        
+        return await self.writer.write(self._new_prd_path(), content, "prd", self.conversation_id)
+    
+    def _build_prd_prompt(self, conversation: ConversationSlots) -> str:
+        """Build the PRD generation prompt: cached static prefix, then the slots"""
+        prefix = get_template_registry().prompt_prefix("PRD_TEMPLATE", PRD_INSTRUCTIONS)
+        return f"{prefix}\n{PROJECT_INFO.render(conversation.model_dump())}"
+    
+    def _new_prd_path(self) -> str:
+        """Allocate the path for a new PRD document"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         feature_id = f"FT-{timestamp}"
         prd_filename = f"{feature_id}.md"
-        prd_path = f"docs/prds/{prd_filename}"
-        
-        os.makedirs("docs/prds", exist_ok=True)
-        with open(prd_path, 'w') as f:
-            f.write(prd_content.get("prd_content", ""))
-        
-        return prd_path
+        return f"docs/prds/{prd_filename}"
     
     async def _update_contracts(self, conversation: ConversationSlots) -> str:
         """Update API contracts based on data entities"""
         contract_path = "contracts/api.yaml"
         
-        if os.path.exists(contract_path):
-            with open(contract_path, 'r') as f:
-                contract = yaml.safe_load(f)
-        else:
-            contract = self._get_base_contract()
+        patches = {}
+        for entity in conversation.data_entities or []:
+            patches.update(self._entity_paths(entity))
         
-        if conversation.data_entities:
-            for entity in conversation.data_entities:
-                entity_lower = entity.lower()
-                entity_path = f"/v1/{entity_lower}s"
-                
-                if "paths" not in contract:
-                    contract["paths"] = {}
-                
-                contract["paths"][entity_path] = {
-                    "get": {
-                        "summary": f"List {entity_lower}s",
-                        "responses": {
-                            "200": {
-                                "description": f"List of {entity_lower}s",
-                                "content": {
-                                    "application/json": {
-                                        "schema": {
-                                            "type": "array",
-                                            "items": {"$ref": f"#/components/schemas/{entity}"}
-                                        }
-                                    }
+        store = get_contract_store(contract_path, self._get_base_contract)
+        # The contract is one shared file patched in place, so it stays on disk whatever the artifact store
+        await self.writer.run(store.apply_paths, patches)
+        
+        return contract_path
+    
+    def _entity_paths(self, entity: str) -> Dict[str, dict]:
+        """Build the CRUD path items for a data entity"""
+        entity_lower = entity.lower()
+        entity_path = f"/v1/{entity_lower}s"
+        paths = {}
+        
+        paths[entity_path] = {
+            "get": {
+                "summary": f"List {entity_lower}s",
+                "responses": {
+                    "200": {
+                        "description": f"List of {entity_lower}s",
+                        "content": {
+                            "application/json": {
+                                "schema": {
+                                    "type": "array",
+                                    "items": {"$ref": f"#/components/schemas/{entity}"}
                                 }
                             }
                         }
-                    },
-                    "post": {
-                        "summary": f"Create {entity_lower}",
-                        "requestBody": {
-                            "content": {
-                                "application/json": {
-                                    "schema": {"$ref": f"#/components/schemas/{entity}Create"}
-                                }
-                            }
-                        },
-                        "responses": {
-                            "201": {
-                                "description": f"{entity} created",
-                                "content": {
-                                    "application/json": {
-                                        "schema": {"$ref": f"#/components/schemas/{entity}"}
-                                    }
-                                }
+                    }
+                }
+            },
+            "post": {
+                "summary": f"Create {entity_lower}",
+                "requestBody": {
+                    "content": {
+                        "application/json": {
+                            "schema": {"$ref": f"#/components/schemas/{entity}Create"}
+                        }
+                    }
+                },
+                "responses": {
+                    "201": {
+                        "description": f"{entity} created",
+                        "content": {
+                            "application/json": {
+                                "schema": {"$ref": f"#/components/schemas/{entity}"}
                             }
                         }
                     }
                 }
-                
-                contract["paths"][f"{entity_path}/{{id}}"] = {
-                    "get": {
-                        "summary": f"Get {entity_lower} by ID",
-                        "parameters": [
-                            {
-                                "name": "id",
-                                "in": "path",
-                                "required": True,
-                                "schema": {"type": "string", "format": "uuid"}
-                            }
-                        ],
-                        "responses": {
-                            "200": {
-                                "description": f"{entity} details",
-                                "content": {
-                                    "application/json": {
-                                        "schema": {"$ref": f"#/components/schemas/{entity}"}
-                                    }
-                                }
+            }
+        }
+        
+        paths[f"{entity_path}/{{id}}"] = {
+            "get": {
+                "summary": f"Get {entity_lower} by ID",
+                "parameters": [
+                    {
+                        "name": "id",
+                        "in": "path",
+                        "required": True,
+                        "schema": {"type": "string", "format": "uuid"}
+                    }
+                ],
+                "responses": {
+                    "200": {
+                        "description": f"{entity} details",
+                        "content": {
+                            "application/json": {
+                                "schema": {"$ref": f"#/components/schemas/{entity}"}
                             }
                         }
-                    },
-                    "put": {
-                        "summary": f"Update {entity_lower}",
-                        "parameters": [
-                            {
-                                "name": "id",
-                                "in": "path",
-                                "required": True,
-                                "schema": {"type": "string", "format": "uuid"}
-                            }
-                        ],
-                        "requestBody": {
-                            "content": {
-                                "application/json": {
-                                    "schema": {"$ref": f"#/components/schemas/{entity}Update"}
-                                }
-                            }
-                        },
-                        "responses": {
-                            "200": {
-                                "description": f"{entity} updated",
-                                "content": {
-                                    "application/json": {
-                                        "schema": {"$ref": f"#/components/schemas/{entity}"}
-                                    }
-                                }
-                            }
+                    }
+                }
+            },
+            "put": {
+                "summary": f"Update {entity_lower}",
+                "parameters": [
+                    {
+                        "name": "id",
+                        "in": "path",
+                        "required": True,
+                        "schema": {"type": "string", "format": "uuid"}
+                    }
+                ],
+                "requestBody": {
+                    "content": {
+                        "application/json": {
+                            "schema": {"$ref": f"#/components/schemas/{entity}Update"}
                         }
-                    },
-                    "delete": {
-                        "summary": f"Delete {entity_lower}",
-                        "parameters": [
-                            {
-                                "name": "id",
-                                "in": "path",
-                                "required": True,
-                                "schema": {"type": "string", "format": "uuid"}
+                    }
+                },
+                "responses": {
+                    "200": {
+                        "description": f"{entity} updated",
+                        "content": {
+                            "application/json": {
+                                "schema": {"$ref": f"#/components/schemas/{entity}"}
                             }
-                        ],
-                        "responses": {
-                            "204": {"description": f"{entity} deleted"}
                         }
                     }
                 }
+            },
+            "delete": {
+                "summary": f"Delete {entity_lower}",
+                "parameters": [
+                    {
+                        "name": "id",
+                        "in": "path",
+                        "required": True,
+                        "schema": {"type": "string", "format": "uuid"}
+                    }
+                ],
+                "responses": {
+                    "204": {"description": f"{entity} deleted"}
+                }
+            }
+        }
         
-        os.makedirs("contracts", exist_ok=True)
-        with open(contract_path, 'w') as f:
-            yaml.dump(contract, f, default_flow_style=False, sort_keys=False)
-        
-        return contract_path
-    
-    def _get_default_prd_template(self) -> str:
-        """Get default PRD template"""
-        return """# Product Requirements Document: {project_name}
-
-{project_description}
-
-{target_users}
-
-{key_features}
-
-{technical_requirements}
-
-{success_metrics}
-
-{timeline}
-
-{budget_constraints}
-
-{integration_requirements}
-
-{data_entities}
-"""
+        return paths
     
     def _get_base_contract(self) -> dict:
         """Get base OpenAPI contract"""
@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from starlette.concurrency import run_in_threadpool
+from app.backend.models import Job
+from app.db.base import SessionLocal
+from app.orchestrator.generator import PRDGenerator
+from app.orchestrator.ledger import get_event_writer
+from app.orchestrator.slots import ConversationSlots
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+class JobQueue:
+    """Durable job queue on the jobs table
+    
+    Workers claim a job with a conditional UPDATE on its status, so any number
+    of worker processes sharing the database run each job at most once at a
+    time. Jobs left running by a worker that died are re-queued after
+    ``stale_seconds``, up to ``max_attempts`` attempts.
+    """
+    
+    def __init__(self, session_factory: Optional[Callable] = None, stale_seconds: float = 600,
+                 max_attempts: int = 3):
+        self.session_factory = session_factory or SessionLocal
+        self.stale_seconds = stale_seconds
+        self.max_attempts = max_attempts
+    
+    async def enqueue(self, job_type: str, payload: Dict[str, Any], conversation_id: Optional[str] = None) -> str:
+        """Add a job and return its id"""
+        return await run_in_threadpool(self._enqueue, job_type, payload, conversation_id)
+    
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job status and result, or None if the job does not exist"""
+        return await run_in_threadpool(self._get, job_id)
+    
+    async def claim(self) -> Optional[Dict[str, Any]]:
+        """Take the oldest queued job, marking it running"""
+        return await run_in_threadpool(self._claim)
+    
+    async def finish(self, job_id: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        """Record a job's result, or its error if it failed"""
+        await run_in_threadpool(self._finish, job_id, result, error)
+    
+    async def requeue_stale(self) -> int:
+        """Return stuck running jobs to the queue; returns how many were recovered"""
+        return await run_in_threadpool(self._requeue_stale)
+    
+    def _enqueue(self, job_type: str, payload: Dict[str, Any], conversation_id: Optional[str]) -> str:
+        db = self.session_factory()
+        try:
+            job = Job(job_type=job_type, conversation_id=conversation_id, status="queued", payload=payload, attempts=0)
+            db.add(job)
+            db.commit()
+            return job.id
+        finally:
+            db.close()
+    
+    def _get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        db = self.session_factory()
+        try:
+            job = db.get(Job, job_id)
+            return _job_dict(job) if job is not None else None
+        finally:
+            db.close()
+    
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        db = self.session_factory()
+        try:
+            candidates = db.query(Job.id).filter(Job.status == "queued").order_by(Job.created_at).limit(10).all()
+            for (job_id,) in candidates:
+                now = datetime.utcnow()
+                claimed = db.query(Job).filter(Job.id == job_id, Job.status == "queued").update(
+                    {"status": "running", "started_at": now, "updated_at": now, "attempts": Job.attempts + 1},
+                    synchronize_session=False
+                )
+                db.commit()
+                if claimed:
+                    return _job_dict(db.get(Job, job_id))
+            return None
+        finally:
+            db.close()
+    
+    def _finish(self, job_id: str, result: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            db.query(Job).filter(Job.id == job_id).update({
+                "status": "failed" if error is not None else "succeeded",
+                "result": result,
+                "error": error,
+                "finished_at": now,
+                "updated_at": now
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+    
+    def _requeue_stale(self) -> int:
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            stale = db.query(Job).filter(
+                Job.status == "running",
+                Job.started_at < now - timedelta(seconds=self.stale_seconds)
+            )
+            failed = stale.filter(Job.attempts >= self.max_attempts).update(
+                {"status": "failed", "error": "Worker lost the job too many times", "finished_at": now, "updated_at": now},
+                synchronize_session=False
+            )
+            requeued = stale.filter(Job.attempts < self.max_attempts).update(
+                {"status": "queued", "updated_at": now},
+                synchronize_session=False
+            )
+            db.commit()
+            return requeued + failed
+        finally:
+            db.close()
+
+def _job_dict(job: Job) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "job_type": job.job_type,
+        "conversation_id": job.conversation_id,
+        "status": job.status,
+        "payload": job.payload,
+        "result": job.result,
+        "error": job.error,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at
+    }
+
+async def run_commit_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate the PRD and contracts for a committed conversation"""
+    conversation = ConversationSlots(**payload["slots"])
+    result = await PRDGenerator(payload["conversation_id"]).generate_artifacts(conversation)
+    
+    ledger = get_event_writer()
+    for artifact_type, path in zip(("prd", "contract"), result.artifacts):
+        await ledger.record(payload["conversation_id"], "artifact_created", {"type": artifact_type, "path": path})
+    return result.model_dump()
+
+JOB_HANDLERS: Dict[str, JobHandler] = {
+    "commit": run_commit_job,
+}
+
+class JobWorker:
+    """Pool of async tasks that claim and run jobs from a JobQueue"""
+    
+    def __init__(self, queue: JobQueue, handlers: Optional[Dict[str, JobHandler]] = None,
+                 concurrency: int = 2, poll_interval: float = 1.0):
+        self.queue = queue
+        self.handlers = handlers or JOB_HANDLERS
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+    
+    def start(self) -> None:
+        """Start the worker tasks on the running event loop"""
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.ensure_future(self._run()) for _ in range(self.concurrency)]
+    
+    async def stop(self) -> None:
+        """Cancel the worker tasks; interrupted jobs are recovered as stale"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    def notify(self) -> None:
+        """Wake idle workers so a newly enqueued job starts without waiting for a poll"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+    
+    async def run_once(self) -> bool:
+        """Claim and run one job; returns False if the queue was empty"""
+        job = await self.queue.claim()
+        if job is None:
+            return False
+        
+        handler = self.handlers.get(job["job_type"])
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for job type: {job['job_type']}")
+            result = await handler(job["payload"])
+        except Exception as e:
+            logger.exception("Job %s failed", job["id"])
+            await self.queue.finish(job["id"], error=str(e))
+        else:
+            await self.queue.finish(job["id"], result=result)
+        return True
+    
+    async def _run(self) -> None:
+        while True:
+            try:
+                if await self.run_once():
+                    continue
+                await self.queue.requeue_stale()
+            except Exception:
+                logger.exception("Job worker poll failed")
+            
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+_queue: Optional[JobQueue] = None
+_worker: Optional[JobWorker] = None
+
+def get_job_queue() -> JobQueue:
+    """Job queue dependency, shared across requests in this process"""
+    global _queue
+    if _queue is None:
+        _queue = JobQueue(
+            stale_seconds=float(os.getenv("JOB_STALE_SECONDS", "600")),
+            max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+        )
+    return _queue
+
+def create_job_worker(concurrency: Optional[int] = None) -> JobWorker:
+    """Build a worker pool configured by JOB_* variables"""
+    return JobWorker(
+        get_job_queue(),
+        concurrency=concurrency if concurrency is not None else int(os.getenv("JOB_WORKERS", "2")),
+        poll_interval=float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1"))
+    )
+
+def start_job_workers() -> None:
+    """Run JOB_WORKERS in-process workers alongside the API (0 disables them)"""
+    global _worker
+    worker = create_job_worker()
+    if worker.concurrency > 0:
+        worker.start()
+        _worker = worker
+
+async def stop_job_workers() -> None:
+    """Stop the in-process workers, if any"""
+    global _worker
+    if _worker is not None:
+        await _worker.stop()
+        _worker = None
+
+def notify_job_workers() -> None:
+    """Wake in-process workers after enqueueing a job"""
+    if _worker is not None:
+        _worker.notify()
@@ -0,0 +1,220 @@
+import asyncio
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import insert, select
+from starlette.concurrency import run_in_threadpool
+from app.backend.models import Event
+from app.db.base import SessionLocal
+from app.orchestrator.cache import LRUCache
+from app.orchestrator.slots import ConversationSlots, get_slot_manager
+from app.orchestrator.store import ensure_conversation
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_EVENT = "snapshot"
+SLOT_EVENT = "slot_answered"
+
+_STOP = object()
+
+_clock_lock = threading.Lock()
+_last_timestamp = datetime.min
+
+def _next_timestamp() -> datetime:
+    """Strictly increasing UTC timestamp, so a snapshot always sorts after the events it covers"""
+    global _last_timestamp
+    with _clock_lock:
+        now = datetime.utcnow()
+        if now <= _last_timestamp:
+            now = _last_timestamp + timedelta(microseconds=1)
+        _last_timestamp = now
+        return now
+
+class EventWriter:
+    """Append-only writer for the events table that batches inserts off the request path
+    
+    ``record`` only enqueues; a background task writes a batch once
+    ``batch_size`` events are buffered or ``flush_interval`` seconds have
+    passed, using one multi-row INSERT. When ``max_buffer`` events are waiting,
+    ``record`` blocks until there is room, pushing back on callers instead of
+    growing without bound. Every ``snapshot_every`` slot answers for a
+    conversation, a snapshot of its full state is appended as well.
+    """
+    
+    def __init__(self, session_factory: Optional[Callable] = None, batch_size: int = 100,
+                 flush_interval: float = 0.5, max_buffer: int = 10000, snapshot_every: int = 50):
+        self.session_factory = session_factory or SessionLocal
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.snapshot_every = snapshot_every
+        self._since_snapshot = LRUCache(max_entries=10000)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+    
+    def start(self) -> None:
+        """Start the background flusher on the running event loop"""
+        self._queue = asyncio.Queue(maxsize=self.max_buffer)
+        self._task = asyncio.ensure_future(self._run())
+    
+    async def stop(self) -> None:
+        """Write everything still buffered, then stop the flusher"""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        await self._queue.put(_STOP)
+        await task
+        await self._drain()
+    
+    async def record(self, conversation_id: str, event_type: str, data: Optional[Dict[str, Any]] = None,
+                     state: Optional[ConversationSlots] = None) -> None:
+        """Append an event; ``state`` is the conversation after it, used for snapshots"""
+        if self._task is None:
+            # Not started (e.g. a script or test without the app lifespan)
+            self.dropped += 1
+            return
+        
+        await self._queue.put(self._row(conversation_id, event_type, data or {}))
+        if event_type == SLOT_EVENT and state is not None:
+            count = (self._since_snapshot.get(conversation_id) or 0) + 1
+            if count >= self.snapshot_every:
+                await self._queue.put(self._row(conversation_id, SNAPSHOT_EVENT, {"slots": state.model_dump()}))
+                count = 0
+            self._since_snapshot.set(conversation_id, count)
+    
+    async def flush(self) -> None:
+        """Write everything buffered right now"""
+        await self._drain()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Buffer depth and write counters for diagnostics"""
+        return {
+            "running": self.running,
+            "buffered": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes
+        }
+    
+    def _row(self, conversation_id: str, event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": str(uuid.uuid4()),
+            "conversation_id": conversation_id,
+            "event_type": event_type,
+            "event_data": data,
+            "timestamp": _next_timestamp()
+        }
+    
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._write(batch)
+    
+    async def _drain(self) -> None:
+        while self._queue is not None and not self._queue.empty():
+            batch = []
+            while len(batch) < self.batch_size and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not _STOP:
+                    batch.append(item)
+            if batch:
+                await self._write(batch)
+    
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            await run_in_threadpool(self._insert, batch)
+            self.written += len(batch)
+            self.flushes += 1
+        except Exception:
+            self.dropped += len(batch)
+            logger.exception("Failed to write %d ledger events", len(batch))
+    
+    def _insert(self, batch: List[Dict[str, Any]]) -> None:
+        db = self.session_factory()
+        try:
+            ensure_conversation(db, (row["conversation_id"] for row in batch))
+            db.execute(insert(Event), batch)
+            db.commit()
+        finally:
+            db.close()
+
+def rebuild_conversation(conversation_id: str, session_factory: Optional[Callable] = None) -> Optional[ConversationSlots]:
+    """Rebuild a conversation's slots from its latest snapshot plus later answers
+    
+    Returns None if the ledger has no events for the conversation.
+    """
+    db = (session_factory or SessionLocal)()
+    try:
+        snapshot = db.scalars(
+            select(Event)
+            .where(Event.conversation_id == conversation_id, Event.event_type == SNAPSHOT_EVENT)
+            .order_by(Event.timestamp.desc())
+            .limit(1)
+        ).first()
+        
+        query = select(Event).where(Event.conversation_id == conversation_id).order_by(Event.timestamp)
+        if snapshot is not None:
+            query = query.where(Event.timestamp > snapshot.timestamp)
+        events = db.scalars(query).all()
+        if snapshot is None and not events:
+            return None
+        
+        slots = dict(snapshot.event_data["slots"]) if snapshot is not None else {}
+        for event in events:
+            if event.event_type == SLOT_EVENT:
+                slots[event.event_data["slot_name"]] = event.event_data["value"]
+        # Older events carry answers as given, e.g. a comma-separated list slot
+        return get_slot_manager().restore_conversation(slots)
+    finally:
+        db.close()
+
+_writer: Optional[EventWriter] = None
+
+def get_event_writer() -> EventWriter:
+    """Process-wide event writer configured by LEDGER_* variables"""
+    global _writer
+    if _writer is None:
+        _writer = EventWriter(
+            batch_size=int(os.getenv("LEDGER_BATCH_SIZE", "100")),
+            flush_interval=float(os.getenv("LEDGER_FLUSH_INTERVAL_MS", "500")) / 1000,
+            max_buffer=int(os.getenv("LEDGER_MAX_BUFFER", "10000")),
+            snapshot_every=int(os.getenv("LEDGER_SNAPSHOT_EVERY", "50"))
+        )
+    return _writer
+
+def start_event_writer() -> None:
+    """Start the shared writer unless LEDGER_ENABLED=0"""
+    if os.getenv("LEDGER_ENABLED", "1") == "1":
+        get_event_writer().start()
+
+async def stop_event_writer() -> None:
+    """Flush and stop the shared writer"""
+    await get_event_writer().stop()
@@ -1,23 +1,38 @@
+import json
 import os
-from typing import Dict, Any
-from app.orchestrator.llm.base import LLMClient
+from typing import AsyncIterator, Dict, Any
+from app.orchestrator.llm.base import LLMClient, error_response
+from app.orchestrator.llm.http import get_http_pool
 
 class AnthropicClient(LLMClient):
     """Anthropic LLM client"""
     
+    provider = "anthropic"
+    
     def __init__(self):
         self.api_key = os.getenv("ANTHROPIC_API_KEY")
         if not self.api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable is required")
+        self.model = os.getenv("ANTHROPIC_MODEL", "claude-3-sonnet-20240229")
+        self._client = None
+        self._pool = None
+    
+    def _get_client(self):
+        """Build the SDK client once, on top of the shared connection pool"""
+        pool = get_http_pool()
+        if self._client is None or self._pool is not pool:
+            import anthropic
+            self._client = anthropic.AsyncAnthropic(api_key=self.api_key, http_client=pool)
+            self._pool = pool
+        return self._client
     
     async def generate_response(self, prompt: str) -> str:
         """Generate response using Anthropic API"""
         try:
-            import anthropic
-            client = anthropic.AsyncAnthropic(api_key=self.api_key)
+            client = self._get_client()
             
             response = await client.messages.create(
-                model="claude-3-sonnet-20240229",
+                model=self.model,
                 max_tokens=2000,
                 messages=[{"role": "user", "content": prompt}]
             )
@@ -26,4 +41,43 @@ class AnthropicClient(LLMClient):
         except ImportError:
             return '{"content": "Anthropic client not available - install anthropic package"}'
         except Exception as e:
-            return f'{{"error": "Anthropic API error: {str(e)}"}}'
+            return error_response(f"Anthropic API error: {str(e)}")
+    
+    async def generate_structured_response(self, prompt: str, schema: Dict[str, Any]) -> str:
+        """Generate JSON by forcing a tool call whose input schema is ``schema``"""
+        if schema.get("type") != "object":
+            # Tool inputs must be objects; fall back to asking in the prompt
+            return await super().generate_structured_response(prompt, schema)
+        
+        try:
+            client = self._get_client()
+            
+            response = await client.beta.tools.messages.create(
+                model=self.model,
+                max_tokens=2000,
+                messages=[{"role": "user", "content": prompt}],
+                tools=[{"name": "respond", "description": "Return the response", "input_schema": schema}],
+                extra_body={"tool_choice": {"type": "tool", "name": "respond"}}
+            )
+            
+            for block in response.content:
+                if block.type == "tool_use":
+                    return json.dumps(block.input)
+            return "".join(block.text for block in response.content if block.type == "text")
+        except Exception as e:
+            return error_response(f"Anthropic API error: {str(e)}")
+    
+    async def stream_response(self, prompt: str) -> AsyncIterator[str]:
+        """Stream response tokens using the Anthropic streaming API"""
+        client = self._get_client()
+        
+        stream = await client.messages.create(
+            model=self.model,
+            max_tokens=2000,
+            messages=[{"role": "user", "content": prompt}],
+            stream=True
+        )
+        
+        async for event in stream:
+            if event.type == "content_block_delta" and event.delta.text:
+                yield event.delta.text
@@ -1,37 +1,128 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Any, List, Optional
 import json
+import re
+
+CODE_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+_json_stats: Dict[str, Dict[str, int]] = {}
+
+# Set by generate_json_response so the provider layer can report who answered
+_answered_by: ContextVar[Optional[List[Optional[str]]]] = ContextVar("answered_by", default=None)
+
+def note_provider(provider: str) -> None:
+    """Report the provider that produced a response to an enclosing ``generate_json_response``
+    
+    Wrappers such as the router or the response cache sit outermost, so
+    without this the JSON stats would be booked under their name instead.
+    """
+    answered_by = _answered_by.get()
+    if answered_by is not None:
+        answered_by[0] = provider
+
+def error_response(message: str) -> str:
+    """Format a provider failure the way clients report it to callers"""
+    return json.dumps({"error": message})
+
+def is_error_response(response: str) -> bool:
+    """Check whether a response is a reported provider failure"""
+    return response.lstrip().startswith('{"error":')
+
+def json_instruction(schema: Dict[str, Any]) -> str:
+    """Prompt suffix asking for JSON that matches a schema"""
+    return f"Return your response as valid JSON matching this schema: {json.dumps(schema)}"
+
+def extract_json(text: Optional[str]) -> Any:
+    """Parse JSON out of model output, tolerating code fences and surrounding prose
+    
+    Returns None when no JSON value can be found.
+    """
+    if not text:
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    
+    for block in CODE_FENCE.findall(text):
+        try:
+            return json.loads(block)
+        except ValueError:
+            pass
+    
+    # Decode from each opening bracket in turn, ignoring any trailing text
+    decoder = json.JSONDecoder()
+    for match in re.finditer(r"[{\[]", text):
+        try:
+            return decoder.raw_decode(text, match.start())[0]
+        except ValueError:
+            continue
+    return None
+
+def json_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-provider structured output counters and repair re-ask rate"""
+    return {
+        provider: {**stats, "retry_rate": stats["retries"] / stats["calls"] if stats["calls"] else 0.0}
+        for provider, stats in _json_stats.items()
+    }
 
 class LLMClient(ABC):
     """Base class for LLM clients"""
     
+    provider: str = "unknown"
+    model: Optional[str] = None
+    temperature: Optional[float] = None
+    
     @abstractmethod
     async def generate_response(self, prompt: str) -> str:
         """Generate a text response"""
         pass
     
-    async def generate_json_response(self, prompt: str, schema: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate a JSON response with retry logic for invalid JSON"""
-        json_prompt = f"{prompt}\n\nReturn your response as valid JSON matching this schema: {json.dumps(schema)}"
+    async def stream_response(self, prompt: str) -> AsyncIterator[str]:
+        """Generate a text response incrementally
         
-        try:
-            response = await self.generate_response(json_prompt)
-            return json.loads(response)
-        except json.JSONDecodeError:
-            pass
+        Providers with a streaming API override this; the default yields the
+        whole response as a single chunk.
+        """
+        yield await self.generate_response(prompt)
+    
+    async def generate_structured_response(self, prompt: str, schema: Dict[str, Any]) -> str:
+        """Generate raw output that should be JSON matching ``schema``
         
-        retry_prompt = f"{json_prompt}\n\nIMPORTANT: Return ONLY valid JSON, no other text or formatting."
+        Providers with a JSON mode or tool calling override this; the default
+        asks for JSON in the prompt.
+        """
+        return await self.generate_response(f"{prompt}\n\n{json_instruction(schema)}")
+    
+    async def generate_json_response(self, prompt: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate a JSON response, repairing malformed output with one short re-ask"""
+        answered_by: List[Optional[str]] = [None]
+        token = _answered_by.set(answered_by)
         try:
-            response = await self.generate_response(retry_prompt)
-            return json.loads(response)
-        except json.JSONDecodeError:
-            response_lines = response.strip().split('\n')
-            for line in response_lines:
-                try:
-                    return json.loads(line.strip())
-                except json.JSONDecodeError:
-                    continue
-            
-            if schema.get("type") == "object":
-                return {}
-            return {"error": "Failed to generate valid JSON response"}
+            response = await self.generate_structured_response(prompt, schema)
+        finally:
+            _answered_by.reset(token)
+        # Booked under the provider whose output needed repairing, which is what retry_rate measures
+        stats = _json_stats.setdefault(answered_by[0] or self.provider, {"calls": 0, "retries": 0, "failures": 0})
+        stats["calls"] += 1
+        
+        parsed = extract_json(response)
+        if parsed is not None:
+            return parsed
+        
+        # Only the broken output is sent back, not the original prompt
+        stats["retries"] += 1
+        repair_prompt = (
+            "The following output was supposed to be JSON but could not be parsed. "
+            "Fix it and return ONLY the corrected JSON.\n\n"
+            f"{response}"
+        )
+        parsed = extract_json(await self.generate_structured_response(repair_prompt, schema))
+        if parsed is not None:
+            return parsed
+        
+        stats["failures"] += 1
+        if schema.get("type") == "object":
+            return {}
+        return {"error": "Failed to generate valid JSON response"}
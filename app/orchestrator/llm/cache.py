@@ -0,0 +1,198 @@
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import AsyncIterator, Dict, Any, Optional
+from app.orchestrator.cache import LRUCache
+from app.orchestrator.llm.base import LLMClient, is_error_response
+
+def cache_key(provider: str, model: Optional[str], prompt: str,
+              schema: Optional[Dict[str, Any]] = None, temperature: Optional[float] = None) -> str:
+    """Content-address a provider call by everything that affects its output"""
+    material = json.dumps(
+        {
+            "provider": provider,
+            "model": model,
+            "prompt": prompt,
+            "schema": schema,
+            "temperature": temperature
+        },
+        sort_keys=True
+    )
+    return hashlib.sha256(material.encode()).hexdigest()
+
+class DiskCache:
+    """File-per-entry response cache with TTL and a bounded entry count
+    
+    The entry count is tracked in memory, so writes only scan the directory
+    when it goes over ``max_entries``. Eviction then trims a tenth of the
+    cap beyond it, so the scan runs once per batch of new entries.
+    """
+    
+    def __init__(self, directory: str, max_entries: int = 10000, ttl_seconds: Optional[float] = None):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._count = len(self._entries())
+    
+    def get(self, key: str) -> Any:
+        """Return a cached value, or None on a miss or expired entry"""
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if self.ttl_seconds is not None and time.time() - entry["created_at"] > self.ttl_seconds:
+            self._remove(path)
+            return None
+        return entry["value"]
+    
+    def set(self, key: str, value: Any) -> None:
+        """Atomically write a value, evicting the oldest entries once over max_entries"""
+        path = self._path(key)
+        is_new = not os.path.exists(path)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, 'w') as f:
+            json.dump({"created_at": time.time(), "value": value}, f)
+        os.replace(tmp_path, path)
+        if is_new:
+            with self._lock:
+                self._count += 1
+                over = self._count > self.max_entries
+            if over:
+                self._evict()
+    
+    def _evict(self) -> None:
+        with self._lock:
+            # Recount from the directory, which other processes may share
+            entries = self._entries()
+            target = self.max_entries - self.max_entries // 10
+            if len(entries) > target:
+                entries.sort(key=lambda e: e.stat().st_mtime)
+                for entry in entries[:len(entries) - target]:
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        pass
+            self._count = min(len(entries), target)
+    
+    def _entries(self) -> list:
+        return [e for e in os.scandir(self.directory) if e.name.endswith(".json")]
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+    
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._count -= 1
+
+class ResponseCache:
+    """Two-tier response cache: a memory LRU in front of an optional disk tier"""
+    
+    def __init__(self, memory: LRUCache, disk: Optional[DiskCache] = None):
+        self.memory = memory
+        self.disk = disk
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+    
+    async def get(self, key: str) -> Any:
+        """Look a key up in each tier, promoting disk hits into memory
+        
+        Callers get their own copy, so mutating a result never changes what
+        later hits see.
+        """
+        value = self.memory.get(key)
+        if value is not None:
+            self.hits["memory"] += 1
+            return copy.deepcopy(value)
+        if self.disk is not None:
+            value = await asyncio.to_thread(self.disk.get, key)
+            if value is not None:
+                self.hits["disk"] += 1
+                self.memory.set(key, copy.deepcopy(value))
+                return value
+        self.misses += 1
+        return None
+    
+    async def set(self, key: str, value: Any) -> None:
+        """Write a copy of a value through to every tier"""
+        self.memory.set(key, copy.deepcopy(value))
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for diagnostics"""
+        lookups = sum(self.hits.values()) + self.misses
+        return {
+            "memory_hits": self.hits["memory"],
+            "disk_hits": self.hits["disk"],
+            "misses": self.misses,
+            "hit_rate": (lookups - self.misses) / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory)
+        }
+
+class CachedLLMClient(LLMClient):
+    """Wraps an LLM client so identical calls are answered from a ResponseCache"""
+    
+    def __init__(self, client: LLMClient, cache: ResponseCache):
+        self.client = client
+        self.provider = client.provider
+        self.model = client.model
+        self.temperature = client.temperature
+        self.cache = cache
+    
+    async def generate_response(self, prompt: str) -> str:
+        """Generate a text response, served from cache when possible"""
+        key = cache_key(self.provider, self.model, prompt, temperature=self.temperature)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        response = await self.client.generate_response(prompt)
+        if not is_error_response(response):
+            await self.cache.set(key, response)
+        return response
+    
+    async def stream_response(self, prompt: str) -> AsyncIterator[str]:
+        """Stream a text response, replaying it in one chunk on a cache hit"""
+        key = cache_key(self.provider, self.model, prompt, temperature=self.temperature)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        chunks = []
+        async for chunk in self.client.stream_response(prompt):
+            chunks.append(chunk)
+            yield chunk
+        
+        response = "".join(chunks)
+        if response and not is_error_response(response):
+            await self.cache.set(key, response)
+    
+    async def generate_structured_response(self, prompt: str, schema: Dict[str, Any]) -> str:
+        """Pass structured output calls straight to the wrapped provider"""
+        return await self.client.generate_structured_response(prompt, schema)
+    
+    async def generate_json_response(self, prompt: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate a JSON response, served from cache when possible"""
+        key = cache_key(self.provider, self.model, prompt, schema, self.temperature)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        response = await self.client.generate_json_response(prompt, schema)
+        if response and "error" not in response:
+            await self.cache.set(key, response)
+        return response
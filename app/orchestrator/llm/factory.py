@@ -1,15 +1,101 @@
 import os
+from typing import Any, Dict, Optional
+from app.orchestrator.cache import LRUCache
 from app.orchestrator.llm.base import LLMClient
+from app.orchestrator.llm.cache import CachedLLMClient, DiskCache, ResponseCache
+from app.orchestrator.llm.http import close_http_pool
+from app.orchestrator.llm.instrumented import InstrumentedLLMClient
+from app.orchestrator.llm.limiter import LimitedLLMClient, get_limiter, reset_limiters
 from app.orchestrator.llm.openai_client import OpenAIClient
 from app.orchestrator.llm.anthropic_client import AnthropicClient
+from app.orchestrator.llm.router import CircuitBreaker, RoutingLLMClient
+from app.orchestrator.llm.stub_client import StubClient
 
-def get_llm_client() -> LLMClient:
-    """Factory function to get the appropriate LLM client based on environment"""
-    provider = os.getenv("LLM_PROVIDER", "openai").lower()
-    
+_client: Optional[LLMClient] = None
+_router: Optional[RoutingLLMClient] = None
+_response_cache: Optional[ResponseCache] = None
+
+def create_provider_client(provider: str) -> LLMClient:
+    """Build a rate-limited, instrumented client for a single provider"""
     if provider == "openai":
-        return OpenAIClient()
+        client = OpenAIClient()
     elif provider == "anthropic":
-        return AnthropicClient()
+        client = AnthropicClient()
+    elif provider == "stub":
+        client = StubClient()
     else:
         raise ValueError(f"Unsupported LLM provider: {provider}")
+    
+    # Instrumented inside the limiter so latency excludes queueing and shared calls count once
+    return LimitedLLMClient(InstrumentedLLMClient(client), get_limiter(client.provider))
+
+def create_llm_client() -> LLMClient:
+    """Build a new LLM client for the provider(s) selected by LLM_PROVIDER
+    
+    A comma-separated list, e.g. ``openai,anthropic``, routes across the
+    providers with failover and, with LLM_HEDGE=1, hedged requests.
+    """
+    global _router
+    providers = [p.strip() for p in os.getenv("LLM_PROVIDER", "openai").lower().split(",") if p.strip()]
+    
+    clients = [create_provider_client(provider) for provider in providers]
+    if len(clients) == 1:
+        client = clients[0]
+    else:
+        latency_ms = float(os.getenv("LLM_BREAKER_LATENCY_MS", "0"))
+        client = _router = RoutingLLMClient(
+            clients,
+            hedge=os.getenv("LLM_HEDGE") == "1",
+            hedge_delay=float(os.getenv("LLM_HEDGE_DELAY_MS", "2000")) / 1000,
+            min_hedge_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "50")) / 1000,
+            breaker_factory=lambda: CircuitBreaker(
+                failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+                reset_seconds=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30")),
+                latency_threshold=latency_ms / 1000 if latency_ms else None
+            )
+        )
+    
+    if os.getenv("LLM_CACHE_ENABLED") == "1":
+        client = CachedLLMClient(client, get_response_cache())
+    
+    return client
+
+def get_llm_client() -> LLMClient:
+    """App-scoped LLM client, created on first use and shared by every request"""
+    global _client
+    if _client is None:
+        _client = create_llm_client()
+    return _client
+
+async def close_llm_clients() -> None:
+    """Drop the shared client and limiters and close the provider connection pool"""
+    global _client, _router
+    _client = _router = None
+    reset_limiters()
+    await close_http_pool()
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide response cache configured by LLM_CACHE_* variables"""
+    global _response_cache
+    if _response_cache is None:
+        ttl = float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+        memory = LRUCache(
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")),
+            ttl_seconds=ttl
+        )
+        
+        disk = None
+        cache_dir = os.getenv("LLM_CACHE_DIR")
+        if cache_dir:
+            disk = DiskCache(
+                cache_dir,
+                max_entries=int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", "10000")),
+                ttl_seconds=ttl
+            )
+        
+        _response_cache = ResponseCache(memory, disk)
+    return _response_cache
+
+def routing_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-provider health when routing across several providers"""
+    return _router.stats() if _router is not None else {}
@@ -0,0 +1,44 @@
+import os
+from typing import Optional
+import httpx
+
+_pool: Optional[httpx.AsyncClient] = None
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def open_http_pool(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """Create the shared provider connection pool configured by LLM_HTTP_* variables"""
+    global _pool
+    if _pool is not None:
+        return _pool
+    
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20")),
+        keepalive_expiry=float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "30"))
+    )
+    http2 = os.getenv("LLM_HTTP2", "1") == "1" and _http2_available()
+    
+    _pool = httpx.AsyncClient(
+        limits=limits,
+        http2=http2 if transport is None else False,
+        timeout=httpx.Timeout(float(os.getenv("LLM_HTTP_TIMEOUT", "120")), connect=10.0),
+        transport=transport
+    )
+    return _pool
+
+def get_http_pool() -> httpx.AsyncClient:
+    """Shared provider connection pool, opened on first use"""
+    return _pool if _pool is not None else open_http_pool()
+
+async def close_http_pool() -> None:
+    """Close the shared pool and every keep-alive connection in it"""
+    global _pool
+    if _pool is not None:
+        await _pool.aclose()
+        _pool = None
@@ -0,0 +1,48 @@
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict
+from app.devops.metrics import observe_llm_call
+from app.orchestrator.llm.base import LLMClient, is_error_response, note_provider
+from app.orchestrator.llm.limiter import estimate_tokens
+
+class InstrumentedLLMClient(LLMClient):
+    """Wraps a provider client to record call latency, estimated tokens and errors"""
+    
+    def __init__(self, client: LLMClient):
+        self.client = client
+        self.provider = client.provider
+        self.model = client.model
+        self.temperature = client.temperature
+    
+    async def generate_response(self, prompt: str) -> str:
+        """Generate a text response, recording the call"""
+        return await self._observed("generate", prompt, lambda: self.client.generate_response(prompt))
+    
+    async def generate_structured_response(self, prompt: str, schema: Dict[str, Any]) -> str:
+        """Generate structured output, recording the call"""
+        return await self._observed("structured", prompt, lambda: self.client.generate_structured_response(prompt, schema))
+    
+    async def stream_response(self, prompt: str) -> AsyncIterator[str]:
+        """Stream a text response, recording the call once the stream ends"""
+        started = time.perf_counter()
+        chunks = []
+        ok = False
+        try:
+            async for chunk in self.client.stream_response(prompt):
+                chunks.append(chunk)
+                yield chunk
+            ok = True
+        finally:
+            observe_llm_call(self.provider, "stream", ok, time.perf_counter() - started,
+                             estimate_tokens(prompt), estimate_tokens("".join(chunks)))
+    
+    async def _observed(self, call_type: str, prompt: str, call: Callable[[], Awaitable[str]]) -> str:
+        started = time.perf_counter()
+        response = None
+        try:
+            response = await call()
+            note_provider(self.provider)
+            return response
+        finally:
+            ok = response is not None and not is_error_response(response)
+            observe_llm_call(self.provider, call_type, ok, time.perf_counter() - started,
+                             estimate_tokens(prompt), estimate_tokens(response) if ok else 0)
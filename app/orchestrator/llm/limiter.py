@@ -0,0 +1,225 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict
+from app.orchestrator.llm.base import LLMClient, error_response
+from app.orchestrator.llm.cache import cache_key
+
+class LimiterTimeout(Exception):
+    """Raised when a call cannot get a provider slot within the max wait"""
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return len(text) // 4 + 1
+
+class TokenBucket:
+    """Per-minute budget that refills continuously
+    
+    ``reserve`` always takes the amount, letting the balance go negative, and
+    returns how long the caller must wait until the debt is repaid. Callers
+    are therefore served in arrival order.
+    """
+    
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+    
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` and return the seconds until it is really available"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= min(amount, self.capacity)
+        return max(0.0, -self.tokens / self.rate)
+    
+    def refund(self, amount: float) -> None:
+        """Give back a reservation that was not used"""
+        self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+class SingleFlight:
+    """Coalesces identical in-flight calls into one shared upstream call
+    
+    The shared call is cancelled once every caller waiting on it has been
+    cancelled, e.g. the losing side of a hedged request, so abandoned calls
+    don't keep holding a provider slot and spending tokens.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self._waiters: Dict[asyncio.Future, int] = {}
+        self.coalesced = 0
+    
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``call`` unless a call with the same key is running; share its result"""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._calls.pop(key, None) if self._calls.get(key) is done else None)
+        else:
+            self.coalesced += 1
+        
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            # Shielded so one caller going away doesn't cancel the call for the rest
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    # Nobody is left to use the result; new callers start a fresh call
+                    if self._calls.get(key) is task:
+                        del self._calls[key]
+                    task.cancel()
+
+class ProviderLimiter:
+    """Bounds concurrent calls and request/token rates for one provider"""
+    
+    def __init__(self, name: str, max_concurrency: int = 8, requests_per_minute: float = 0,
+                 tokens_per_minute: float = 0, max_wait_seconds: float = 30.0):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_wait_seconds = max_wait_seconds
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.flight = SingleFlight()
+        self.queued = 0
+        self.in_flight = 0
+        self.acquired = 0
+        self.rejected = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+    
+    @asynccontextmanager
+    async def slot(self, tokens: int = 0) -> AsyncIterator[None]:
+        """Wait for a concurrency slot and rate budget, then hold the slot"""
+        started = time.monotonic()
+        self.queued += 1
+        try:
+            await self._wait_for_budget(tokens)
+            remaining = self.max_wait_seconds - (time.monotonic() - started)
+            try:
+                if remaining > 0:
+                    await asyncio.wait_for(self._semaphore.acquire(), remaining)
+                elif not self._semaphore.locked():
+                    # The rate wait used up the budget, but a free slot needs no waiting
+                    await self._semaphore.acquire()
+                else:
+                    raise asyncio.TimeoutError
+            except asyncio.TimeoutError:
+                self._refund(tokens)
+                self.rejected += 1
+                raise LimiterTimeout(f"{self.name} queue wait exceeded {self.max_wait_seconds}s")
+        finally:
+            self.queued -= 1
+        
+        waited = time.monotonic() - started
+        self.acquired += 1
+        self.wait_time += waited
+        self.max_wait_time = max(self.max_wait_time, waited)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+    
+    async def _wait_for_budget(self, tokens: int) -> None:
+        delay = 0.0
+        if self.requests is not None:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens is not None and tokens:
+            delay = max(delay, self.tokens.reserve(tokens))
+        if delay > self.max_wait_seconds:
+            self._refund(tokens)
+            self.rejected += 1
+            raise LimiterTimeout(f"{self.name} rate limit wait of {delay:.1f}s exceeds {self.max_wait_seconds}s")
+        if delay:
+            await asyncio.sleep(delay)
+    
+    def _refund(self, tokens: int) -> None:
+        # Hand the reservation back so the budget isn't spent on a rejected call
+        if self.requests is not None:
+            self.requests.refund(1)
+        if self.tokens is not None and tokens:
+            self.tokens.refund(tokens)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and wait-time counters for diagnostics"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "acquired": self.acquired,
+            "rejected": self.rejected,
+            "coalesced": self.flight.coalesced,
+            "avg_wait_ms": round(self.wait_time / self.acquired * 1000, 2) if self.acquired else 0.0,
+            "max_wait_ms": round(self.max_wait_time * 1000, 2)
+        }
+
+class LimitedLLMClient(LLMClient):
+    """Wraps an LLM client so calls go through its provider's limiter"""
+    
+    def __init__(self, client: LLMClient, limiter: ProviderLimiter):
+        self.client = client
+        self.provider = client.provider
+        self.model = client.model
+        self.temperature = client.temperature
+        self.limiter = limiter
+    
+    async def generate_response(self, prompt: str) -> str:
+        """Generate a text response, sharing identical in-flight calls"""
+        key = cache_key(self.provider, self.model, prompt, temperature=self.temperature)
+        return await self._limited(key, prompt, lambda: self.client.generate_response(prompt))
+    
+    async def generate_structured_response(self, prompt: str, schema: Dict[str, Any]) -> str:
+        """Generate structured output, sharing identical in-flight calls"""
+        key = cache_key(self.provider, self.model, prompt, schema, self.temperature)
+        return await self._limited(key, prompt, lambda: self.client.generate_structured_response(prompt, schema))
+    
+    async def _limited(self, key: str, prompt: str, call: Callable[[], Awaitable[str]]) -> str:
+        async def run() -> str:
+            try:
+                async with self.limiter.slot(estimate_tokens(prompt)):
+                    return await call()
+            except LimiterTimeout as e:
+                return error_response(f"LLM queue timeout: {e}")
+        return await self.limiter.flight.do(key, run)
+    
+    async def stream_response(self, prompt: str) -> AsyncIterator[str]:
+        """Stream a text response while holding a provider slot"""
+        async with self.limiter.slot(estimate_tokens(prompt)):
+            async for chunk in self.client.stream_response(prompt):
+                yield chunk
+
+_limiters: Dict[str, ProviderLimiter] = {}
+
+def _setting(provider: str, name: str, default: str) -> str:
+    """Read LLM_<PROVIDER>_<NAME>, falling back to LLM_<NAME>"""
+    return os.getenv(f"LLM_{provider.upper()}_{name}", os.getenv(f"LLM_{name}", default))
+
+def get_limiter(provider: str) -> ProviderLimiter:
+    """Process-wide limiter for a provider, configured by LLM_* variables"""
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        limiter = _limiters[provider] = ProviderLimiter(
+            provider,
+            max_concurrency=int(_setting(provider, "MAX_CONCURRENCY", "8")),
+            requests_per_minute=float(_setting(provider, "RPM", "0")),
+            tokens_per_minute=float(_setting(provider, "TPM", "0")),
+            max_wait_seconds=float(_setting(provider, "QUEUE_MAX_WAIT_SECONDS", "30"))
+        )
+    return limiter
+
+def reset_limiters() -> None:
+    """Drop every limiter; they are bound to the event loop that used them"""
+    _limiters.clear()
+
+def limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every provider limiter created so far"""
+    return {provider: limiter.stats() for provider, limiter in _limiters.items()}
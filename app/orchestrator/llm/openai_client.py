@@ -1,30 +1,78 @@
 import os
-from typing import Dict, Any
-from app.orchestrator.llm.base import LLMClient
+from typing import AsyncIterator, Dict, Any
+from app.orchestrator.llm.base import LLMClient, error_response, json_instruction
+from app.orchestrator.llm.http import get_http_pool
 
 class OpenAIClient(LLMClient):
     """OpenAI LLM client"""
     
+    provider = "openai"
+    
     def __init__(self):
         self.api_key = os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY environment variable is required")
+        self.model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+        self.temperature = 0.7
+        self._client = None
+        self._pool = None
+    
+    def _get_client(self):
+        """Build the SDK client once, on top of the shared connection pool"""
+        pool = get_http_pool()
+        if self._client is None or self._pool is not pool:
+            import openai
+            self._client = openai.AsyncOpenAI(api_key=self.api_key, http_client=pool)
+            self._pool = pool
+        return self._client
     
     async def generate_response(self, prompt: str) -> str:
         """Generate response using OpenAI API"""
         try:
-            import openai
-            openai.api_key = self.api_key
+            client = self._get_client()
             
-            response = await openai.ChatCompletion.acreate(
-                model="gpt-3.5-turbo",
+            response = await client.chat.completions.create(
+                model=self.model,
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=2000,
-                temperature=0.7
+                temperature=self.temperature
             )
             
             return response.choices[0].message.content
         except ImportError:
             return '{"content": "OpenAI client not available - install openai package"}'
         except Exception as e:
-            return f'{{"error": "OpenAI API error: {str(e)}"}}'
+            return error_response(f"OpenAI API error: {str(e)}")
+    
+    async def generate_structured_response(self, prompt: str, schema: Dict[str, Any]) -> str:
+        """Generate JSON using OpenAI's JSON mode, which guarantees parseable output"""
+        try:
+            client = self._get_client()
+            
+            response = await client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": f"{prompt}\n\n{json_instruction(schema)}"}],
+                max_tokens=2000,
+                temperature=self.temperature,
+                response_format={"type": "json_object"}
+            )
+            
+            return response.choices[0].message.content
+        except Exception as e:
+            return error_response(f"OpenAI API error: {str(e)}")
+    
+    async def stream_response(self, prompt: str) -> AsyncIterator[str]:
+        """Stream response tokens using the OpenAI streaming API"""
+        client = self._get_client()
+        
+        stream = await client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=2000,
+            temperature=self.temperature,
+            stream=True
+        )
+        
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
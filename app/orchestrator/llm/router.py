@@ -0,0 +1,228 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from app.orchestrator.llm.base import LLMClient, error_response, is_error_response
+
+class CircuitBreaker:
+    """Stops routing to a provider after repeated failures or slow calls
+    
+    After ``failure_threshold`` consecutive failures the breaker opens for
+    ``reset_seconds``; then one trial call is let through (half-open) and its
+    outcome closes or re-opens the breaker. Calls slower than
+    ``latency_threshold`` seconds count as failures.
+    """
+    
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0,
+                 latency_threshold: Optional[float] = None):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.latency_threshold = latency_threshold
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+    
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+    
+    def allow(self) -> bool:
+        """Whether a call may be sent now; claims the trial slot when half-open"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+    
+    def record(self, ok: bool, latency: float) -> None:
+        """Record a finished call"""
+        self._trial_running = False
+        if ok and (self.latency_threshold is None or latency <= self.latency_threshold):
+            self.failures = 0
+            self.opened_at = None
+            return
+        self.failures += 1
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+    
+    def release(self) -> None:
+        """Give back a half-open trial slot for a call that was cancelled"""
+        self._trial_running = False
+
+class ProviderHealth:
+    """Rolling latency and success statistics for one provider"""
+    
+    def __init__(self, client: LLMClient, breaker: CircuitBreaker, window: int = 100):
+        self.client = client
+        self.breaker = breaker
+        self.latencies = deque(maxlen=window)
+        self.success_rate = 1.0
+        self.calls = 0
+        self.errors = 0
+        self.hedged = 0
+        self.wins = 0
+    
+    def record(self, ok: bool, latency: float) -> None:
+        self.calls += 1
+        if not ok:
+            self.errors += 1
+        self.success_rate = 0.8 * self.success_rate + 0.2 * (1.0 if ok else 0.0)
+        if ok:
+            self.latencies.append(latency)
+        self.breaker.record(ok, latency)
+    
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    
+    @property
+    def score(self) -> float:
+        """Routing weight: favour providers that succeed and answer quickly"""
+        p50 = self.percentile(0.5)
+        if p50 is None:
+            p50 = 1.0
+        return max(self.success_rate, 0.01) / max(p50, 0.001)
+    
+    def stats(self) -> Dict[str, Any]:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "state": self.breaker.state,
+            "calls": self.calls,
+            "errors": self.errors,
+            "hedged": self.hedged,
+            "wins": self.wins,
+            "success_rate": round(self.success_rate, 3),
+            "p50_ms": round(p50 * 1000, 2) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 2) if p95 is not None else None
+        }
+
+class RoutingLLMClient(LLMClient):
+    """Routes calls across several providers with failover and optional hedging
+    
+    The primary provider is picked at random weighted by health score; the
+    rest are tried in score order when it fails. With hedging on, a second
+    provider is started once the primary has been running longer than its
+    recent p95 latency, and whichever answers first wins.
+    """
+    
+    provider = "router"
+    
+    def __init__(self, clients: List[LLMClient], hedge: bool = False, hedge_delay: float = 2.0,
+                 min_hedge_delay: float = 0.05, breaker_factory: Callable[[], CircuitBreaker] = CircuitBreaker):
+        if not clients:
+            raise ValueError("RoutingLLMClient needs at least one client")
+        self.providers = [ProviderHealth(client, breaker_factory()) for client in clients]
+        self.model = "+".join(f"{client.provider}:{client.model}" for client in clients)
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+    
+    def _candidates(self) -> List[ProviderHealth]:
+        """Providers whose breaker allows a call, primary first"""
+        healthy = [health for health in self.providers if health.breaker.state != "open"]
+        if not healthy:
+            return []
+        primary = random.choices(healthy, weights=[health.score for health in healthy])[0]
+        rest = sorted((health for health in healthy if health is not primary), key=lambda h: h.score, reverse=True)
+        return [primary] + rest
+    
+    def _hedge_after(self, health: ProviderHealth) -> float:
+        """Seconds to wait on a provider before hedging to the next one"""
+        p95 = health.percentile(0.95) if len(health.latencies) >= 20 else None
+        return max(p95 if p95 is not None else self.hedge_delay, self.min_hedge_delay)
+    
+    async def generate_response(self, prompt: str) -> str:
+        """Generate a text response from the first healthy provider to answer"""
+        return await self._route(lambda client: client.generate_response(prompt))
+    
+    async def generate_structured_response(self, prompt: str, schema: Dict[str, Any]) -> str:
+        """Generate structured output from the first healthy provider to answer"""
+        return await self._route(lambda client: client.generate_structured_response(prompt, schema))
+    
+    async def stream_response(self, prompt: str) -> AsyncIterator[str]:
+        """Stream from the best provider, failing over only before the first chunk"""
+        last_error: Optional[Exception] = None
+        for health in self._candidates():
+            if not health.breaker.allow():
+                continue
+            started = time.monotonic()
+            yielded = False
+            try:
+                async for chunk in health.client.stream_response(prompt):
+                    yielded = True
+                    yield chunk
+            except Exception as e:
+                health.record(False, time.monotonic() - started)
+                if yielded:
+                    raise
+                last_error = e
+                continue
+            health.record(True, time.monotonic() - started)
+            health.wins += 1
+            return
+        raise last_error or RuntimeError("No healthy LLM providers")
+    
+    async def _attempt(self, health: ProviderHealth, call: Callable[[LLMClient], Awaitable[str]]) -> str:
+        started = time.monotonic()
+        try:
+            response = await call(health.client)
+        except asyncio.CancelledError:
+            health.breaker.release()
+            raise
+        except Exception as e:
+            response = error_response(f"{health.client.provider} error: {e}")
+        health.record(not is_error_response(response), time.monotonic() - started)
+        return response
+    
+    async def _route(self, call: Callable[[LLMClient], Awaitable[str]]) -> str:
+        candidates = self._candidates()
+        pending: Dict[asyncio.Task, ProviderHealth] = {}
+        last_response = error_response("No healthy LLM providers")
+        
+        def launch() -> Optional[ProviderHealth]:
+            while candidates:
+                health = candidates.pop(0)
+                if health.breaker.allow():
+                    pending[asyncio.ensure_future(self._attempt(health, call))] = health
+                    return health
+            return None
+        
+        try:
+            current = launch()
+            while pending:
+                timeout = self._hedge_after(current) if self.hedge and candidates else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedge = launch()
+                    if hedge is not None:
+                        hedge.hedged += 1
+                        current = hedge
+                    continue
+                
+                for task in done:
+                    health = pending.pop(task)
+                    response = task.result()
+                    if not is_error_response(response):
+                        health.wins += 1
+                        return response
+                    last_response = response
+                if not pending:
+                    current = launch()
+            return last_response
+        finally:
+            # Cancel the losers of a hedged race
+            for task in pending:
+                task.cancel()
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-provider health for diagnostics"""
+        return {health.client.provider: health.stats() for health in self.providers}
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import math
+import os
+import random
+import re
+from typing import AsyncIterator, Callable, Optional
+from app.orchestrator.llm.base import LLMClient, error_response
+from app.orchestrator.llm.http import get_http_pool
+
+DEFAULT_STUB_RESPONSE = json.dumps({
+    "prd_content": "# Product Requirements Document\n\nGenerated offline by the stub LLM provider.\n"
+})
+
+def latency_distribution(spec: str) -> Callable[[], float]:
+    """Build a latency sampler (in seconds) from a millisecond spec
+    
+    ``"200"`` is a constant, ``"uniform:100:300"`` is uniform between the two
+    bounds and ``"lognormal:200:0.5"`` is log-normal with the given median and
+    sigma, which gives the long tail real providers have.
+    """
+    kind, _, args = spec.partition(":")
+    if not args:
+        value = float(kind) / 1000
+        return lambda: value
+    params = [float(arg) for arg in args.split(":")]
+    if kind == "uniform":
+        low, high = params
+        return lambda: random.uniform(low, high) / 1000
+    if kind == "lognormal":
+        median, sigma = params
+        return lambda: random.lognormvariate(math.log(median), sigma) / 1000
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+class StubClient(LLMClient):
+    """Offline LLM client for local development, tests and benchmarks
+    
+    With STUB_LLM_URL set, prompts are POSTed to that URL through the shared
+    provider connection pool, which makes the pooling behaviour observable
+    without a real provider. Otherwise a canned response is returned after a
+    latency drawn from STUB_LLM_LATENCY_MS, failing with probability
+    STUB_LLM_ERROR_RATE. Arguments override the environment so tests can
+    build several fake providers with different latency profiles.
+    """
+    
+    provider = "stub"
+    
+    def __init__(self, provider: Optional[str] = None, latency: Optional[Callable[[], float]] = None,
+                 error_rate: Optional[float] = None, response: Optional[str] = None):
+        if provider is not None:
+            self.provider = provider
+        self.model = os.getenv("STUB_LLM_MODEL", "stub-1")
+        self.url = os.getenv("STUB_LLM_URL")
+        self.latency = latency or latency_distribution(os.getenv("STUB_LLM_LATENCY_MS", "0"))
+        self.error_rate = error_rate if error_rate is not None else float(os.getenv("STUB_LLM_ERROR_RATE", "0"))
+        self.response = response or os.getenv("STUB_LLM_RESPONSE", DEFAULT_STUB_RESPONSE)
+        self.calls = 0
+    
+    async def generate_response(self, prompt: str) -> str:
+        """Return the canned response, or relay the prompt to STUB_LLM_URL"""
+        self.calls += 1
+        if not self.url:
+            delay = self.latency()
+            if delay:
+                await asyncio.sleep(delay)
+            if self.error_rate and random.random() < self.error_rate:
+                return error_response(f"Stub API error: injected failure from {self.provider}")
+            return self.response
+        
+        try:
+            response = await get_http_pool().post(self.url, json={"model": self.model, "prompt": prompt})
+            response.raise_for_status()
+            return response.json()["content"]
+        except Exception as e:
+            return error_response(f"Stub API error: {str(e)}")
+    
+    async def stream_response(self, prompt: str) -> AsyncIterator[str]:
+        """Stream the canned response word by word, spreading the latency across chunks"""
+        if self.url:
+            yield await self.generate_response(prompt)
+            return
+        
+        self.calls += 1
+        delay = self.latency()
+        chunks = re.findall(r"\S+\s*|\s+", self.response)
+        for chunk in chunks:
+            if delay:
+                await asyncio.sleep(delay / len(chunks))
+            yield chunk
@@ -1,16 +1,20 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, Any, Optional, List
+import json
 import uuid
 from datetime import datetime
-from app.orchestrator.slots import SlotManager, ConversationSlots
+from app.orchestrator.slots import SlotValidationError, ConversationSlots, get_slot_manager
+from app.orchestrator.extract import ExtractionError, SlotExtractor, get_slot_extractor
 from app.orchestrator.generator import PRDGenerator
+from app.orchestrator.jobs import JobQueue, get_job_queue, notify_job_workers
+from app.orchestrator.ledger import SLOT_EVENT, EventWriter, get_event_writer
 from app.orchestrator.llm.factory import get_llm_client
+from app.orchestrator.store import ConversationStore, get_conversation_store
 
 router = APIRouter()
 
-conversations: Dict[str, ConversationSlots] = {}
-
 class StartIntakeRequest(BaseModel):
     project_name: Optional[str] = None
 
@@ -28,6 +32,30 @@ class AnswerResponse(BaseModel):
     gaps: List[str]
     next_question: Optional[str]
 
+class AnswersRequest(BaseModel):
+    conversation_id: str
+    answers: Dict[str, Any]
+    changed_only: bool = False
+
+class AnswersResponse(BaseModel):
+    slots: Dict[str, Any]
+    changed: List[str]
+    gaps: List[str]
+    next_question: Optional[str]
+
+class ExtractRequest(BaseModel):
+    brief: str
+    conversation_id: Optional[str] = None
+    overwrite: bool = False
+
+class ExtractResponse(BaseModel):
+    conversation_id: str
+    slots: Dict[str, Any]
+    extracted: List[str]
+    cached: bool
+    gaps: List[str]
+    next_question: Optional[str]
+
 class StatusResponse(BaseModel):
     slots: Dict[str, Any]
     gaps: List[str]
@@ -37,66 +65,219 @@ class CommitRequest(BaseModel):
     conversation_id: str
 
 class CommitResponse(BaseModel):
-    artifacts: List[str]
+    job_id: str
+    status: str
+    status_url: str
     message: str
 
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    conversation_id: Optional[str]
+    artifacts: List[str] = []
+    timings_ms: Dict[str, float] = {}
+    error: Optional[str] = None
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class ConversationCacheResponse(BaseModel):
+    backend: str
+    entries: int
+    max_entries: int
+    bytes: int
+    max_bytes: Optional[int]
+    ttl_seconds: Optional[float]
+    evictions: int
+    expirations: int
+    swept: int = 0
+
 @router.post("/start", response_model=StartIntakeResponse)
-async def start_intake(request: StartIntakeRequest):
+async def start_intake(
+    request: StartIntakeRequest,
+    store: ConversationStore = Depends(get_conversation_store),
+    ledger: EventWriter = Depends(get_event_writer)
+):
     """Start a new intake conversation"""
     conversation_id = f"conv_{uuid.uuid4().hex[:8]}"
-    slot_manager = SlotManager()
-    conversations[conversation_id] = slot_manager.create_conversation()
+    slot_manager = get_slot_manager()
+    await store.create(conversation_id, slot_manager.create_conversation())
+    await ledger.record(conversation_id, "conversation_started")
     
     return StartIntakeResponse(
         conversation_id=conversation_id,
         message="Intake started. Please provide project details."
     )
 
-@router.post("/answer", response_model=AnswerResponse)
-async def answer_question(request: AnswerRequest):
+@router.post("/answer", response_model=AnswerResponse, responses={422: {"description": "The answer is invalid"}})
+async def answer_question(
+    request: AnswerRequest,
+    store: ConversationStore = Depends(get_conversation_store),
+    ledger: EventWriter = Depends(get_event_writer)
+):
     """Answer a slot filling question"""
-    if request.conversation_id not in conversations:
+    conversation = await store.get(request.conversation_id)
+    if conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
-    conversation = conversations[request.conversation_id]
-    slot_manager = SlotManager()
+    slot_manager = get_slot_manager()
+    try:
+        conversation, _ = slot_manager.apply_answers(conversation, {request.slot_name: request.value})
+    except SlotValidationError as e:
+        raise HTTPException(status_code=422, detail=[
+            {"loc": ["body", "value"], "msg": message, "type": "value_error"}
+            for message in e.errors.values()
+        ])
     
-    setattr(conversation, request.slot_name, request.value)
+    value = getattr(conversation, request.slot_name)
+    await store.save(request.conversation_id, conversation, [request.slot_name])
+    await ledger.record(
+        request.conversation_id,
+        SLOT_EVENT,
+        {"slot_name": request.slot_name, "value": value},
+        state=conversation
+    )
     
     gaps = slot_manager.get_gaps(conversation)
     next_question = slot_manager.get_next_question(gaps) if gaps else None
     
     return AnswerResponse(
-        slots=conversation.dict(),
+        slots=conversation.model_dump(),
         gaps=gaps,
         next_question=next_question
     )
 
+@router.post("/answers", response_model=AnswersResponse, responses={422: {"description": "One or more answers are invalid"}})
+async def answer_questions(
+    request: AnswersRequest,
+    store: ConversationStore = Depends(get_conversation_store),
+    ledger: EventWriter = Depends(get_event_writer)
+):
+    """Answer several slots at once
+    
+    Answers are validated together and applied all or nothing. With
+    ``changed_only`` the response carries only the slots that changed.
+    """
+    conversation = await store.get(request.conversation_id)
+    if conversation is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    
+    slot_manager = get_slot_manager()
+    try:
+        conversation, changed = slot_manager.apply_answers(conversation, request.answers)
+    except SlotValidationError as e:
+        raise HTTPException(status_code=422, detail=[
+            {"loc": ["body", "answers", slot_name], "msg": message, "type": "value_error"}
+            for slot_name, message in e.errors.items()
+        ])
+    
+    if changed:
+        await store.save(request.conversation_id, conversation, changed)
+        for slot_name in changed:
+            await ledger.record(
+                request.conversation_id,
+                SLOT_EVENT,
+                {"slot_name": slot_name, "value": getattr(conversation, slot_name)},
+                state=conversation
+            )
+    
+    gaps = slot_manager.get_gaps(conversation)
+    return AnswersResponse(
+        slots=conversation.model_dump(include=set(changed)) if request.changed_only else conversation.model_dump(),
+        changed=changed,
+        gaps=gaps,
+        next_question=slot_manager.get_next_question(gaps)
+    )
+
+@router.post("/extract", response_model=ExtractResponse, responses={502: {"description": "The LLM extraction failed"}})
+async def extract_slots(
+    request: ExtractRequest,
+    store: ConversationStore = Depends(get_conversation_store),
+    ledger: EventWriter = Depends(get_event_writer),
+    extractor: SlotExtractor = Depends(get_slot_extractor)
+):
+    """Fill every slot a free-text brief answers with one LLM call
+    
+    Starts a new conversation unless ``conversation_id`` is given. Slots that
+    already have an answer are kept unless ``overwrite`` is set.
+    """
+    slot_manager = get_slot_manager()
+    conversation_id = request.conversation_id
+    if conversation_id is None:
+        conversation_id = f"conv_{uuid.uuid4().hex[:8]}"
+        conversation = slot_manager.create_conversation()
+        await store.create(conversation_id, conversation)
+        await ledger.record(conversation_id, "conversation_started")
+    else:
+        conversation = await store.get(conversation_id)
+        if conversation is None:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+    
+    try:
+        values, cached = await extractor.extract(request.brief)
+    except ExtractionError as e:
+        raise HTTPException(status_code=502, detail=f"Slot extraction failed: {e}")
+    if not request.overwrite:
+        values = {name: value for name, value in values.items() if getattr(conversation, name) in (None, [])}
+    
+    conversation, changed = slot_manager.apply_answers(conversation, values)
+    if changed:
+        await store.save(conversation_id, conversation, changed)
+        for slot_name in changed:
+            await ledger.record(
+                conversation_id,
+                SLOT_EVENT,
+                {"slot_name": slot_name, "value": getattr(conversation, slot_name), "source": "extract"},
+                state=conversation
+            )
+    
+    gaps = slot_manager.get_gaps(conversation)
+    return ExtractResponse(
+        conversation_id=conversation_id,
+        slots=conversation.model_dump(),
+        extracted=changed,
+        cached=cached,
+        gaps=gaps,
+        next_question=slot_manager.get_next_question(gaps)
+    )
+
 @router.get("/status", response_model=StatusResponse)
-async def get_status(conversation_id: str):
+async def get_status(
+    conversation_id: str,
+    store: ConversationStore = Depends(get_conversation_store)
+):
     """Get current conversation status"""
-    if conversation_id not in conversations:
+    conversation = await store.get(conversation_id)
+    if conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
-    conversation = conversations[conversation_id]
-    slot_manager = SlotManager()
+    slot_manager = get_slot_manager()
     gaps = slot_manager.get_gaps(conversation)
     next_question = slot_manager.get_next_question(gaps) if gaps else None
     
-    return StatusResponse(
-        slots=conversation.dict(),
-        gaps=gaps,
+    # Polled by clients: serialize once with pydantic's compiled serializer
+    # instead of letting FastAPI re-validate and re-encode the response model
+    status = StatusResponse.model_construct(
+        slots=conversation.model_dump(),
+        gaps=list(gaps),
         next_question=next_question
     )
+    return Response(status.model_dump_json(), media_type="application/json")
 
-@router.post("/commit", response_model=CommitResponse)
-async def commit_intake(request: CommitRequest):
-    """Generate PRD and update API contracts"""
-    if request.conversation_id not in conversations:
+@router.post("/commit", response_model=CommitResponse, status_code=202)
+async def commit_intake(
+    request: CommitRequest,
+    store: ConversationStore = Depends(get_conversation_store),
+    queue: JobQueue = Depends(get_job_queue),
+    ledger: EventWriter = Depends(get_event_writer)
+):
+    """Queue PRD generation and contract updates, returning a job to poll"""
+    conversation = await store.get(request.conversation_id)
+    if conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
-    conversation = conversations[request.conversation_id]
-    slot_manager = SlotManager()
+    slot_manager = get_slot_manager()
     
     gaps = slot_manager.get_gaps(conversation)
     if gaps:
@@ -105,10 +286,89 @@ async def commit_intake(request: CommitRequest):
             detail=f"Missing required information: {', '.join(gaps)}"
         )
     
-    generator = PRDGenerator()
-    artifacts = await generator.generate_artifacts(conversation)
+    # The slots are snapshotted into the job so workers in other processes can run it
+    job_id = await queue.enqueue(
+        "commit",
+        {"conversation_id": request.conversation_id, "slots": conversation.model_dump()},
+        request.conversation_id
+    )
+    notify_job_workers()
+    await ledger.record(request.conversation_id, "commit_queued", {"job_id": job_id})
     
     return CommitResponse(
-        artifacts=artifacts,
-        message="PRD generated and contracts updated successfully"
+        job_id=job_id,
+        status="queued",
+        status_url=f"/intake/jobs/{job_id}",
+        message="PRD generation queued"
+    )
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str, queue: JobQueue = Depends(get_job_queue)):
+    """Get the status of a queued commit, with its artifacts once it succeeds"""
+    job = await queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    result = job["result"] or {}
+    return JobStatusResponse(
+        job_id=job["id"],
+        status=job["status"],
+        conversation_id=job["conversation_id"],
+        artifacts=result.get("artifacts", []),
+        timings_ms=result.get("timings_ms", {}),
+        error=job["error"],
+        attempts=job["attempts"],
+        created_at=job["created_at"],
+        started_at=job["started_at"],
+        finished_at=job["finished_at"]
+    )
+
+@router.get("/admin/conversations", response_model=ConversationCacheResponse)
+async def conversation_cache_stats(
+    sweep: bool = False,
+    store: ConversationStore = Depends(get_conversation_store)
+):
+    """Live conversations held in memory and their estimated footprint
+    
+    ``sweep=true`` evicts idle conversations first instead of waiting for
+    the background sweeper.
+    """
+    swept = store.sweep() if sweep else 0
+    return ConversationCacheResponse(**store.stats(), swept=swept)
+
+@router.post("/commit/stream")
+async def commit_intake_stream(
+    request: CommitRequest,
+    store: ConversationStore = Depends(get_conversation_store),
+    ledger: EventWriter = Depends(get_event_writer)
+):
+    """Generate the PRD while streaming its tokens as server-sent events"""
+    conversation = await store.get(request.conversation_id)
+    if conversation is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    
+    slot_manager = get_slot_manager()
+    
+    gaps = slot_manager.get_gaps(conversation)
+    if gaps:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Missing required information: {', '.join(gaps)}"
+        )
+    
+    generator = PRDGenerator(request.conversation_id)
+    
+    async def events():
+        try:
+            async for event, data in generator.stream_artifacts(conversation):
+                if event == "artifact":
+                    await ledger.record(request.conversation_id, "artifact_created", data)
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
@@ -1,5 +1,8 @@
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+import logging
+from pydantic import BaseModel, PrivateAttr, ValidationError
+from typing import Optional, List, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
 
 class ConversationSlots(BaseModel):
     project_name: Optional[str] = None
@@ -12,16 +15,58 @@ class ConversationSlots(BaseModel):
     budget_constraints: Optional[str] = None
     integration_requirements: Optional[List[str]] = None
     data_entities: Optional[List[str]] = None
+    
+    # Bit per filled slot (see SLOT_BITS), kept current on every assignment;
+    # mutating a list slot in place bypasses it, so assign a new list instead
+    _filled: int = PrivateAttr(default=0)
+    
+    def model_post_init(self, __context: Any) -> None:
+        filled = 0
+        for name, bit in SLOT_BITS.items():
+            if _is_filled(getattr(self, name)):
+                filled |= bit
+        self.__pydantic_private__["_filled"] = filled
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        bit = SLOT_BITS.get(name)
+        if bit is not None:
+            filled = self.__pydantic_private__["_filled"]
+            self.__pydantic_private__["_filled"] = filled | bit if _is_filled(value) else filled & ~bit
+    
+    @property
+    def filled_mask(self) -> int:
+        """Bitmask of the slots that hold an answer"""
+        return self.__pydantic_private__["_filled"]
+
+SLOT_BITS: Dict[str, int] = {name: 1 << i for i, name in enumerate(ConversationSlots.model_fields)}
+
+def _is_filled(value: Any) -> bool:
+    return value is not None and not (isinstance(value, list) and len(value) == 0)
+
+class SlotValidationError(ValueError):
+    """One or more slot answers were rejected; ``errors`` maps slot name to reason"""
+    
+    def __init__(self, errors: Dict[str, str]):
+        super().__init__(f"Invalid slot answers: {', '.join(sorted(errors))}")
+        self.errors = errors
 
 class SlotManager:
-    """Manages slot filling logic and validation"""
+    """Manages slot filling logic and validation
+    
+    Stateless, so one instance is shared (see ``get_slot_manager``). Gap
+    lists are precomputed for every combination of missing required slots,
+    so answering "what is still missing" is a mask and a dict lookup.
+    """
     
-    REQUIRED_SLOTS = [
+    LIST_SLOTS = frozenset(["key_features", "integration_requirements", "data_entities"])
+    
+    REQUIRED_SLOTS = (
         "project_name",
-        "project_description", 
+        "project_description",
         "target_users",
         "key_features"
-    ]
+    )
     
     SLOT_QUESTIONS = {
         "project_name": "What is the name of your project?",
@@ -36,20 +81,27 @@ class SlotManager:
         "data_entities": "What are the main data entities in your system? (e.g., users, products, orders)"
     }
     
+    def __init__(self):
+        self.required_mask = 0
+        for slot in self.REQUIRED_SLOTS:
+            self.required_mask |= SLOT_BITS[slot]
+        self._gaps: Dict[int, Tuple[str, ...]] = {}
+        for subset in range(1 << len(self.REQUIRED_SLOTS)):
+            missing = tuple(slot for i, slot in enumerate(self.REQUIRED_SLOTS) if subset & (1 << i))
+            mask = 0
+            for slot in missing:
+                mask |= SLOT_BITS[slot]
+            self._gaps[mask] = missing
+    
     def create_conversation(self) -> ConversationSlots:
         """Create a new conversation with empty slots"""
         return ConversationSlots()
     
-    def get_gaps(self, conversation: ConversationSlots) -> List[str]:
-        """Get list of unfilled required slots"""
-        gaps = []
-        for slot in self.REQUIRED_SLOTS:
-            value = getattr(conversation, slot)
-            if value is None or (isinstance(value, list) and len(value) == 0):
-                gaps.append(slot)
-        return gaps
+    def get_gaps(self, conversation: ConversationSlots) -> Tuple[str, ...]:
+        """Unfilled required slots, in asking order"""
+        return self._gaps[self.required_mask & ~conversation.filled_mask]
     
-    def get_next_question(self, gaps: List[str]) -> Optional[str]:
+    def get_next_question(self, gaps: Tuple[str, ...]) -> Optional[str]:
         """Get the next question to ask based on gaps"""
         if not gaps:
             return None
@@ -57,9 +109,71 @@ class SlotManager:
     
     def validate_slot_value(self, slot_name: str, value: Any) -> bool:
         """Validate a slot value"""
-        if slot_name in ["key_features", "integration_requirements", "data_entities"]:
+        if slot_name in self.LIST_SLOTS:
             if isinstance(value, str):
                 return len(value.strip()) > 0
             elif isinstance(value, list):
                 return len(value) > 0
         return value is not None and str(value).strip() != ""
+    
+    def normalize_slot_value(self, slot_name: str, value: Any) -> Any:
+        """Split a comma-separated answer for a list slot into items"""
+        if slot_name in self.LIST_SLOTS and isinstance(value, str):
+            return [item.strip() for item in value.split(",") if item.strip()]
+        return value
+    
+    def apply_answers(self, conversation: ConversationSlots, answers: Dict[str, Any]) -> Tuple[ConversationSlots, List[str]]:
+        """Validate a batch of answers together and apply them to a copy of the conversation
+        
+        Returns the updated conversation and the slots whose value changed.
+        Raises SlotValidationError if any answer is invalid, leaving
+        ``conversation`` untouched.
+        """
+        errors: Dict[str, str] = {}
+        values: Dict[str, Any] = {}
+        for slot_name, value in answers.items():
+            if slot_name not in ConversationSlots.model_fields:
+                errors[slot_name] = "Unknown slot"
+            elif not self.validate_slot_value(slot_name, value):
+                errors[slot_name] = "Answer is empty"
+            else:
+                values[slot_name] = self.normalize_slot_value(slot_name, value)
+        
+        if not errors:
+            try:
+                updated = ConversationSlots.model_validate({**conversation.model_dump(), **values})
+            except ValidationError as e:
+                for error in e.errors():
+                    errors.setdefault(str(error["loc"][0]), error["msg"])
+        if errors:
+            raise SlotValidationError(errors)
+        
+        changed = [name for name in values if getattr(updated, name) != getattr(conversation, name)]
+        return updated, changed
+    
+    def restore_conversation(self, values: Dict[str, Any]) -> ConversationSlots:
+        """Rebuild a conversation from stored slot values
+        
+        Values are normalized the way answers are, so rows written before
+        answers were normalized still load. Values that fail validation anyway
+        are logged and left empty instead of failing the whole conversation.
+        """
+        slots = {
+            name: self.normalize_slot_value(name, value)
+            for name, value in values.items() if name in ConversationSlots.model_fields
+        }
+        try:
+            return ConversationSlots(**slots)
+        except ValidationError as e:
+            invalid = {str(error["loc"][0]) for error in e.errors()}
+            logger.warning("Dropping invalid stored slot values: %s", ", ".join(sorted(invalid)))
+            return ConversationSlots(**{name: value for name, value in slots.items() if name not in invalid})
+
+_slot_manager: Optional[SlotManager] = None
+
+def get_slot_manager() -> SlotManager:
+    """Process-wide slot manager"""
+    global _slot_manager
+    if _slot_manager is None:
+        _slot_manager = SlotManager()
+    return _slot_manager
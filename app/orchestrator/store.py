@@ -0,0 +1,289 @@
+import asyncio
+import contextlib
+import logging
+import os
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+from starlette.concurrency import run_in_threadpool
+from app.backend.models import Conversation, Slot
+from app.db.base import SessionLocal
+from app.db.upsert import dialect_insert
+from app.orchestrator.cache import LRUCache
+from app.orchestrator.slots import ConversationSlots, get_slot_manager
+
+logger = logging.getLogger(__name__)
+
+# Rough per-conversation cost of the model object and cache entry, on top of
+# its serialized size (measured with tracemalloc)
+CONVERSATION_OVERHEAD_BYTES = 512
+
+def ensure_conversation(db, conversation_ids: Iterable[str]) -> None:
+    """Insert the conversations rows that don't exist yet
+    
+    Events and artifacts reference conversations, but the memory store never
+    writes those rows. ON CONFLICT DO NOTHING keeps workers racing to insert
+    the same id from failing.
+    """
+    ids = sorted(set(conversation_ids))
+    if ids:
+        now = datetime.utcnow()
+        db.execute(
+            dialect_insert(db, Conversation).on_conflict_do_nothing(index_elements=["id"]),
+            [{"id": id, "created_at": now} for id in ids]
+        )
+
+def conversation_size(conversation: ConversationSlots) -> int:
+    """Approximate memory held by a cached conversation"""
+    return CONVERSATION_OVERHEAD_BYTES + len(conversation.__pydantic_serializer__.to_json(conversation))
+
+class ConversationStore(ABC):
+    """Base class for intake conversation storage backends
+    
+    Backends keep conversations (or a cache of them) in process memory in
+    ``self.cache``, bounded by entry count, idle TTL and estimated bytes.
+    """
+    
+    backend = "unknown"
+    cache: LRUCache
+    
+    @abstractmethod
+    async def create(self, conversation_id: str, conversation: ConversationSlots) -> None:
+        """Persist a new conversation"""
+        pass
+    
+    @abstractmethod
+    async def get(self, conversation_id: str) -> Optional[ConversationSlots]:
+        """Load a conversation, or None if it does not exist"""
+        pass
+    
+    @abstractmethod
+    async def save(
+        self,
+        conversation_id: str,
+        conversation: ConversationSlots,
+        slot_names: Optional[Iterable[str]] = None
+    ) -> None:
+        """Persist a conversation; only ``slot_names`` are written when given"""
+        pass
+    
+    @abstractmethod
+    async def delete(self, conversation_id: str) -> None:
+        """Remove a conversation"""
+        pass
+    
+    def sweep(self) -> int:
+        """Drop idle conversations from process memory, returning how many were removed"""
+        return self.cache.purge_expired()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Live conversation count and estimated memory footprint"""
+        return {"backend": self.backend, **self.cache.stats()}
+
+class InMemoryConversationStore(ConversationStore):
+    """Process-local store with LRU, idle TTL and memory cap eviction"""
+    
+    backend = "memory"
+    
+    def __init__(self, max_entries: int = 10000, ttl_seconds: Optional[float] = 86400,
+                 max_bytes: Optional[int] = None):
+        self.cache = LRUCache(
+            max_entries=max_entries, ttl_seconds=ttl_seconds, max_bytes=max_bytes, sizeof=conversation_size
+        )
+    
+    async def create(self, conversation_id: str, conversation: ConversationSlots) -> None:
+        self.cache.set(conversation_id, conversation)
+    
+    async def get(self, conversation_id: str) -> Optional[ConversationSlots]:
+        return self.cache.get(conversation_id)
+    
+    async def save(
+        self,
+        conversation_id: str,
+        conversation: ConversationSlots,
+        slot_names: Optional[Iterable[str]] = None
+    ) -> None:
+        self.cache.set(conversation_id, conversation)
+    
+    async def delete(self, conversation_id: str) -> None:
+        self.cache.pop(conversation_id)
+
+class SQLConversationStore(ConversationStore):
+    """Durable store backed by the conversations/slots tables with a write-through cache
+    
+    The in-process cache is shared by every request on a worker, so hot
+    conversations are served without a database round trip. Its TTL bounds how
+    long another worker's writes can go unseen; writes only touch the slots
+    that changed, so a stale read never clobbers another worker's answers.
+    """
+    
+    backend = "sql"
+    
+    def __init__(
+        self,
+        session_factory: Optional[Callable] = None,
+        cache_entries: int = 10000,
+        cache_ttl_seconds: Optional[float] = 5,
+        cache_max_bytes: Optional[int] = None
+    ):
+        self.session_factory = session_factory or SessionLocal
+        self.cache = LRUCache(
+            max_entries=cache_entries, ttl_seconds=cache_ttl_seconds,
+            max_bytes=cache_max_bytes, sizeof=conversation_size
+        )
+    
+    async def create(self, conversation_id: str, conversation: ConversationSlots) -> None:
+        await run_in_threadpool(self._create, conversation_id, conversation)
+        self.cache.set(conversation_id, conversation.model_copy(deep=True))
+    
+    async def get(self, conversation_id: str) -> Optional[ConversationSlots]:
+        cached = self.cache.get(conversation_id)
+        if cached is None:
+            cached = await run_in_threadpool(self._load, conversation_id)
+            if cached is None:
+                return None
+            self.cache.set(conversation_id, cached)
+        # Hand out a copy so the cache only ever reflects committed state
+        return cached.model_copy(deep=True)
+    
+    async def save(
+        self,
+        conversation_id: str,
+        conversation: ConversationSlots,
+        slot_names: Optional[Iterable[str]] = None
+    ) -> None:
+        if slot_names is None:
+            slot_names = [name for name, value in conversation if value is not None]
+        await run_in_threadpool(self._save, conversation_id, conversation, list(slot_names))
+        self.cache.set(conversation_id, conversation.model_copy(deep=True))
+    
+    async def delete(self, conversation_id: str) -> None:
+        await run_in_threadpool(self._delete, conversation_id)
+        self.cache.pop(conversation_id)
+    
+    def _create(self, conversation_id: str, conversation: ConversationSlots) -> None:
+        db = self.session_factory()
+        try:
+            db.add(Conversation(id=conversation_id, project_name=conversation.project_name))
+            db.commit()
+        finally:
+            db.close()
+        slot_names = [name for name, value in conversation if value is not None]
+        if slot_names:
+            self._save(conversation_id, conversation, slot_names)
+    
+    def _load(self, conversation_id: str) -> Optional[ConversationSlots]:
+        db = self.session_factory()
+        try:
+            if db.get(Conversation, conversation_id) is None:
+                return None
+            rows = db.query(Slot.slot_name, Slot.slot_value).filter(
+                Slot.conversation_id == conversation_id
+            ).all()
+            return get_slot_manager().restore_conversation({name: value for name, value in rows})
+        finally:
+            db.close()
+    
+    def _save(self, conversation_id: str, conversation: ConversationSlots, slot_names: list) -> None:
+        if not slot_names:
+            return
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            # Upsert, so workers writing the same slot for the first time don't trip the unique index
+            stmt = dialect_insert(db, Slot)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["conversation_id", "slot_name"],
+                set_={"slot_value": stmt.excluded.slot_value, "updated_at": stmt.excluded.updated_at}
+            )
+            db.execute(stmt, [
+                {
+                    "id": str(uuid.uuid4()),
+                    "conversation_id": conversation_id,
+                    "slot_name": name,
+                    "slot_value": getattr(conversation, name),
+                    "created_at": now,
+                    "updated_at": now
+                }
+                # Sorted so concurrent multi-slot upserts lock rows in the same order
+                for name in sorted(slot_names)
+            ])
+            
+            values = {"updated_at": now}
+            if "project_name" in slot_names:
+                values["project_name"] = conversation.project_name
+            db.query(Conversation).filter(Conversation.id == conversation_id).update(values)
+            db.commit()
+        finally:
+            db.close()
+    
+    def _delete(self, conversation_id: str) -> None:
+        db = self.session_factory()
+        try:
+            db.query(Slot).filter(Slot.conversation_id == conversation_id).delete()
+            db.query(Conversation).filter(Conversation.id == conversation_id).delete()
+            db.commit()
+        finally:
+            db.close()
+
+_store: Optional[ConversationStore] = None
+_sweeper: Optional[asyncio.Task] = None
+
+def create_conversation_store() -> ConversationStore:
+    """Build the conversation store selected by CONVERSATION_STORE"""
+    backend = os.getenv("CONVERSATION_STORE", "memory").lower()
+    max_bytes = int(os.getenv("CONVERSATION_MAX_BYTES", str(256 * 1024 * 1024))) or None
+    
+    if backend == "memory":
+        return InMemoryConversationStore(
+            max_entries=int(os.getenv("CONVERSATION_MAX_ENTRIES", "10000")),
+            ttl_seconds=float(os.getenv("CONVERSATION_TTL_SECONDS", "86400")),
+            max_bytes=max_bytes
+        )
+    elif backend == "sql":
+        return SQLConversationStore(
+            cache_entries=int(os.getenv("CONVERSATION_MAX_ENTRIES", "10000")),
+            cache_ttl_seconds=float(os.getenv("CONVERSATION_CACHE_TTL_SECONDS", "5")),
+            cache_max_bytes=max_bytes
+        )
+    else:
+        raise ValueError(f"Unsupported conversation store: {backend}")
+
+def get_conversation_store() -> ConversationStore:
+    """Conversation store dependency, shared across requests in this process"""
+    global _store
+    if _store is None:
+        _store = create_conversation_store()
+    return _store
+
+async def _sweep_forever(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = get_conversation_store().sweep()
+            if removed:
+                logger.debug("Swept %d idle conversations", removed)
+        except Exception:
+            logger.exception("Conversation sweep failed")
+
+def start_conversation_sweeper() -> None:
+    """Periodically evict idle conversations unless CONVERSATION_SWEEP_INTERVAL_SECONDS=0
+    
+    Expired entries are otherwise only dropped when read or pushed out by
+    newer ones, so abandoned intakes would hold memory until the cache fills.
+    """
+    global _sweeper
+    interval = float(os.getenv("CONVERSATION_SWEEP_INTERVAL_SECONDS", "60"))
+    if interval > 0 and _sweeper is None:
+        _sweeper = asyncio.ensure_future(_sweep_forever(interval))
+
+async def stop_conversation_sweeper() -> None:
+    """Cancel the sweeper task"""
+    global _sweeper
+    if _sweeper is None:
+        return
+    task, _sweeper = _sweeper, None
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
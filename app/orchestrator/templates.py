@@ -0,0 +1,186 @@
+import asyncio
+import contextlib
+import glob
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+DEFAULT_PRD_TEMPLATE = """# Product Requirements Document: {project_name}
+
+{project_description}
+
+{target_users}
+
+{key_features}
+
+{technical_requirements}
+
+{success_metrics}
+
+{timeline}
+
+{budget_constraints}
+
+{integration_requirements}
+
+{data_entities}
+"""
+
+PROJECT_INFO_TEMPLATE = """Project information:
+Project Name: {project_name}
+Description: {project_description}
+Target Users: {target_users}
+Key Features:
+{key_features}
+Technical Requirements: {technical_requirements}
+Success Metrics: {success_metrics}
+Timeline: {timeline}
+Budget Constraints: {budget_constraints}
+Integration Requirements:
+{integration_requirements}
+Data Entities:
+{data_entities}
+"""
+
+PRD_INSTRUCTIONS = (
+    "Generate a comprehensive Product Requirements Document (PRD) for the project "
+    "information given at the end of this prompt. Follow the template structure "
+    "below, replacing every placeholder and guidance line with project-specific "
+    "content. Return only the filled PRD content in markdown format."
+)
+
+def format_slot_value(value: Any) -> str:
+    """Render a slot value for a document or prompt"""
+    if value is None:
+        return "Not specified"
+    if isinstance(value, list):
+        return "\n".join(f"- {item}" for item in value) if value else "Not specified"
+    return str(value)
+
+class CompiledTemplate:
+    """A template pre-split into literal text and ``{placeholder}`` fields"""
+    
+    def __init__(self, name: str, source: str):
+        self.name = name
+        self.source = source
+        # Only bare {identifier} fields are placeholders, so other braces in
+        # markdown (code samples, JSON) are kept as literal text
+        parts = PLACEHOLDER.split(source)
+        self.segments: List[Tuple[str, Optional[str]]] = [
+            (parts[i], parts[i + 1] if i + 1 < len(parts) else None)
+            for i in range(0, len(parts), 2)
+        ]
+        self.fields = {field for _, field in self.segments if field}
+    
+    def render(self, values: Mapping[str, Any]) -> str:
+        """Substitute placeholders with formatted values"""
+        parts = []
+        for literal, field in self.segments:
+            parts.append(literal)
+            if field:
+                parts.append(format_slot_value(values.get(field)))
+        return "".join(parts)
+
+class TemplateRegistry:
+    """Loads every template in a directory once and reloads only what changed
+    
+    Changes are detected by ``watch``, which polls file mtimes every
+    ``check_interval`` seconds on a worker thread, so lookups on the request
+    path only read memory. Built-in ``defaults`` are used for templates
+    missing from the directory.
+    """
+    
+    def __init__(self, directory: str = "docs/templates", check_interval: float = 2.0,
+                 defaults: Optional[Dict[str, str]] = None):
+        self.directory = os.path.abspath(directory)
+        self.check_interval = check_interval
+        self.defaults = {name: CompiledTemplate(name, source) for name, source in (defaults or {}).items()}
+        self.templates: Dict[str, CompiledTemplate] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._prefixes: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+    
+    def load(self) -> None:
+        """(Re)load every template whose file is new, modified or removed"""
+        with self._lock:
+            mtimes = {}
+            for path in glob.glob(os.path.join(self.directory, "*.md")):
+                name = os.path.splitext(os.path.basename(path))[0]
+                mtimes[name] = os.stat(path).st_mtime_ns
+                if self._mtimes.get(name) != mtimes[name]:
+                    with open(path, 'r') as f:
+                        self.templates[name] = CompiledTemplate(name, f.read())
+            
+            for name in set(self.templates) - set(mtimes):
+                del self.templates[name]
+            if mtimes != self._mtimes:
+                self._prefixes.clear()
+            self._mtimes = mtimes
+    
+    async def watch(self) -> None:
+        """Reload changed templates every ``check_interval`` seconds, off the event loop"""
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await run_in_threadpool(self.load)
+            except Exception:
+                logger.exception("Template reload failed")
+    
+    def get(self, name: str) -> CompiledTemplate:
+        """Return a compiled template by file stem, e.g. ``PRD_TEMPLATE``"""
+        template = self.templates.get(name) or self.defaults.get(name)
+        if template is None:
+            raise KeyError(f"Unknown template: {name}")
+        return template
+    
+    def prompt_prefix(self, name: str, instructions: str) -> str:
+        """Static prompt prefix for a template, byte-identical across requests
+        
+        Instructions and template structure go first and per-request data
+        last, so provider-side prompt caching can reuse the prefix.
+        """
+        template = self.get(name)
+        key = (name, instructions)
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            prefix = self._prefixes[key] = f"{instructions}\n\nTemplate structure:\n{template.source}\n"
+        return prefix
+
+_registry: Optional[TemplateRegistry] = None
+_watcher: Optional[asyncio.Task] = None
+
+def get_template_registry() -> TemplateRegistry:
+    """Process-wide template registry configured by TEMPLATES_DIR"""
+    global _registry
+    if _registry is None:
+        _registry = TemplateRegistry(
+            os.getenv("TEMPLATES_DIR", "docs/templates"),
+            float(os.getenv("TEMPLATES_RELOAD_INTERVAL", "2")),
+            defaults={"PRD_TEMPLATE": DEFAULT_PRD_TEMPLATE}
+        )
+        _registry.load()
+    return _registry
+
+def start_template_watcher() -> None:
+    """Watch the template directory for edits unless TEMPLATES_RELOAD_INTERVAL=0"""
+    global _watcher
+    registry = get_template_registry()
+    if registry.check_interval > 0 and _watcher is None:
+        _watcher = asyncio.ensure_future(registry.watch())
+
+async def stop_template_watcher() -> None:
+    """Cancel the template watcher task"""
+    global _watcher
+    if _watcher is None:
+        return
+    task, _watcher = _watcher, None
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
@@ -0,0 +1,38 @@
+"""Standalone job worker process
+
+Runs generation jobs enqueued by ``POST /intake/commit`` so generation
+capacity can be scaled separately from the API:
+
+    python -m app.orchestrator.worker
+"""
+import asyncio
+import os
+import signal
+from app.orchestrator.artifacts import close_artifact_writer
+from app.orchestrator.jobs import create_job_worker
+from app.orchestrator.ledger import start_event_writer, stop_event_writer
+from app.orchestrator.llm.factory import close_llm_clients
+from app.orchestrator.llm.http import open_http_pool
+from app.orchestrator.templates import start_template_watcher, stop_template_watcher
+
+async def run() -> None:
+    open_http_pool()
+    start_template_watcher()
+    start_event_writer()
+    worker = create_job_worker(int(os.getenv("JOB_WORKER_CONCURRENCY", "4")))
+    worker.start()
+    
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+    await stopping.wait()
+    
+    await worker.stop()
+    await stop_template_watcher()
+    await stop_event_writer()
+    await close_llm_clients()
+    close_artifact_writer()
+
+if __name__ == "__main__":
+    asyncio.run(run())
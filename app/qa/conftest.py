@@ -0,0 +1,10 @@
+import os
+import shutil
+from app.qa.support import DATABASE_DIR
+
+# Tests drive job workers and the event ledger explicitly rather than through the app lifespan
+os.environ.setdefault("JOB_WORKERS", "0")
+os.environ.setdefault("LEDGER_ENABLED", "0")
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(DATABASE_DIR, ignore_errors=True)
@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# Scratch SQLite databases live outside the checkout; conftest removes them after the run
+DATABASE_DIR = tempfile.mkdtemp(prefix="agentic-tests-")
+
+def database_url(name: str, driver: str = "sqlite") -> str:
+    """URL for a scratch SQLite database shared by one test module"""
+    return f"{driver}:///{os.path.join(DATABASE_DIR, name)}"
@@ -1,8 +1,10 @@
 import pytest
+import threading
 import yaml
 import json
 from fastapi.testclient import TestClient
 from app.main import app
+from app.orchestrator.contracts import ContractStore
 from openapi_spec_validator import validate_spec
 from openapi_spec_validator.readers import read_from_filename
 
@@ -85,3 +87,52 @@ def test_docs_endpoint():
     response = client.get("/docs")
     assert response.status_code == 200
     assert "text/html" in response.headers["content-type"]
+
+def test_contract_store_patches_idempotently(tmp_path):
+    """Test that re-applying identical entity paths does not rewrite the file"""
+    contract_file = tmp_path / "api.yaml"
+    contract_file.write_text("openapi: 3.0.0\npaths: {}\n")
+    store = ContractStore(str(contract_file))
+    patch = {"/v1/widgets": {"get": {"summary": "List widgets", "responses": {"200": {"description": "ok"}}}}}
+    
+    assert store.apply_paths(patch) is True
+    mtime = contract_file.stat().st_mtime_ns
+    assert store.apply_paths(patch) is False
+    assert contract_file.stat().st_mtime_ns == mtime
+    assert yaml.safe_load(contract_file.read_text())["paths"] == patch
+
+def test_contract_store_reloads_external_changes(tmp_path):
+    """Test that edits made by another writer are picked up, not clobbered"""
+    contract_file = tmp_path / "api.yaml"
+    contract_file.write_text("openapi: 3.0.0\npaths: {}\n")
+    store = ContractStore(str(contract_file))
+    store.load()
+    
+    contract_file.write_text("openapi: 3.0.0\npaths:\n  /v1/external:\n    get: {}\n")
+    store.apply_paths({"/v1/local": {"get": {}}})
+    
+    assert set(yaml.safe_load(contract_file.read_text())["paths"]) == {"/v1/external", "/v1/local"}
+
+def test_contract_store_concurrent_writers(tmp_path):
+    """Test that concurrent patches from separate stores all land"""
+    contract_file = tmp_path / "api.yaml"
+    contract_file.write_text("openapi: 3.0.0\npaths: {}\n")
+    
+    def writer(i):
+        ContractStore(str(contract_file)).apply_paths({f"/v1/entity{i}s": {"get": {}}})
+    
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(yaml.safe_load(contract_file.read_text())["paths"]) == 8
+
+def test_contract_store_creates_missing_file_from_default(tmp_path):
+    """Test that a missing contract is seeded from the default factory"""
+    contract_file = tmp_path / "contracts" / "api.yaml"
+    store = ContractStore(str(contract_file), lambda: {"openapi": "3.0.0", "paths": {}})
+    
+    assert store.apply_paths({}) is True
+    assert yaml.safe_load(contract_file.read_text()) == {"openapi": "3.0.0", "paths": {}}
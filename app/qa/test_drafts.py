@@ -1,13 +1,17 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.main import app
 from app.db.base import Base
-from app.backend.deps import get_db
+from app.backend.deps import get_async_db, get_db
+from app.qa.support import database_url
+import json
 import uuid
+import psycopg
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+SQLALCHEMY_DATABASE_URL = database_url("test.db")
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -18,7 +22,15 @@ def override_get_db():
     finally:
         db.close()
 
+async_engine = create_async_engine(database_url("test.db", "sqlite+aiosqlite"))
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 
 @pytest.fixture(scope="module")
 def client():
@@ -112,3 +124,212 @@ def test_delete_nonexistent_draft(client):
     fake_id = str(uuid.uuid4())
     response = client.delete(f"/v1/drafts/{fake_id}")
     assert response.status_code == 404
+
+def test_list_drafts_keyset_pagination(client):
+    """Test paging through drafts with cursors"""
+    owner = f"pager_{uuid.uuid4().hex[:8]}"
+    created = [
+        client.post("/v1/drafts", json={"owner": owner, "payload": {"n": i}}).json()["id"]
+        for i in range(5)
+    ]
+    
+    seen = []
+    params = {"owner": owner, "limit": 2}
+    while True:
+        response = client.get("/v1/drafts", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 2
+        seen.extend(d["id"] for d in page)
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if not next_cursor:
+            assert "Link" not in response.headers
+            break
+        assert 'rel="next"' in response.headers["Link"]
+        params["cursor"] = next_cursor
+    
+    assert sorted(seen) == sorted(created)
+    assert len(seen) == len(set(seen))
+
+def test_list_drafts_owner_filter(client):
+    """Test filtering drafts by owner"""
+    owner = f"filter_{uuid.uuid4().hex[:8]}"
+    client.post("/v1/drafts", json={"owner": owner, "payload": {}})
+    
+    response = client.get("/v1/drafts", params={"owner": owner})
+    assert response.status_code == 200
+    assert [d["owner"] for d in response.json()] == [owner]
+
+def test_list_drafts_invalid_cursor(client):
+    """Test that a malformed cursor is rejected"""
+    response = client.get("/v1/drafts", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+def test_list_drafts_ndjson_stream(client):
+    """Test streaming drafts as NDJSON"""
+    owner = f"stream_{uuid.uuid4().hex[:8]}"
+    for i in range(3):
+        client.post("/v1/drafts", json={"owner": owner, "payload": {"n": i}})
+    
+    response = client.get("/v1/drafts", params={"owner": owner, "format": "ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 3
+    assert {row["payload"]["n"] for row in rows} == {0, 1, 2}
+
+def test_batch_create_json_array_with_row_errors(client):
+    """Test bulk creation from a JSON array reports bad rows individually"""
+    owner = f"batch_{uuid.uuid4().hex[:8]}"
+    rows = [{"owner": owner, "payload": {"n": i}} for i in range(5)]
+    rows.insert(2, {"owner": owner})
+    
+    response = client.post("/v1/drafts:batch", json=rows)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["inserted"] == 5
+    assert result["failed"] == 1
+    assert result["errors"][0]["index"] == 2
+    
+    listed = client.get("/v1/drafts", params={"owner": owner}).json()
+    assert len(listed) == 5
+
+def test_batch_create_falls_back_when_copy_fails(client, monkeypatch):
+    """Test that a psycopg error from the COPY fast path retries rows individually"""
+    from app.backend import routes_drafts
+    
+    async def failing_copy(db, rows):
+        raise psycopg.errors.DataError("invalid byte sequence for encoding \"UTF8\": 0x00")
+    
+    monkeypatch.setattr(routes_drafts, "_uses_copy", lambda db: True)
+    monkeypatch.setattr(routes_drafts, "_copy_drafts", failing_copy)
+    owner = f"copy_{uuid.uuid4().hex[:8]}"
+    rows = [{"owner": owner, "payload": {"n": i}} for i in range(3)]
+    rows.append({"payload": {}})
+    
+    response = client.post("/v1/drafts:batch", json=rows)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["inserted"] == 3
+    assert [error["index"] for error in result["errors"]] == [3]
+    assert len(client.get("/v1/drafts", params={"owner": owner}).json()) == 3
+
+def test_batch_create_ndjson(client):
+    """Test bulk creation from an NDJSON body"""
+    owner = f"ndjson_{uuid.uuid4().hex[:8]}"
+    body = "\n".join(json.dumps({"owner": owner, "payload": {"n": i}}) for i in range(3))
+    body += "\nnot json\n"
+    
+    response = client.post(
+        "/v1/drafts:batch",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 3
+    assert response.json()["errors"][0]["index"] == 3
+
+def test_batch_create_rejects_unknown_media_type(client):
+    """Test that unsupported batch bodies are refused"""
+    response = client.post("/v1/drafts:batch", content="x", headers={"Content-Type": "text/plain"})
+    assert response.status_code == 415
+
+def test_export_drafts(client):
+    """Test exporting drafts as NDJSON"""
+    owner = f"export_{uuid.uuid4().hex[:8]}"
+    client.post("/v1/drafts:batch", json=[{"owner": owner, "payload": {}}] * 4)
+    
+    response = client.get("/v1/drafts:export", params={"owner": owner})
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 4
+    assert all(row["owner"] == owner for row in rows)
+
+def test_conditional_get_and_if_match(client):
+    """Test ETags: 304 for an unchanged draft and 412 for a stale If-Match"""
+    created = client.post("/v1/drafts", json={"owner": "etag", "payload": {"a": 1}})
+    draft_id = created.json()["id"]
+    etag = created.headers["ETag"]
+    assert created.json()["version"] == 1
+    
+    response = client.get(f"/v1/drafts/{draft_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    
+    response = client.put(f"/v1/drafts/{draft_id}", json={"payload": {"a": 2}}, headers={"If-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["version"] == 2
+    
+    response = client.put(f"/v1/drafts/{draft_id}", json={"payload": {"a": 3}}, headers={"If-Match": etag})
+    assert response.status_code == 412
+    assert client.get(f"/v1/drafts/{draft_id}", headers={"If-None-Match": etag}).status_code == 200
+
+def test_patch_draft_merge_patch(client):
+    """Test that a merge patch changes only the keys it names"""
+    created = client.post("/v1/drafts", json={"owner": "patch", "payload": {"title": "a", "meta": {"x": 1, "y": 2}}})
+    draft_id = created.json()["id"]
+    
+    response = client.patch(
+        f"/v1/drafts/{draft_id}",
+        content=json.dumps({"payload": {"meta": {"y": None, "z": 3}, "done": True}}),
+        headers={"Content-Type": "application/merge-patch+json", "If-Match": created.headers["ETag"]}
+    )
+    assert response.status_code == 200
+    assert response.json()["payload"] == {"title": "a", "meta": {"x": 1, "z": 3}, "done": True}
+    assert response.json()["owner"] == "patch"
+    assert response.json()["version"] == 2
+    
+    response = client.patch(
+        f"/v1/drafts/{draft_id}",
+        content=json.dumps({"payload": {"title": "b"}}),
+        headers={"Content-Type": "application/merge-patch+json", "If-Match": created.headers["ETag"]}
+    )
+    assert response.status_code == 412
+    
+    response = client.patch(f"/v1/drafts/{draft_id}", json={"id": "other"})
+    assert response.status_code == 422
+
+def test_patch_draft_json_patch(client):
+    """Test JSON Patch operations, failed tests and unsupported media types"""
+    created = client.post("/v1/drafts", json={"owner": "jsonpatch", "payload": {"tags": ["a"], "n": 1}})
+    draft_id = created.json()["id"]
+    headers = {"Content-Type": "application/json-patch+json"}
+    
+    response = client.patch(f"/v1/drafts/{draft_id}", headers=headers, content=json.dumps([
+        {"op": "test", "path": "/payload/n", "value": 1},
+        {"op": "add", "path": "/payload/tags/-", "value": "b"},
+        {"op": "move", "from": "/payload/n", "path": "/payload/count"},
+        {"op": "replace", "path": "/owner", "value": "someone"}
+    ]))
+    assert response.status_code == 200
+    assert response.json()["payload"] == {"tags": ["a", "b"], "count": 1}
+    assert response.json()["owner"] == "someone"
+    
+    response = client.patch(f"/v1/drafts/{draft_id}", headers=headers, content=json.dumps([
+        {"op": "test", "path": "/payload/count", "value": 2},
+        {"op": "remove", "path": "/payload/tags"}
+    ]))
+    assert response.status_code == 409
+    assert client.get(f"/v1/drafts/{draft_id}").json()["payload"]["tags"] == ["a", "b"]
+    
+    response = client.patch(f"/v1/drafts/{draft_id}", headers=headers, content=json.dumps([
+        {"op": "remove", "path": "/payload/missing"}
+    ]))
+    assert response.status_code == 422
+    
+    response = client.patch(f"/v1/drafts/{draft_id}", content="x", headers={"Content-Type": "text/plain"})
+    assert response.status_code == 415
+
+def test_merge_patch_compiles_to_jsonb_set_on_postgres():
+    """Test that merge patches become a single jsonb_set UPDATE on PostgreSQL"""
+    from sqlalchemy import update
+    from sqlalchemy.dialects import postgresql
+    from app.backend.models import Draft
+    from app.backend.patch import jsonb_merge_patch
+    
+    statement = update(Draft).values(payload=jsonb_merge_patch(Draft.payload, {"a": 1, "b": None, "c": {"d": 2}}))
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert sql.count("jsonb_set(") == 3
+    assert "jsonb_typeof" in sql
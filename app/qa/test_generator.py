@@ -0,0 +1,213 @@
+import asyncio
+import hashlib
+import os
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from app.orchestrator.artifacts import BlobArtifactWriter, DatabaseArtifactWriter, FileArtifactWriter
+from app.orchestrator.generator import PRDGenerator
+from app.orchestrator.llm.factory import close_llm_clients
+from app.orchestrator.pipeline import ArtifactPipeline, ArtifactStage
+from app.orchestrator.slots import ConversationSlots
+from app.orchestrator.templates import (
+    PRD_INSTRUCTIONS, CompiledTemplate, TemplateRegistry, get_template_registry
+)
+
+def sleeping_stage(name: str, delay: float, log: list, depends_on=()):
+    async def run(conversation, **upstream):
+        log.append(("start", name, sorted(upstream)))
+        await asyncio.sleep(delay)
+        log.append(("end", name))
+        return f"{name}.out"
+    return ArtifactStage(name, run, depends_on)
+
+def test_pipeline_runs_independent_stages_concurrently():
+    """Test that independent stages overlap and report timings"""
+    log = []
+    pipeline = ArtifactPipeline([
+        sleeping_stage("prd", 0.2, log),
+        sleeping_stage("contracts", 0.2, log),
+    ])
+    
+    result = asyncio.run(pipeline.run(ConversationSlots()))
+    
+    assert result.artifacts == ["prd.out", "contracts.out"]
+    assert set(result.timings_ms) == {"prd", "contracts", "total"}
+    assert result.timings_ms["total"] < 350
+    assert [entry[0] for entry in log[:2]] == ["start", "start"]
+
+def test_pipeline_passes_dependency_outputs():
+    """Test that a dependent stage starts after, and receives, its inputs"""
+    log = []
+    pipeline = ArtifactPipeline([
+        sleeping_stage("qa_matrix", 0, log, depends_on=["prd"]),
+        sleeping_stage("prd", 0.05, log),
+    ])
+    
+    result = asyncio.run(pipeline.run(ConversationSlots()))
+    
+    assert result.artifacts == ["qa_matrix.out", "prd.out"]
+    assert log.index(("end", "prd")) < log.index(("start", "qa_matrix", ["prd"]))
+
+def test_pipeline_rejects_cycles_and_unknown_dependencies():
+    """Test DAG validation"""
+    noop = lambda conversation, **upstream: None
+    with pytest.raises(ValueError):
+        ArtifactPipeline([ArtifactStage("a", noop, ["b"]), ArtifactStage("b", noop, ["a"])])
+    with pytest.raises(ValueError):
+        ArtifactPipeline([ArtifactStage("a", noop, ["missing"])])
+
+def test_compiled_template_substitutes_placeholders():
+    """Test that placeholders are filled and lists become bullets"""
+    template = CompiledTemplate("t", "# {project_name}\n{key_features}\n{timeline}\nLiteral {1} }")
+    
+    rendered = template.render({"project_name": "Demo", "key_features": ["A", "B"]})
+    
+    assert rendered == "# Demo\n- A\n- B\nNot specified\nLiteral {1} }"
+    assert template.fields == {"project_name", "key_features", "timeline"}
+
+def test_template_registry_reloads_changed_files(tmp_path):
+    """Test that templates load once, fall back to defaults and pick up edits"""
+    path = tmp_path / "PRD_TEMPLATE.md"
+    path.write_text("v1 {project_name}")
+    registry = TemplateRegistry(str(tmp_path), check_interval=0, defaults={"OTHER": "default"})
+    registry.load()
+    
+    prefix = registry.prompt_prefix("PRD_TEMPLATE", "Do it.")
+    assert registry.prompt_prefix("PRD_TEMPLATE", "Do it.") is prefix
+    assert prefix.startswith("Do it.") and "v1 {project_name}" in prefix
+    assert registry.get("OTHER").source == "default"
+    
+    path.write_text("v2 {project_name}")
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10**9))
+    # Lookups never touch the disk; edits arrive through load()/watch()
+    assert registry.get("PRD_TEMPLATE").render({"project_name": "X"}) == "v1 X"
+    registry.load()
+    assert registry.get("PRD_TEMPLATE").render({"project_name": "X"}) == "v2 X"
+    assert "v2" in registry.prompt_prefix("PRD_TEMPLATE", "Do it.")
+    
+    path.unlink()
+    registry.check_interval = 0.01
+    
+    async def watch_once():
+        watcher = asyncio.ensure_future(registry.watch())
+        for _ in range(100):
+            if "PRD_TEMPLATE" not in registry.templates:
+                break
+            await asyncio.sleep(0.01)
+        watcher.cancel()
+    
+    asyncio.run(watch_once())
+    with pytest.raises(KeyError):
+        registry.get("PRD_TEMPLATE")
+
+def test_prd_prompt_starts_with_static_prefix(monkeypatch):
+    """Test that only the project information differs between prompts"""
+    monkeypatch.setenv("LLM_PROVIDER", "stub")
+    asyncio.run(close_llm_clients())
+    generator = PRDGenerator()
+    first = generator._build_prd_prompt(ConversationSlots(project_name="Alpha"))
+    second = generator._build_prd_prompt(ConversationSlots(project_name="Beta", key_features=["Search"]))
+    prefix = get_template_registry().prompt_prefix("PRD_TEMPLATE", PRD_INSTRUCTIONS)
+    
+    assert first.startswith(prefix) and second.startswith(prefix)
+    assert "Project Name: Beta" in second and "- Search" in second
+
+def test_abandoned_stream_lets_contract_update_finish(monkeypatch, tmp_path):
+    """Test that closing or cancelling the stream early still runs the contract update to completion"""
+    monkeypatch.setenv("LLM_PROVIDER", "stub")
+    monkeypatch.chdir(tmp_path)
+    asyncio.run(close_llm_clients())
+    generator = PRDGenerator()
+    finished = []
+    
+    async def slow_contracts(conversation):
+        await asyncio.sleep(0.05)
+        finished.append(conversation.project_name)
+        return "contracts/api.yaml"
+    
+    generator._update_contracts = slow_contracts
+    
+    async def scenario():
+        stream = generator.stream_artifacts(ConversationSlots(project_name="closed"))
+        assert (await stream.__anext__())[0] == "artifact_started"
+        await stream.aclose()
+        assert finished == ["closed"]
+        
+        async def consume():
+            async for _ in generator.stream_artifacts(ConversationSlots(project_name="cancelled")):
+                await asyncio.sleep(10)
+        
+        consumer = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.01)
+        consumer.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await consumer
+        await asyncio.sleep(0.1)
+        return list(finished)
+    
+    # Checked inside the loop: asyncio.run would otherwise finish the task on exit
+    assert asyncio.run(scenario()) == ["closed", "cancelled"]
+    asyncio.run(close_llm_clients())
+
+def test_file_artifact_writer_streams_then_renames(tmp_path):
+    """Test that streamed artifacts appear at their path only once complete"""
+    writer = FileArtifactWriter(ThreadPoolExecutor(max_workers=1))
+    path = str(tmp_path / "prds" / "FT-1.md")
+    
+    async def scenario():
+        stream = writer.open_stream(path, "prd")
+        stream.flush_bytes = 4
+        await stream.append("# Title\n")
+        assert not os.path.exists(path)
+        assert open(f"{path}.part").read() == "# Title\n"
+        await stream.append("body")
+        location = await stream.close()
+        assert await stream.close() == location
+        return location
+    
+    assert asyncio.run(scenario()) == path
+    assert open(path).read() == "# Title\nbody"
+    assert sorted(os.listdir(tmp_path / "prds")) == ["FT-1.md"]
+
+def test_blob_artifact_writer_deduplicates_by_hash(tmp_path):
+    """Test that identical content is stored once under its hash"""
+    writer = BlobArtifactWriter(ThreadPoolExecutor(max_workers=1), str(tmp_path))
+    
+    async def scenario():
+        first = await writer.write("docs/prds/FT-1.md", "same", "prd")
+        second = await writer.write("docs/prds/FT-2.md", "same", "prd")
+        third = await writer.write("docs/prds/FT-3.md", "different", "prd")
+        return first, second, third
+    
+    first, second, third = asyncio.run(scenario())
+    assert first == second != third
+    assert first.endswith(".md")
+    assert writer.writes == 2
+    assert writer.deduplicated == 1
+
+def test_database_artifact_writer_stores_content():
+    """Test that artifact content lands in the artifacts table, deduplicated per conversation"""
+    from sqlalchemy import create_engine, select
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from app.backend.models import Artifact
+    from app.db.base import Base
+    
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    writer = DatabaseArtifactWriter(ThreadPoolExecutor(max_workers=1), sessionmaker(bind=engine))
+    
+    async def scenario():
+        first = await writer.write("docs/prds/FT-1.md", "content", "prd", "conv_artifacts")
+        second = await writer.write("docs/prds/FT-2.md", "content", "prd", "conv_artifacts")
+        return first, second
+    
+    first, second = asyncio.run(scenario())
+    assert first == second
+    assert first.startswith("artifact://")
+    with sessionmaker(bind=engine)() as db:
+        assert db.execute(select(Artifact.content, Artifact.content_sha256)).all() == [
+            ("content", hashlib.sha256(b"content").hexdigest())
+        ]
+    with pytest.raises(ValueError):
+        asyncio.run(writer.write("docs/prds/FT-3.md", "content", "prd"))
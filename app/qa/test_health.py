@@ -0,0 +1,102 @@
+import sqlite3
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import exc, text
+from app.main import app
+from app.devops.metrics import _route_template, instrument_engine
+from app.db.pool import WaitTrackingQueuePool, pool_options, pool_stats
+
+client = TestClient(app)
+
+def test_pool_stats_count_waits_and_timeouts():
+    """Test that an exhausted pool records the wait and the timeout"""
+    pool = WaitTrackingQueuePool(lambda: sqlite3.connect(":memory:"), pool_size=1, max_overflow=0, timeout=0.05)
+    held = pool.connect()
+    
+    with pytest.raises(exc.TimeoutError):
+        pool.connect()
+    
+    stats = pool_stats(pool)
+    assert stats["checked_out"] == 1
+    assert stats["waits"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["wait_time_ms"] >= 40
+    held.close()
+
+def test_pool_options_from_env(monkeypatch):
+    """Test pool sizing and PgBouncer mode configuration"""
+    monkeypatch.setenv("DB_POOL_SIZE", "12")
+    monkeypatch.setenv("DB_POOL_LIFO", "1")
+    options = pool_options("postgresql+psycopg://u:p@db/app")
+    assert options["pool_size"] == 12
+    assert options["pool_use_lifo"] is True
+    assert options["pool_pre_ping"] is True
+    
+    monkeypatch.setenv("DB_PGBOUNCER", "1")
+    options = pool_options("postgresql+asyncpg://u:p@db/app", is_async=True)
+    assert options["poolclass"].__name__ == "NullPool"
+    assert options["connect_args"]["statement_cache_size"] == 0
+    
+    assert pool_options("sqlite:///./local.db") == {}
+
+def test_diagnostics_endpoint():
+    """Test that pool statistics are exposed next to the health probes"""
+    response = client.get("/diagz")
+    assert response.status_code == 200
+    assert "checked_out" in response.json()["database"]["sync_pool"]
+    assert "limiters" in response.json()["llm"]
+
+def test_metrics_endpoint():
+    """Test that requests and route templates show up in /metrics"""
+    client.get("/healthz")
+    client.get("/no-such-page")
+    client.delete("/intake/jobs/abc")
+    client.get("/openapi.json")
+    
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/healthz",status="200"}' in body
+    assert 'route="unmatched"' in body
+    assert 'route="/intake/jobs/{job_id}",status="405"' in body
+    assert 'route="/openapi.json"' in body
+    assert "http_request_duration_seconds_bucket" in body
+    # The label comes from the route recorded while routing, not a scan of the app's routes
+    route = next(r for r in app.routes if getattr(r, "path", None) == "/v1/drafts/{id}")
+    assert _route_template({"type": "http", "path": "/v1/drafts/abc", "route": route}) == "/v1/drafts/{id}"
+    assert _route_template({"type": "http", "path": "/v1/drafts/abc"}) == "unmatched"
+
+def test_engine_statements_are_instrumented():
+    """Test that SQL statements are counted and timed per engine and operation"""
+    from prometheus_client import REGISTRY
+    from sqlalchemy import create_engine
+    
+    engine = create_engine("sqlite://")
+    instrument_engine(engine, "metrics_test")
+    instrument_engine(engine, "metrics_test")
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with pytest.raises(exc.OperationalError):
+            conn.execute(text("SELECT * FROM missing"))
+        conn.execute(text("SELECT 2"))
+    
+    labels = {"engine": "metrics_test", "operation": "SELECT"}
+    assert REGISTRY.get_sample_value("db_queries_total", labels) == 2
+    assert REGISTRY.get_sample_value("db_query_duration_seconds_count", labels) == 2
+
+def test_llm_calls_are_instrumented():
+    """Test that provider calls record latency, outcome and estimated tokens"""
+    import asyncio
+    from prometheus_client import REGISTRY
+    from app.orchestrator.llm.instrumented import InstrumentedLLMClient
+    from app.orchestrator.llm.stub_client import StubClient
+    
+    working = InstrumentedLLMClient(StubClient("metrics_stub", response="done"))
+    asyncio.run(working.generate_response("hello world"))
+    failing = InstrumentedLLMClient(StubClient("metrics_stub", error_rate=1.0))
+    asyncio.run(failing.generate_response("hello"))
+    
+    sample = REGISTRY.get_sample_value
+    assert sample("llm_calls_total", {"provider": "metrics_stub", "call": "generate", "outcome": "ok"}) == 1
+    assert sample("llm_calls_total", {"provider": "metrics_stub", "call": "generate", "outcome": "error"}) == 1
+    assert sample("llm_tokens_total", {"provider": "metrics_stub", "direction": "completion"}) == 2
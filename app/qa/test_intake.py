@@ -0,0 +1,407 @@
+import asyncio
+import json
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.db.base import Base
+from app.backend.models import Slot
+from app.orchestrator.cache import LRUCache
+from app.orchestrator.extract import SlotExtractor, get_slot_extractor
+from app.orchestrator.jobs import JobQueue, JobWorker, get_job_queue
+from app.orchestrator.llm.cache import ResponseCache
+from app.orchestrator.llm.factory import close_llm_clients
+from app.orchestrator.llm.stub_client import StubClient
+from app.orchestrator.slots import ConversationSlots, SlotManager, get_slot_manager
+from app.orchestrator.store import (
+    InMemoryConversationStore,
+    SQLConversationStore,
+    conversation_size,
+    get_conversation_store,
+)
+from app.qa.support import database_url
+
+SQLALCHEMY_DATABASE_URL = database_url("test_intake.db")
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module")
+def sql_store():
+    Base.metadata.create_all(bind=engine)
+    yield SQLConversationStore(session_factory=TestingSessionLocal)
+    Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture(scope="module")
+def job_queue():
+    Base.metadata.create_all(bind=engine)
+    queue = JobQueue(session_factory=TestingSessionLocal, stale_seconds=0, max_attempts=2)
+    app.dependency_overrides[get_job_queue] = lambda: queue
+    yield queue
+    app.dependency_overrides.pop(get_job_queue, None)
+    Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def client():
+    store = InMemoryConversationStore()
+    app.dependency_overrides[get_conversation_store] = lambda: store
+    with TestClient(app) as c:
+        yield c
+    app.dependency_overrides.pop(get_conversation_store, None)
+
+def test_intake_answer_and_status(client):
+    """Test answering a question and reading back the status"""
+    conversation_id = client.post("/intake/start", json={}).json()["conversation_id"]
+    
+    response = client.post("/intake/answer", json={
+        "conversation_id": conversation_id,
+        "slot_name": "project_name",
+        "value": "Ledger"
+    })
+    assert response.status_code == 200
+    assert response.json()["slots"]["project_name"] == "Ledger"
+    assert "project_name" not in response.json()["gaps"]
+    
+    status = client.get("/intake/status", params={"conversation_id": conversation_id})
+    assert status.status_code == 200
+    assert status.json()["slots"]["project_name"] == "Ledger"
+
+def test_gaps_follow_slot_assignments():
+    """Test that the filled-slot mask tracks assignments, copies and reloads"""
+    slot_manager = get_slot_manager()
+    assert slot_manager is get_slot_manager()
+    
+    conversation = ConversationSlots(project_name="Ledger", key_features=[])
+    assert slot_manager.get_gaps(conversation) == ("project_description", "target_users", "key_features")
+    
+    conversation.key_features = ["search"]
+    conversation.target_users = "analysts"
+    assert slot_manager.get_gaps(conversation) == ("project_description",)
+    
+    conversation.project_name = None
+    conversation.key_features = []
+    assert slot_manager.get_gaps(conversation) == ("project_name", "project_description", "key_features")
+    
+    copy = conversation.model_copy(deep=True)
+    reloaded = ConversationSlots.model_validate(conversation.model_dump())
+    for other in (copy, reloaded):
+        assert slot_manager.get_gaps(other) == slot_manager.get_gaps(conversation)
+    assert slot_manager.get_next_question(slot_manager.get_gaps(conversation)) == SlotManager.SLOT_QUESTIONS["project_name"]
+
+def test_intake_unknown_conversation(client):
+    """Test that unknown conversations return 404"""
+    response = client.get("/intake/status", params={"conversation_id": "conv_missing"})
+    assert response.status_code == 404
+
+def test_sql_store_round_trip(sql_store):
+    """Test that the SQL store persists slots and survives a cold cache"""
+    async def scenario():
+        await sql_store.create("conv_sql", ConversationSlots())
+        conversation = await sql_store.get("conv_sql")
+        conversation.project_name = "Durable"
+        conversation.key_features = ["a", "b"]
+        await sql_store.save("conv_sql", conversation, ["project_name", "key_features"])
+        
+        sql_store.cache.clear()
+        return await sql_store.get("conv_sql")
+    
+    loaded = asyncio.run(scenario())
+    assert loaded.project_name == "Durable"
+    assert loaded.key_features == ["a", "b"]
+
+def test_sql_store_partial_save_keeps_other_slots(sql_store):
+    """Test that saving one slot from a stale copy does not clobber others"""
+    async def scenario():
+        await sql_store.create("conv_race", ConversationSlots())
+        stale = await sql_store.get("conv_race")
+        fresh = await sql_store.get("conv_race")
+        
+        fresh.target_users = "operators"
+        await sql_store.save("conv_race", fresh, ["target_users"])
+        stale.timeline = "Q3"
+        await sql_store.save("conv_race", stale, ["timeline"])
+        
+        sql_store.cache.clear()
+        return await sql_store.get("conv_race")
+    
+    loaded = asyncio.run(scenario())
+    assert loaded.target_users == "operators"
+    assert loaded.timeline == "Q3"
+
+def test_sql_store_concurrent_first_writes_of_a_slot(sql_store):
+    """Test that racing first writes of the same slot upsert instead of failing"""
+    async def scenario():
+        await sql_store.create("conv_upsert", ConversationSlots())
+        await asyncio.gather(*(
+            sql_store.save("conv_upsert", ConversationSlots(timeline=f"Q{i}"), ["timeline"])
+            for i in range(1, 5)
+        ))
+        sql_store.cache.clear()
+        return await sql_store.get("conv_upsert")
+    
+    assert asyncio.run(scenario()).timeline in {"Q1", "Q2", "Q3", "Q4"}
+    db = TestingSessionLocal()
+    try:
+        assert db.query(Slot).filter(Slot.conversation_id == "conv_upsert").count() == 1
+    finally:
+        db.close()
+
+def test_sql_store_answer_list_slot_with_string(sql_store):
+    """Test that a comma-separated list answer is stored normalized and reloads after the cache clears"""
+    app.dependency_overrides[get_conversation_store] = lambda: sql_store
+    try:
+        with TestClient(app) as c:
+            conversation_id = c.post("/intake/start", json={}).json()["conversation_id"]
+            response = c.post("/intake/answer", json={
+                "conversation_id": conversation_id,
+                "slot_name": "key_features",
+                "value": "search, export"
+            })
+            assert response.status_code == 200
+            assert response.json()["slots"]["key_features"] == ["search", "export"]
+            
+            rejected = c.post("/intake/answer", json={
+                "conversation_id": conversation_id,
+                "slot_name": "target_users",
+                "value": " "
+            })
+            assert rejected.status_code == 422
+            
+            # A row no answer could have produced must not take the conversation down
+            db = TestingSessionLocal()
+            try:
+                db.query(Slot).filter(
+                    Slot.conversation_id == conversation_id, Slot.slot_name == "key_features"
+                ).update({"slot_value": "search, export"})
+                db.add(Slot(id="slot_bad", conversation_id=conversation_id, slot_name="timeline", slot_value=["Q3"]))
+                db.commit()
+            finally:
+                db.close()
+            
+            sql_store.cache.clear()
+            status = c.get("/intake/status", params={"conversation_id": conversation_id})
+            assert status.status_code == 200
+            assert status.json()["slots"]["key_features"] == ["search", "export"]
+            assert status.json()["slots"]["timeline"] is None
+    finally:
+        app.dependency_overrides.pop(get_conversation_store, None)
+
+def test_in_memory_store_ttl_eviction():
+    """Test that idle conversations expire from the in-memory store"""
+    store = InMemoryConversationStore(ttl_seconds=0)
+    
+    async def scenario():
+        await store.create("conv_ttl", ConversationSlots())
+        await asyncio.sleep(0.01)
+        return await store.get("conv_ttl")
+    
+    assert asyncio.run(scenario()) is None
+
+def test_in_memory_store_memory_cap_and_sweep():
+    """Test that the byte cap evicts least recently used conversations and the sweep drops idle ones"""
+    size = conversation_size(ConversationSlots())
+    store = InMemoryConversationStore(ttl_seconds=60, max_bytes=size * 2)
+    
+    async def scenario():
+        for conversation_id in ("conv_a", "conv_b"):
+            await store.create(conversation_id, ConversationSlots())
+        await store.get("conv_a")
+        await store.create("conv_c", ConversationSlots())
+        return [await store.get(conversation_id) is not None for conversation_id in ("conv_a", "conv_b", "conv_c")]
+    
+    assert asyncio.run(scenario()) == [True, False, True]
+    assert store.stats()["entries"] == 2
+    assert store.stats()["bytes"] == size * 2
+    assert store.stats()["evictions"] == 1
+    
+    store.cache.ttl_seconds = 0
+    assert store.sweep() == 2
+    assert store.stats()["bytes"] == 0
+
+def test_admin_conversations_reports_footprint(client):
+    """Test the admin endpoint's live count and size estimate"""
+    client.post("/intake/start", json={"project_name": "Ledger"})
+    
+    response = client.get("/intake/admin/conversations")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["backend"] == "memory"
+    assert body["entries"] == 1
+    assert body["bytes"] > 0
+    
+    assert client.get("/intake/admin/conversations", params={"sweep": True}).json()["swept"] == 0
+
+@pytest.fixture
+def stub_llm(monkeypatch, tmp_path):
+    """Run generation against the offline stub provider inside a scratch directory"""
+    monkeypatch.setenv("LLM_PROVIDER", "stub")
+    monkeypatch.delenv("STUB_LLM_URL", raising=False)
+    monkeypatch.delenv("LLM_CACHE_ENABLED", raising=False)
+    monkeypatch.setenv("STUB_LLM_RESPONSE", "# Ledger PRD\n\nStreamed offline.\n")
+    monkeypatch.chdir(tmp_path)
+    asyncio.run(close_llm_clients())
+    yield tmp_path
+    asyncio.run(close_llm_clients())
+
+def fill_required_slots(client, conversation_id):
+    for slot_name, value in [
+        ("project_name", "Ledger"),
+        ("project_description", "Tracks things"),
+        ("target_users", "operators"),
+        ("key_features", ["audit"]),
+    ]:
+        client.post("/intake/answer", json={
+            "conversation_id": conversation_id,
+            "slot_name": slot_name,
+            "value": value
+        })
+
+def parse_sse(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+def test_commit_stream_relays_tokens_and_writes_prd(client, stub_llm):
+    """Test that the SSE commit streams tokens and writes them to the PRD file"""
+    conversation_id = client.post("/intake/start", json={}).json()["conversation_id"]
+    fill_required_slots(client, conversation_id)
+    
+    response = client.post("/intake/commit/stream", json={"conversation_id": conversation_id})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    
+    events = parse_sse(response.text)
+    tokens = "".join(data["text"] for event, data in events if event == "token")
+    assert tokens == "# Ledger PRD\n\nStreamed offline.\n"
+    
+    event, done = events[-1]
+    assert event == "done"
+    assert done["timings_ms"]["first_token"] <= done["timings_ms"]["total"]
+    prd_path = done["artifacts"][0]
+    assert (stub_llm / prd_path).read_text() == tokens
+
+def test_commit_stream_rejects_incomplete_conversation(client):
+    """Test that streaming commit still enforces required slots"""
+    conversation_id = client.post("/intake/start", json={}).json()["conversation_id"]
+    response = client.post("/intake/commit/stream", json={"conversation_id": conversation_id})
+    assert response.status_code == 400
+
+def test_commit_queues_job_and_worker_completes_it(client, stub_llm, job_queue):
+    """Test that commit returns a job immediately and a worker produces the artifacts"""
+    conversation_id = client.post("/intake/start", json={}).json()["conversation_id"]
+    fill_required_slots(client, conversation_id)
+    
+    response = client.post("/intake/commit", json={"conversation_id": conversation_id})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    status = client.get(response.json()["status_url"]).json()
+    assert status["status"] == "queued"
+    assert status["artifacts"] == []
+    
+    assert asyncio.run(JobWorker(job_queue).run_once()) is True
+    
+    status = client.get(f"/intake/jobs/{job_id}").json()
+    assert status["status"] == "succeeded"
+    assert status["attempts"] == 1
+    prd_path, contract_path = status["artifacts"]
+    assert "# Product Requirements Document: Ledger" in (stub_llm / prd_path).read_text()
+    assert contract_path == "contracts/api.yaml"
+
+def test_job_failures_and_stale_jobs(job_queue):
+    """Test that handler errors are recorded and abandoned jobs are retried, then failed"""
+    async def boom(payload):
+        raise RuntimeError("provider down")
+    
+    async def scenario():
+        worker = JobWorker(job_queue, handlers={"boom": boom})
+        failed_id = await job_queue.enqueue("boom", {})
+        await worker.run_once()
+        
+        lost_id = await job_queue.enqueue("lost", {})
+        await job_queue.claim()
+        await job_queue.requeue_stale()
+        requeued = await job_queue.get(lost_id)
+        await job_queue.claim()
+        await job_queue.requeue_stale()
+        return await job_queue.get(failed_id), requeued, await job_queue.get(lost_id)
+    
+    failed, requeued, lost = asyncio.run(scenario())
+    assert failed["status"] == "failed" and failed["error"] == "provider down"
+    assert requeued["status"] == "queued"
+    assert lost["status"] == "failed" and lost["attempts"] == 2
+
+def test_unknown_job_returns_404(client, job_queue):
+    """Test that polling an unknown job id returns 404"""
+    assert client.get("/intake/jobs/missing").status_code == 404
+
+def test_intake_batch_answers(client):
+    """Test answering several slots in one request, returning only what changed"""
+    conversation_id = client.post("/intake/start", json={}).json()["conversation_id"]
+    
+    response = client.post("/intake/answers", json={
+        "conversation_id": conversation_id,
+        "answers": {"project_name": "Batch", "key_features": "search, export", "target_users": "ops"}
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["slots"]["key_features"] == ["search", "export"]
+    assert sorted(body["changed"]) == ["key_features", "project_name", "target_users"]
+    assert body["gaps"] == ["project_description"]
+    assert body["next_question"] == SlotManager.SLOT_QUESTIONS["project_description"]
+    
+    response = client.post("/intake/answers", json={
+        "conversation_id": conversation_id,
+        "answers": {"project_name": "Batch", "project_description": "Bulk answers"},
+        "changed_only": True
+    })
+    assert response.json()["slots"] == {"project_description": "Bulk answers"}
+    assert response.json()["changed"] == ["project_description"]
+    assert response.json()["gaps"] == []
+
+def test_intake_batch_answers_are_all_or_nothing(client):
+    """Test that one invalid answer rejects the whole batch"""
+    conversation_id = client.post("/intake/start", json={}).json()["conversation_id"]
+    
+    response = client.post("/intake/answers", json={
+        "conversation_id": conversation_id,
+        "answers": {"project_name": "Kept out", "target_users": "  ", "favourite_colour": "red"}
+    })
+    assert response.status_code == 422
+    assert {error["loc"][-1] for error in response.json()["detail"]} == {"target_users", "favourite_colour"}
+    
+    status = client.get("/intake/status", params={"conversation_id": conversation_id}).json()
+    assert status["slots"]["project_name"] is None
+
+def test_intake_extract_fills_slots_from_brief(client):
+    """Test that one brief fills the slots it answers, keeps earlier answers and is cached"""
+    stub = StubClient(response=json.dumps({
+        "project_name": "Harbor",
+        "project_description": "Berth booking for small marinas",
+        "key_features": "booking, invoicing",
+        "target_users": None,
+        "favourite_colour": "blue"
+    }))
+    extractor = SlotExtractor(stub, ResponseCache(LRUCache(max_entries=10)))
+    app.dependency_overrides[get_slot_extractor] = lambda: extractor
+    try:
+        response = client.post("/intake/extract", json={"brief": "Harbor: berth booking for small marinas."})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["slots"]["key_features"] == ["booking", "invoicing"]
+        assert sorted(body["extracted"]) == ["key_features", "project_description", "project_name"]
+        assert body["gaps"] == ["target_users"]
+        assert body["cached"] is False
+        
+        conversation_id = client.post("/intake/start", json={}).json()["conversation_id"]
+        client.post("/intake/answers", json={"conversation_id": conversation_id, "answers": {"project_name": "Mine"}})
+        response = client.post("/intake/extract", json={
+            "conversation_id": conversation_id,
+            "brief": "Harbor:   berth booking for small marinas."
+        })
+        assert response.json()["cached"] is True
+        assert response.json()["slots"]["project_name"] == "Mine"
+        assert stub.calls == 1
+    finally:
+        app.dependency_overrides.pop(get_slot_extractor, None)
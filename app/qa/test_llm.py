@@ -0,0 +1,364 @@
+import asyncio
+import json
+import random
+import time
+import httpx
+import pytest
+from app.orchestrator.cache import LRUCache
+from app.orchestrator.llm.base import LLMClient, error_response, extract_json, is_error_response, json_stats
+from app.orchestrator.llm.cache import CachedLLMClient, DiskCache, ResponseCache
+from app.orchestrator.llm.factory import close_llm_clients, create_provider_client, get_llm_client
+from app.orchestrator.llm.http import get_http_pool, open_http_pool
+from app.orchestrator.llm.instrumented import InstrumentedLLMClient
+from app.orchestrator.llm.limiter import LimitedLLMClient, LimiterTimeout, ProviderLimiter, get_limiter
+from app.orchestrator.llm.router import CircuitBreaker, RoutingLLMClient
+from app.orchestrator.llm.stub_client import StubClient, latency_distribution
+
+class CountingClient(LLMClient):
+    """Fake provider that records how often it is called"""
+    
+    provider = "fake"
+    model = "fake-1"
+    
+    def __init__(self, response: str = '{"prd_content": "# PRD"}'):
+        self.response = response
+        self.calls = 0
+    
+    async def generate_response(self, prompt: str) -> str:
+        self.calls += 1
+        return self.response
+
+def test_cached_client_serves_repeated_prompts_from_memory():
+    """Test that identical prompts only reach the provider once"""
+    inner = CountingClient()
+    cache = ResponseCache(LRUCache(max_entries=8))
+    client = CachedLLMClient(inner, cache)
+    schema = {"type": "object", "properties": {"prd_content": {"type": "string"}}}
+    
+    async def scenario():
+        first = await client.generate_json_response("same prompt", schema)
+        second = await client.generate_json_response("same prompt", schema)
+        await client.generate_json_response("other prompt", schema)
+        return first, second
+    
+    first, second = asyncio.run(scenario())
+    assert first == second == {"prd_content": "# PRD"}
+    assert inner.calls == 2
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+def test_cached_client_falls_back_to_disk_tier(tmp_path):
+    """Test that a cold memory tier is refilled from disk"""
+    disk = DiskCache(str(tmp_path), max_entries=8)
+    inner = CountingClient("plain text")
+    
+    asyncio.run(CachedLLMClient(inner, ResponseCache(LRUCache(), disk)).generate_response("p"))
+    cache = ResponseCache(LRUCache(), disk)
+    response = asyncio.run(CachedLLMClient(inner, cache).generate_response("p"))
+    
+    assert response == "plain text"
+    assert inner.calls == 1
+    assert cache.stats()["disk_hits"] == 1
+
+def test_cached_client_does_not_cache_errors():
+    """Test that provider failures are retried rather than cached"""
+    inner = CountingClient(error_response("boom"))
+    client = CachedLLMClient(inner, ResponseCache(LRUCache()))
+    
+    async def scenario():
+        await client.generate_response("p")
+        await client.generate_response("p")
+    
+    asyncio.run(scenario())
+    assert inner.calls == 2
+    assert json.loads(error_response("boom")) == {"error": "boom"}
+
+def test_disk_cache_is_size_bounded(tmp_path):
+    """Test that the disk tier evicts the oldest entries"""
+    disk = DiskCache(str(tmp_path), max_entries=2)
+    for key in ["a", "b", "c"]:
+        disk.set(key, key)
+    
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+def test_disk_cache_only_scans_when_over_capacity(tmp_path, monkeypatch):
+    """Test that writes under the cap skip the directory scan and eviction trims in batches"""
+    disk = DiskCache(str(tmp_path), max_entries=20)
+    scans = []
+    entries = disk._entries
+    monkeypatch.setattr(disk, "_entries", lambda: scans.append(1) or entries())
+    
+    for i in range(20):
+        disk.set(f"k{i}", i)
+    disk.set("k0", "rewritten")
+    assert scans == []
+    
+    disk.set("k20", 20)
+    assert len(scans) == 1
+    assert len(list(tmp_path.glob("*.json"))) == 18
+    disk.set("k21", 21)
+    disk.set("k22", 22)
+    assert len(scans) == 1
+
+def test_cached_json_results_are_not_shared_between_callers(tmp_path):
+    """Test that mutating a returned JSON response leaves the cached entry intact"""
+    inner = CountingClient()
+    client = CachedLLMClient(inner, ResponseCache(LRUCache(), DiskCache(str(tmp_path))))
+    schema = {"type": "object", "properties": {"prd_content": {"type": "string"}}}
+    
+    async def scenario():
+        first = await client.generate_json_response("p", schema)
+        first["prd_content"] = "changed"
+        second = await client.generate_json_response("p", schema)
+        second["extra"] = True
+        client.cache.memory.clear()
+        from_disk = await client.generate_json_response("p", schema)
+        from_disk["prd_content"] = "changed again"
+        return second, await client.generate_json_response("p", schema)
+    
+    second, third = asyncio.run(scenario())
+    assert second == {"prd_content": "# PRD", "extra": True}
+    assert third == {"prd_content": "# PRD"}
+    assert inner.calls == 1
+
+def test_stub_client_reuses_shared_connection_pool(monkeypatch):
+    """Test that every call goes through one app-scoped HTTP client"""
+    seen_clients = set()
+    requests = []
+    
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"content": "pooled"})
+    
+    monkeypatch.setenv("LLM_PROVIDER", "stub")
+    monkeypatch.setenv("STUB_LLM_URL", "http://stub.local/v1/complete")
+    
+    async def scenario():
+        await close_llm_clients()
+        open_http_pool(transport=httpx.MockTransport(handler))
+        try:
+            for _ in range(3):
+                client = get_llm_client()
+                seen_clients.add(id(client))
+                assert await client.generate_response("hello") == "pooled"
+            return get_http_pool()
+        finally:
+            await close_llm_clients()
+    
+    pool = asyncio.run(scenario())
+    assert len(seen_clients) == 1
+    assert len(requests) == 3
+    assert pool.is_closed
+
+def test_stub_client_offline_response(monkeypatch):
+    """Test that the stub answers PRD prompts without any network access"""
+    monkeypatch.delenv("STUB_LLM_URL", raising=False)
+    client = StubClient()
+    schema = {"type": "object", "properties": {"prd_content": {"type": "string"}}}
+    
+    response = asyncio.run(client.generate_json_response("prompt", schema))
+    assert response["prd_content"].startswith("# Product Requirements Document")
+
+class SlowClient(CountingClient):
+    """Fake provider that tracks how many calls overlap"""
+    
+    def __init__(self, delay: float = 0.05):
+        super().__init__("slow")
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+    
+    async def generate_response(self, prompt: str) -> str:
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        return f"{self.response}:{prompt}"
+
+def test_limited_client_bounds_concurrency():
+    """Test that bursts queue behind the provider's concurrency limit"""
+    inner = SlowClient()
+    limiter = ProviderLimiter("fake", max_concurrency=2)
+    client = LimitedLLMClient(inner, limiter)
+    
+    async def scenario():
+        return await asyncio.gather(*(client.generate_response(f"p{i}") for i in range(6)))
+    
+    responses = asyncio.run(scenario())
+    assert responses == [f"slow:p{i}" for i in range(6)]
+    assert inner.peak == 2
+    stats = limiter.stats()
+    assert stats["acquired"] == 6 and stats["queued"] == 0 and stats["in_flight"] == 0
+    assert stats["max_wait_ms"] > 0
+
+def test_limited_client_coalesces_identical_prompts():
+    """Test that identical in-flight prompts share one upstream call"""
+    inner = SlowClient()
+    limiter = ProviderLimiter("fake")
+    client = LimitedLLMClient(inner, limiter)
+    
+    async def scenario():
+        return await asyncio.gather(*(client.generate_response("same") for _ in range(5)))
+    
+    assert asyncio.run(scenario()) == ["slow:same"] * 5
+    assert inner.calls == 1
+    assert limiter.stats()["coalesced"] == 4
+
+def test_limited_client_rejects_calls_over_rate_budget():
+    """Test that calls which would wait past the max are reported as errors"""
+    inner = SlowClient(delay=0)
+    client = LimitedLLMClient(inner, ProviderLimiter("fake", requests_per_minute=2, max_wait_seconds=1))
+    
+    async def scenario():
+        return [await client.generate_response(f"p{i}") for i in range(3)]
+    
+    responses = asyncio.run(scenario())
+    assert responses[:2] == ["slow:p0", "slow:p1"]
+    assert is_error_response(responses[2])
+    assert inner.calls == 2
+
+def test_limiter_slot_after_full_rate_wait():
+    """Test that a rate wait using the whole budget still gets a free slot, and a rejection is refunded"""
+    limiter = ProviderLimiter("fake", max_concurrency=1, requests_per_minute=60, max_wait_seconds=0.1)
+    reserve_budget = limiter._wait_for_budget
+    
+    async def long_rate_wait(tokens):
+        await reserve_budget(tokens)
+        await asyncio.sleep(0.15)
+    
+    limiter._wait_for_budget = long_rate_wait
+    
+    async def scenario():
+        async with limiter.slot():
+            limiter.requests.reserve(0)
+            before = limiter.requests.tokens
+            with pytest.raises(LimiterTimeout):
+                async with limiter.slot():
+                    pass
+            limiter.requests.reserve(0)
+            return limiter.requests.tokens - before
+    
+    # Without the refund the rejected call would have spent a whole request
+    assert asyncio.run(scenario()) > -0.5
+    assert limiter.stats()["acquired"] == 1
+    assert limiter.stats()["rejected"] == 1
+
+def test_extract_json_tolerates_fences_and_prose():
+    """Test that JSON is recovered from typical chatty model output"""
+    assert extract_json('{"a": 1}') == {"a": 1}
+    assert extract_json('Here you go:\n```json\n{"a": 1}\n```\nEnjoy!') == {"a": 1}
+    assert extract_json('Sure! {"a": [1, 2]} Hope that helps {') == {"a": [1, 2]}
+    assert extract_json("no json here") is None
+    assert extract_json("") is None
+
+class ScriptedClient(CountingClient):
+    """Fake provider that replays responses and records prompts"""
+    
+    provider = "scripted"
+    
+    def __init__(self, *responses: str):
+        super().__init__()
+        self.responses = list(responses)
+        self.prompts = []
+    
+    async def generate_response(self, prompt: str) -> str:
+        self.calls += 1
+        self.prompts.append(prompt)
+        return self.responses.pop(0)
+
+def test_json_response_parses_prose_without_reasking():
+    """Test that recoverable output costs a single provider call"""
+    client = ScriptedClient('Sure, here it is:\n```\n{"prd_content": "# PRD"}\n```')
+    
+    response = asyncio.run(client.generate_json_response("original prompt", {"type": "object"}))
+    
+    assert response == {"prd_content": "# PRD"}
+    assert client.calls == 1
+
+def test_json_repair_reask_sends_only_broken_output():
+    """Test that the repair re-ask omits the original prompt and counts as a retry"""
+    client = ScriptedClient('{"prd_content": "unterminated', '{"prd_content": "fixed"}')
+    before = json_stats().get("scripted", {"calls": 0, "retries": 0})
+    
+    response = asyncio.run(client.generate_json_response("original prompt", {"type": "object"}))
+    
+    assert response == {"prd_content": "fixed"}
+    assert client.calls == 2
+    assert "original prompt" not in client.prompts[1]
+    assert '{"prd_content": "unterminated' in client.prompts[1]
+    stats = json_stats()["scripted"]
+    assert stats["calls"] == before["calls"] + 1
+    assert stats["retries"] == before["retries"] + 1
+    assert 0 < stats["retry_rate"] <= 1
+
+def test_json_stats_are_booked_under_the_answering_provider():
+    """Test that repairs behind the router count against the provider that produced bad JSON"""
+    router = RoutingLLMClient([InstrumentedLLMClient(StubClient("garbled", response="not json"))])
+    before = json_stats().get("router", {"calls": 0})
+    
+    asyncio.run(router.generate_json_response("p", {"type": "object"}))
+    
+    stats = json_stats()["garbled"]
+    assert stats["calls"] == 1 and stats["retries"] == 1 and stats["failures"] == 1
+    assert json_stats().get("router", {"calls": 0})["calls"] == before["calls"]
+
+def test_router_fails_over_and_opens_breaker(monkeypatch):
+    """Test that a failing provider is skipped once its breaker opens"""
+    monkeypatch.setattr(random, "choices", lambda population, weights: [population[0]])
+    broken = StubClient("broken", error_rate=1.0)
+    healthy = StubClient("healthy", response="ok")
+    router = RoutingLLMClient(
+        [broken, healthy],
+        breaker_factory=lambda: CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    )
+    
+    async def scenario():
+        return [await router.generate_response("p") for _ in range(10)]
+    
+    assert asyncio.run(scenario()) == ["ok"] * 10
+    assert broken.calls == 2
+    assert router.stats()["broken"]["state"] == "open"
+    assert router.stats()["healthy"]["wins"] == 10
+
+def test_router_hedged_request_takes_first_answer():
+    """Test that the hedge wins when the primary stalls and the loser is cancelled"""
+    slow = StubClient("slow", latency=latency_distribution("1000"), response="slow")
+    fast = StubClient("fast", latency=latency_distribution("uniform:10:20"), response="fast")
+    router = RoutingLLMClient([slow, fast], hedge=True, hedge_delay=0.05)
+    router._candidates = lambda: [router.providers[0], router.providers[1]]
+    
+    started = time.perf_counter()
+    response = asyncio.run(router.generate_response("p"))
+    
+    assert response == "fast"
+    assert time.perf_counter() - started < 0.5
+    assert router.stats()["fast"]["hedged"] == 1
+    assert router.stats()["slow"]["calls"] == 0
+
+def test_router_hedge_cancels_loser_behind_limiter(monkeypatch):
+    """Test that the losing hedge releases its limiter slot through the factory wrappers"""
+    clients = []
+    for name, latency in (("slow", "1000"), ("fast", "10")):
+        # Distinct models so the two attempts are not coalesced into one call
+        monkeypatch.setenv("STUB_LLM_MODEL", f"stub-{name}")
+        monkeypatch.setenv("STUB_LLM_LATENCY_MS", latency)
+        monkeypatch.setenv("STUB_LLM_RESPONSE", name)
+        clients.append(create_provider_client("stub"))
+    slow, fast = clients
+    router = RoutingLLMClient([slow, fast], hedge=True, hedge_delay=0.05)
+    router._candidates = lambda: [router.providers[0], router.providers[1]]
+    
+    async def scenario():
+        response = await router.generate_response("p")
+        await asyncio.sleep(0.05)
+        return response, get_limiter("stub").stats()
+    
+    started = time.perf_counter()
+    response, stats = asyncio.run(scenario())
+    asyncio.run(close_llm_clients())
+    
+    assert response == "fast"
+    assert time.perf_counter() - started < 0.5
+    assert stats["in_flight"] == 0
+    assert stats["acquired"] == 2
@@ -0,0 +1,262 @@
+"""Latency and throughput of the HTTP API and orchestrator hot paths
+
+Drives an in-process app over httpx's ASGI transport against a scratch
+SQLite database and the offline stub LLM, then writes a JSON report with
+p50/p95/p99 latency and throughput per scenario. Compare two reports with
+``python -m benchmarks.compare``.
+
+    python -m benchmarks.api --json before.json
+    python -m benchmarks.api --scenario drafts --draft-rows 1000 --draft-rows 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("drafts", "answer", "status", "commit", "contracts")
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> Dict[str, Any]:
+    """Percentiles (ms) and throughput for one scenario"""
+    # statistics.quantiles needs two points; a single sample is every percentile
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(quantiles[49] * 1000, 3),
+        "p95_ms": round(quantiles[94] * 1000, 3),
+        "p99_ms": round(quantiles[98] * 1000, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0
+    }
+
+async def measure(operation: Callable[[int], Awaitable[bool]], requests: int, concurrency: int) -> Dict[str, Any]:
+    """Run ``operation(i)`` ``requests`` times, ``concurrency`` at a time"""
+    latencies: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            ok = await operation(i)
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+def seed_drafts(rows: int) -> None:
+    from sqlalchemy import delete, insert
+    from app.backend.models import Draft
+    from app.db.base import engine
+    
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(delete(Draft))
+        for start in range(0, rows, 5000):
+            conn.execute(insert(Draft), [
+                {
+                    "id": str(uuid.uuid4()),
+                    "owner": f"owner_{i % 50}",
+                    "payload": {"n": i},
+                    "updated_at": now - timedelta(seconds=i)
+                }
+                for i in range(start, min(start + 5000, rows))
+            ])
+
+async def bench_drafts(client, args) -> Dict[str, Any]:
+    results = {}
+    for rows in args.draft_rows:
+        seed_drafts(rows)
+        created: List[str] = []
+        
+        async def create(i: int) -> bool:
+            response = await client.post("/v1/drafts", json={"owner": f"owner_{i % 50}", "payload": {"i": i}})
+            created.append(response.json().get("id"))
+            return response.status_code == 201
+        
+        async def read(i: int) -> bool:
+            return (await client.get(f"/v1/drafts/{created[i % len(created)]}")).status_code == 200
+        
+        async def update(i: int) -> bool:
+            response = await client.put(f"/v1/drafts/{created[i % len(created)]}", json={"payload": {"u": i}})
+            return response.status_code == 200
+        
+        async def page(i: int) -> bool:
+            response = await client.get("/v1/drafts", params={"limit": 100, "owner": f"owner_{i % 50}"})
+            return response.status_code == 200
+        
+        results[f"drafts_create@{rows}"] = await measure(create, args.requests, args.concurrency)
+        results[f"drafts_get@{rows}"] = await measure(read, args.requests, args.concurrency)
+        results[f"drafts_update@{rows}"] = await measure(update, args.requests, args.concurrency)
+        results[f"drafts_list@{rows}"] = await measure(page, args.requests, args.concurrency)
+    return results
+
+async def bench_answer(client, args) -> Dict[str, Any]:
+    conversations = [
+        (await client.post("/intake/start", json={})).json()["conversation_id"]
+        for _ in range(args.concurrency)
+    ]
+    
+    async def answer(i: int) -> bool:
+        response = await client.post("/intake/answer", json={
+            "conversation_id": conversations[i % len(conversations)],
+            "slot_name": "project_description",
+            "value": f"Answer {i}"
+        })
+        return response.status_code == 200
+    
+    return {"intake_answer": await measure(answer, args.requests, args.concurrency)}
+
+async def bench_status(client, args) -> Dict[str, Any]:
+    conversations = []
+    for i in range(args.concurrency):
+        conversation_id = (await client.post("/intake/start", json={"project_name": f"Status {i}"})).json()["conversation_id"]
+        await client.post("/intake/answer", json={
+            "conversation_id": conversation_id, "slot_name": "key_features", "value": ["search", "export"]
+        })
+        conversations.append(conversation_id)
+    
+    async def status(i: int) -> bool:
+        response = await client.get("/intake/status", params={"conversation_id": conversations[i % len(conversations)]})
+        return response.status_code == 200
+    
+    return {"intake_status": await measure(status, args.requests, args.concurrency)}
+
+async def bench_commit(client, args) -> Dict[str, Any]:
+    async def commit(i: int) -> bool:
+        conversation_id = (await client.post("/intake/start", json={})).json()["conversation_id"]
+        for slot_name, value in [
+            ("project_name", f"Bench {i}"),
+            ("project_description", "Benchmark project"),
+            ("target_users", "operators"),
+            ("key_features", ["search", "export"]),
+            ("data_entities", ["Widget"]),
+        ]:
+            await client.post("/intake/answer", json={
+                "conversation_id": conversation_id, "slot_name": slot_name, "value": value
+            })
+        response = await client.post("/intake/commit", json={"conversation_id": conversation_id})
+        if response.status_code != 202:
+            return False
+        status_url = response.json()["status_url"]
+        while True:
+            job = (await client.get(status_url)).json()
+            if job["status"] in ("succeeded", "failed"):
+                return job["status"] == "succeeded"
+            await asyncio.sleep(0.005)
+    
+    return {f"intake_commit@{args.llm_latency}ms": await measure(commit, args.commit_requests, args.concurrency)}
+
+async def bench_contracts(client, args) -> Dict[str, Any]:
+    from app.orchestrator.generator import PRDGenerator
+    from app.orchestrator.slots import ConversationSlots
+    
+    generator = PRDGenerator()
+    results = {}
+    for entities in args.entities:
+        if os.path.exists("contracts/api.yaml"):
+            os.remove("contracts/api.yaml")
+        names = [f"Entity{n}" for n in range(entities)]
+        
+        async def update(i: int) -> bool:
+            # Alternate between a no-op re-apply and one changed entity
+            batch = names if i % 2 == 0 else names[:-1] + [f"Changed{i}"]
+            await generator._update_contracts(ConversationSlots(data_entities=batch))
+            return True
+        
+        results[f"update_contracts@{entities}"] = await measure(update, args.commit_requests, 1)
+    return results
+
+async def run(args) -> Dict[str, Any]:
+    import httpx
+    from app.db.base import Base, engine
+    from app.main import app
+    
+    Base.metadata.create_all(bind=engine)
+    if engine.dialect.name == "sqlite":
+        # Let readers and the single writer overlap, as they would on Postgres
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+    benches = {
+        "drafts": bench_drafts, "answer": bench_answer, "status": bench_status,
+        "commit": bench_commit, "contracts": bench_contracts
+    }
+    results: Dict[str, Any] = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name in args.scenario or SCENARIOS:
+                results.update(await benches[name](client, args))
+    return results
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="run only these scenarios")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10, help="requests in flight at once")
+    parser.add_argument("--commit-requests", type=int, default=50, help="commits and contract updates to run")
+    parser.add_argument("--draft-rows", type=int, action="append", help="draft table sizes to test (repeatable)")
+    parser.add_argument("--entities", type=int, action="append", help="entity counts for update_contracts")
+    parser.add_argument("--llm-latency", default="50", help="stub LLM latency spec in ms, e.g. 50 or lognormal:200:0.5")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+    args.draft_rows = args.draft_rows or [1000, 50000]
+    args.entities = args.entities or [10, 100]
+    json_path = os.path.abspath(args.json) if args.json else None
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        # Configure the app before it is imported: scratch database, offline LLM
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ.update({
+            "DATABASE_URL": url,
+            "ASYNC_DATABASE_URL": url.replace("sqlite://", "sqlite+aiosqlite://", 1),
+            "LLM_PROVIDER": "stub",
+            "STUB_LLM_LATENCY_MS": args.llm_latency,
+            "TEMPLATES_DIR": os.path.join(REPO_ROOT, "docs", "templates"),
+            "JOB_WORKERS": os.getenv("JOB_WORKERS", str(args.concurrency)),
+        })
+        os.chdir(tmp)
+        sys.path.insert(0, REPO_ROOT)
+        results = asyncio.run(run(args))
+    
+    report = {
+        "revision": git_revision(),
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "draft_rows": args.draft_rows,
+            "entities": args.entities,
+            "llm_latency": args.llm_latency
+        },
+        "scenarios": results
+    }
+    for name, stats in results.items():
+        print(f"{name:<32} p50 {stats['p50_ms']:>9.3f} ms  p95 {stats['p95_ms']:>9.3f} ms  "
+              f"p99 {stats['p99_ms']:>9.3f} ms  {stats['throughput_rps']:>9.2f} req/s  errors {stats['errors']}")
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Diff two benchmark reports and flag regressions
+
+Latency percentiles that grow, or throughput that drops, by more than
+``--threshold`` percent are regressions; the exit status is 1 if any are
+found, so this can gate CI.
+
+    python -m benchmarks.compare before.json after.json --threshold 10
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List, Tuple
+
+LATENCY_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+THROUGHPUT_METRIC = "throughput_rps"
+
+def compare(before: Dict, after: Dict, threshold: float) -> Tuple[List[str], List[str]]:
+    """Return (report lines, regressions) for scenarios present in both reports"""
+    lines, regressions = [], []
+    for name in sorted(set(before["scenarios"]) & set(after["scenarios"])):
+        old, new = before["scenarios"][name], after["scenarios"][name]
+        cells = []
+        for metric in LATENCY_METRICS + (THROUGHPUT_METRIC,):
+            if not old[metric]:
+                continue
+            change = (new[metric] - old[metric]) / old[metric] * 100
+            worse = change > threshold if metric != THROUGHPUT_METRIC else change < -threshold
+            cells.append(f"{metric} {old[metric]:.2f} -> {new[metric]:.2f} ({change:+.1f}%){' !' if worse else ''}")
+            if worse:
+                regressions.append(f"{name} {metric} {change:+.1f}%")
+        lines.append(f"{name}: " + ", ".join(cells))
+    return lines, regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("before", help="baseline report")
+    parser.add_argument("after", help="candidate report")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed change in percent")
+    args = parser.parse_args()
+    
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    
+    print(f"{before.get('revision', '?')} -> {after.get('revision', '?')}")
+    lines, regressions = compare(before, after, args.threshold)
+    for line in lines:
+        print(line)
+    
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold}%:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
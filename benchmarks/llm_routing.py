@@ -0,0 +1,80 @@
+"""Offline latency of single-provider, failover and hedged LLM routing
+
+Runs the same workload against fake providers with injectable latency
+distributions (see ``latency_distribution`` in the stub client) and reports
+p50/p95/p99 per routing mode.
+
+    python -m benchmarks.llm_routing --provider a=lognormal:200:0.3 --provider b=lognormal:250:0.8@0.05
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, List
+from app.orchestrator.llm.base import is_error_response
+from app.orchestrator.llm.router import RoutingLLMClient
+from app.orchestrator.llm.stub_client import StubClient, latency_distribution
+
+def build_providers(specs: List[str]) -> List[StubClient]:
+    """Parse ``name=latency_spec[@error_rate]`` into fake providers"""
+    providers = []
+    for spec in specs:
+        name, _, rest = spec.partition("=")
+        latency, _, error_rate = rest.partition("@")
+        providers.append(StubClient(
+            name,
+            latency=latency_distribution(latency),
+            error_rate=float(error_rate or 0),
+            response="ok"
+        ))
+    return providers
+
+async def run(client, requests: int, concurrency: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.generate_response(f"prompt {i}")
+            latencies.append((time.perf_counter() - started) * 1000)
+            if is_error_response(response):
+                errors += 1
+    
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "p50_ms": round(quantiles[49], 2),
+        "p95_ms": round(quantiles[94], 2),
+        "p99_ms": round(quantiles[98], 2),
+        "error_rate": round(errors / requests, 4)
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--provider", action="append", help="name=latency_spec[@error_rate], repeatable")
+    parser.add_argument("--requests", type=int, default=300, help="calls per routing mode")
+    parser.add_argument("--concurrency", type=int, default=20, help="calls in flight at once")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+    specs = args.provider or ["a=lognormal:200:0.3", "b=lognormal:200:0.9@0.05"]
+    
+    modes = {
+        "single": lambda: build_providers(specs[-1:])[0],
+        "failover": lambda: RoutingLLMClient(build_providers(specs)),
+        "hedged": lambda: RoutingLLMClient(build_providers(specs), hedge=True),
+    }
+    report = {}
+    for mode, factory in modes.items():
+        report[mode] = asyncio.run(run(factory(), args.requests, args.concurrency))
+        print(f"{mode:>9}: " + "  ".join(f"{key} {value}" for key, value in report[mode].items()))
+    
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"providers": specs, "requests": args.requests, "modes": report}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Query plans and timings for truth-ledger lookups before and after the index migration
+
+Builds a scratch SQLite database at the initial revision, fills it with
+synthetic ledger data, then runs each lookup before and after upgrading to
+the index/foreign-key revision.
+
+    python -m benchmarks.query_plans --rows 200000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, text
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_REVISION = "65db29c79501"
+INDEX_REVISION = "ea0b98798de9"
+
+QUERIES = {
+    "events_for_conversation": "SELECT * FROM events WHERE conversation_id = :conversation_id ORDER BY timestamp",
+    "slot_lookup": "SELECT * FROM slots WHERE conversation_id = :conversation_id AND slot_name = :slot_name",
+    "pending_approvals_for_artifact": "SELECT * FROM approvals WHERE artifact_id = :artifact_id AND status = 'pending'",
+    "drafts_by_owner": "SELECT * FROM drafts WHERE owner = :owner ORDER BY updated_at DESC LIMIT 100",
+    "drafts_keyset_page": "SELECT * FROM drafts WHERE updated_at < :updated_at ORDER BY updated_at DESC, id DESC LIMIT 100",
+}
+
+def migrate(url: str, revision: str) -> None:
+    os.environ["DATABASE_URL"] = url
+    config = Config(os.path.join(REPO_ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(REPO_ROOT, "alembic"))
+    command.upgrade(config, revision)
+
+def populate(engine, rows: int) -> dict:
+    """Insert synthetic conversations, events, slots, artifacts, approvals and drafts"""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    conversation_ids = [f"conv_{uuid.uuid4().hex[:8]}" for _ in range(max(rows // 100, 1))]
+    artifact_ids = [str(uuid.uuid4()) for _ in range(max(rows // 20, 1))]
+    owners = [f"owner_{i}" for i in range(max(rows // 500, 1))]
+    slot_names = ["project_name", "project_description", "target_users", "key_features", "timeline"]
+    
+    def ts():
+        return now - timedelta(seconds=rng.randint(0, 90 * 86400))
+    
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO conversations (id, created_at, updated_at) VALUES (:id, :ts, :ts)"),
+            [{"id": cid, "ts": now} for cid in conversation_ids]
+        )
+        conn.execute(
+            text("INSERT INTO events (id, conversation_id, event_type, timestamp) VALUES (:id, :cid, 'slot.answered', :ts)"),
+            [{"id": str(uuid.uuid4()), "cid": rng.choice(conversation_ids), "ts": ts()} for _ in range(rows)]
+        )
+        conn.execute(
+            text("INSERT INTO slots (id, conversation_id, slot_name, slot_value) VALUES (:id, :cid, :name, '\"x\"')"),
+            [
+                {"id": str(uuid.uuid4()), "cid": cid, "name": name}
+                for cid in conversation_ids for name in slot_names
+            ]
+        )
+        conn.execute(
+            text("INSERT INTO artifacts (id, conversation_id, artifact_type, artifact_path) VALUES (:id, :cid, 'prd', 'docs/prds/x.md')"),
+            [{"id": aid, "cid": rng.choice(conversation_ids)} for aid in artifact_ids]
+        )
+        conn.execute(
+            text("INSERT INTO approvals (id, conversation_id, artifact_id, approver, status) VALUES (:id, :cid, :aid, 'qa', :status)"),
+            [
+                {
+                    "id": str(uuid.uuid4()),
+                    "cid": rng.choice(conversation_ids),
+                    "aid": rng.choice(artifact_ids),
+                    "status": rng.choice(["pending", "approved", "rejected"])
+                }
+                for _ in range(rows // 5)
+            ]
+        )
+        conn.execute(
+            text("INSERT INTO drafts (id, owner, payload, updated_at) VALUES (:id, :owner, '{}', :ts)"),
+            [{"id": str(uuid.uuid4()), "owner": rng.choice(owners), "ts": ts()} for _ in range(rows)]
+        )
+    
+    return {
+        "conversation_id": conversation_ids[0],
+        "slot_name": "target_users",
+        "artifact_id": artifact_ids[0],
+        "owner": owners[0],
+        "updated_at": now - timedelta(days=45)
+    }
+
+def measure(engine, params: dict, repeat: int) -> dict:
+    results = {}
+    with engine.connect() as conn:
+        for name, sql in QUERIES.items():
+            plan = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).fetchall()
+            samples = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                conn.execute(text(sql), params).fetchall()
+                samples.append((time.perf_counter() - started) * 1000)
+            results[name] = {
+                "plan": [row[-1] for row in plan],
+                "median_ms": round(statistics.median(samples), 3)
+            }
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000, help="events and drafts to generate")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per query")
+    parser.add_argument("--json", help="write the before/after report to this file")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'plans.db')}"
+        migrate(url, BASE_REVISION)
+        engine = create_engine(url)
+        params = populate(engine, args.rows)
+        
+        before = measure(engine, params, args.repeat)
+        engine.dispose()
+        migrate(url, INDEX_REVISION)
+        engine = create_engine(url)
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+        after = measure(engine, params, args.repeat)
+        engine.dispose()
+    
+    for name in QUERIES:
+        print(f"{name}:")
+        print(f"  before {before[name]['median_ms']:>9.3f} ms  {' | '.join(before[name]['plan'])}")
+        print(f"  after  {after[name]['median_ms']:>9.3f} ms  {' | '.join(after[name]['plan'])}")
+    
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"rows": args.rows, "before": before, "after": after}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
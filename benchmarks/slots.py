@@ -0,0 +1,93 @@
+"""Per-request cost of the /intake/status slot bookkeeping
+
+Times the work /intake/status does around the store lookup, gap
+computation and response serialization, both as it is now (shared
+``SlotManager``, filled-slot bitmask, ``model_dump_json``) and as it was
+before (a ``SlotManager`` per request, a ``getattr`` walk over the required
+slots, ``.dict()`` and FastAPI's re-validation of the response model).
+
+    python -m benchmarks.slots --iterations 200000
+"""
+import argparse
+import json
+import time
+import warnings
+from typing import Callable, Dict, List
+from fastapi.encoders import jsonable_encoder
+from app.orchestrator.routes import StatusResponse
+from app.orchestrator.slots import ConversationSlots, SlotManager, get_slot_manager
+
+LEGACY_REQUIRED_SLOTS = ["project_name", "project_description", "target_users", "key_features"]
+
+def legacy_gaps(conversation: ConversationSlots) -> List[str]:
+    gaps = []
+    for slot in LEGACY_REQUIRED_SLOTS:
+        value = getattr(conversation, slot)
+        if value is None or (isinstance(value, list) and len(value) == 0):
+            gaps.append(slot)
+    return gaps
+
+def legacy_status(conversation: ConversationSlots) -> bytes:
+    slot_manager = SlotManager()
+    gaps = legacy_gaps(conversation)
+    next_question = slot_manager.get_next_question(gaps) if gaps else None
+    response = StatusResponse(slots=conversation.dict(), gaps=gaps, next_question=next_question)
+    # What FastAPI does with a returned model when the route has a response_model
+    validated = StatusResponse.model_validate(response.model_dump())
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+def current_status(conversation: ConversationSlots) -> bytes:
+    slot_manager = get_slot_manager()
+    gaps = slot_manager.get_gaps(conversation)
+    next_question = slot_manager.get_next_question(gaps) if gaps else None
+    return StatusResponse.model_construct(
+        slots=conversation.model_dump(), gaps=list(gaps), next_question=next_question
+    ).model_dump_json().encode()
+
+def time_per_call(fn: Callable[[ConversationSlots], bytes], conversation: ConversationSlots, iterations: int) -> float:
+    """Best of three runs, in microseconds per call"""
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn(conversation)
+        best = min(best, time.perf_counter() - started)
+    return best / iterations * 1e6
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50000, help="calls per timing run")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+    # .dict() is exactly what the legacy path is measured with
+    warnings.simplefilter("ignore", DeprecationWarning)
+    
+    conversations = {
+        "empty": ConversationSlots(),
+        "partial": ConversationSlots(project_name="Atlas", key_features=["search", "export"]),
+        "complete": ConversationSlots(
+            project_name="Atlas",
+            project_description="Inventory tracking",
+            target_users="warehouse staff",
+            key_features=["search", "export"],
+            data_entities=["Item", "Location"]
+        ),
+    }
+    report: Dict[str, Dict[str, float]] = {}
+    for name, conversation in conversations.items():
+        assert json.loads(legacy_status(conversation)) == json.loads(current_status(conversation))
+        legacy = time_per_call(legacy_status, conversation, args.iterations)
+        current = time_per_call(current_status, conversation, args.iterations)
+        report[name] = {
+            "legacy_us": round(legacy, 3),
+            "current_us": round(current, 3),
+            "speedup": round(legacy / current, 2)
+        }
+        print(f"{name:>9}: legacy {legacy:8.3f} us  current {current:8.3f} us  {legacy / current:5.2f}x")
+    
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"iterations": args.iterations, "conversations": report}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
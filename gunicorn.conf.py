@@ -0,0 +1,19 @@
+import os
+import shutil
+import tempfile
+
+# Each worker writes Prometheus samples to files here; /metrics in any worker
+# aggregates them. The variable must be set before workers import the app.
+multiproc_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "agentic-metrics")
+)
+
+def on_starting(server):
+    """Start from an empty metrics directory so samples from a previous run are dropped"""
+    shutil.rmtree(multiproc_dir, ignore_errors=True)
+    os.makedirs(multiproc_dir, exist_ok=True)
+
+def child_exit(server, worker):
+    """Stop reporting live gauges for a worker that exited"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)